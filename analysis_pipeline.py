@@ -0,0 +1,276 @@
+"""
+ Asenkron Veri Toplama -> Analiz -> Çizim Boru Hattı
+ ====================================================
+ - Okuyucu: asyncio görevi, osiloskoptan çerçeve çeker
+ - Analiz: HarmonicAnalyzer çalıştıran CPU işçi havuzu (süreç veya iş parçacığı)
+ - Çizici: hız sınırlı, her zaman en güncel sonucu çizer
+ - Aşamalar sınırlı kuyruklarla bağlıdır; kuyruk doluysa en eski çerçeve
+   atılır, böylece yavaş bir çizim veri toplamayı asla durdurmaz
+ - Kuyruk derinlikleri ve atılan çerçeve sayıları stats() ile raporlanır
+"""
+
+import asyncio
+import concurrent.futures
+import multiprocessing
+import threading
+import argparse
+import time
+
+
+class DropOldestQueue:
+    """Sınırlı asyncio kuyruğu: doluyken put() en eski öğeyi atar, beklemez"""
+
+    def __init__(self, maxsize):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, item):
+        while self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def get_latest(self, item):
+        """Kuyrukta daha yeni öğe varsa eskileri atlayıp en yenisini döndür"""
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            self.dropped += 1
+        return item
+
+    def qsize(self):
+        return self.queue.qsize()
+
+
+class ScopeFrameSource:
+    """AsyncRigolScpiClient ile sürekli çerçeve üreten okuyucu kaynak"""
+
+    def __init__(self, host, port, channels=('CH1', 'CH2'), mode='RAW'):
+        from scope_acquisition import AsyncRigolScpiClient
+        self.client = AsyncRigolScpiClient(host, port)
+        self.channels = channels
+        self.mode = mode
+
+    async def open(self):
+        await self.client.connect()
+
+    async def read_frame(self):
+        return await self.client.acquire_frame(self.channels, mode=self.mode)
+
+    def close(self):
+        self.client.close()
+
+
+class FrameAnalysisJob:
+    """İşçi süreçte çalışan analiz işi: frame -> (çerçeve, sonuçlar).
+
+    settings özniteliği çalışırken güncellenebilir; her gönderimde o anki
+    ayarlar işçiye taşınır.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+
+    def __call__(self, frame):
+        from harmonic_core import analyze_capture, result_cycles
+        results = analyze_capture(frame, self.settings)
+        # Periyot istatistikleri işçide hesaplanır; GUI raporu her çerçevede yeniden taramaz
+        for res in results.values():
+            result_cycles(res)
+        return frame, results
+
+
+class StagedPipeline:
+    """Okuyucu -> analiz havuzu -> hız sınırlı çizici.
+
+    source: open()/read_frame()/close() sağlayan asenkron kaynak
+    analyze: analyze(frame) -> sonuç; işçi havuzunda çalışır (süreç havuzu
+             için seçilebilir/pickle edilebilir olmalı)
+    render: render(sonuç); concurrent.futures.Future dönerse çizim bitene
+            kadar beklenir (ör. Tk ana iş parçacığında çizim)
+    """
+
+    def __init__(self, source, analyze, render, workers=2, queue_size=2,
+                 render_hz=4.0, use_processes=True):
+        self.source = source
+        self.analyze = analyze
+        self.render = render
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.render_interval = 1.0 / render_hz if render_hz else 0.0
+        self.use_processes = use_processes
+
+        self.counters = {'read': 0, 'analyzed': 0, 'rendered': 0, 'stale': 0}
+        self.error = None
+        self.frame_queue = None
+        self.result_queue = None
+        self._executor = None
+        self._loop = None
+        self._thread = None
+        self._stop = None
+        self._seq = 0
+        self._last_result_seq = -1
+
+    def stats(self):
+        """Kuyruk derinlikleri ve atılan çerçeve sayıları"""
+        stats = dict(self.counters)
+        for name, q in (('frame', self.frame_queue), ('result', self.result_queue)):
+            stats[f'{name}_depth'] = q.qsize() if q is not None else 0
+            stats[f'{name}_dropped'] = q.dropped if q is not None else 0
+        stats['dropped'] = stats['frame_dropped'] + stats['result_dropped'] + stats['stale']
+        return stats
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"okunan {s['read']} | analiz {s['analyzed']} | çizilen {s['rendered']} | "
+                f"kuyruk {s['frame_depth']}/{self.queue_size}, {s['result_depth']}/1 | "
+                f"atılan {s['dropped']} (ham {s['frame_dropped']}, sonuç {s['result_dropped']}, "
+                f"eski {s['stale']})")
+
+    # ----- aşamalar -----
+
+    async def _reader(self):
+        await self.source.open()
+        try:
+            while not self._stop.is_set():
+                frame = await self.source.read_frame()
+                self.counters['read'] += 1
+                self.frame_queue.put((self._seq, frame))
+                self._seq += 1
+        finally:
+            self.source.close()
+
+    async def _analysis_worker(self):
+        loop = asyncio.get_running_loop()
+        while not self._stop.is_set():
+            seq, frame = await self.frame_queue.get()
+            result = await loop.run_in_executor(self._executor, self.analyze, frame)
+            self.counters['analyzed'] += 1
+            # Birden çok işçi sırasız bitirebilir; daha yeni bir sonuçtan
+            # sonra gelen eski sonuç çizilmez
+            if seq < self._last_result_seq:
+                self.counters['stale'] += 1
+                continue
+            self._last_result_seq = seq
+            self.result_queue.put(result)
+
+    async def _renderer(self):
+        last_render = 0.0
+        while not self._stop.is_set():
+            result = await self.result_queue.get()
+            wait = self.render_interval - (time.monotonic() - last_render)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            result = self.result_queue.get_latest(result)
+            last_render = time.monotonic()
+            done = self.render(result)
+            if isinstance(done, concurrent.futures.Future):
+                await asyncio.wrap_future(done)
+            self.counters['rendered'] += 1
+
+    async def run(self):
+        """Tüm aşamaları çalıştır; stop() çağrılana veya hata oluşana kadar sürer"""
+        self._stop = asyncio.Event()
+        self.frame_queue = DropOldestQueue(self.queue_size)
+        self.result_queue = DropOldestQueue(1)
+        if self.use_processes:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context('spawn'))
+        else:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                self.workers, thread_name_prefix='analysis')
+
+        tasks = [asyncio.ensure_future(self._reader()), asyncio.ensure_future(self._renderer())]
+        tasks += [asyncio.ensure_future(self._analysis_worker()) for _ in range(self.workers)]
+        stop_task = asyncio.ensure_future(self._stop.wait())
+        try:
+            done, _ = await asyncio.wait(tasks + [stop_task], return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task is not stop_task and task.exception() is not None:
+                    self.error = task.exception()
+        finally:
+            for task in tasks + [stop_task]:
+                task.cancel()
+            await asyncio.gather(*tasks, stop_task, return_exceptions=True)
+            self._executor.shutdown(wait=False)
+
+    # ----- arka plan iş parçacığında çalıştırma (GUI için) -----
+
+    def start(self):
+        """Boru hattını kendi olay döngüsüyle arka plan iş parçacığında başlat"""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self.run(),),
+                                        name='staged-pipeline', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """İş parçacığı güvenli durdurma"""
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+
+def default_settings(ratio=20.0, num_harmonics=40, expressions=(), fold_cycles=0):
+    """GUI olmadan çalışırken kullanılacak varsayılan analiz ayarları (AnalysisSettings).
+    
+    expressions: DIFF (CH1-CH2) dışında analiz edilecek kanal ifadeleri, ör. 'CH1-CH2-CH3'
+    fold_cycles: > 0 ise metrikler o kadar periyotluk senkron ortalamadan hesaplanır
+    """
+    from harmonic_core import AnalysisSettings, ChannelSettings, CHANNEL_NAMES
+    return AnalysisSettings(num_harmonics, [ChannelSettings(ch, ratio=ratio) for ch in CHANNEL_NAMES],
+                            expressions=expressions, fold_cycles=fold_cycles)
+
+
+def main():
+    from scope_acquisition import ScopeSimulator, SCPI_PORT
+
+    parser = argparse.ArgumentParser(description="Asenkron veri toplama/analiz boru hattı")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=SCPI_PORT)
+    parser.add_argument('--simulate', action='store_true', help="Yerel SCPI simülatörünü kullan")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--render-hz', type=float, default=2.0)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--threads', action='store_true', help="Süreç yerine iş parçacığı havuzu")
+    args = parser.parse_args()
+
+    sim = None
+    host, port = args.host, args.port
+    if args.simulate:
+        sim = ScopeSimulator(host, 0).start()
+        host, port = sim.address
+
+    def render(item):
+        frame, results = item
+        line = ' | '.join(f"{ch}: THD={res['thd']:.1f}%" for ch, res in results.items())
+        print(f"{line}  [{pipeline.format_stats()}]")
+
+    pipeline = StagedPipeline(ScopeFrameSource(host, port),
+                              FrameAnalysisJob(default_settings()),
+                              render, workers=args.workers, render_hz=args.render_hz,
+                              use_processes=not args.threads)
+    pipeline.start()
+    try:
+        time.sleep(args.seconds)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipeline.stop()
+        if sim is not None:
+            sim.stop()
+    if pipeline.error is not None:
+        print(f"Hata: {pipeline.error}")
+    print(pipeline.format_stats())
+
+
+if __name__ == "__main__":
+    main()
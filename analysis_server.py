@@ -0,0 +1,393 @@
+"""
+ Yerel HTTP Analiz Servisi
+ =========================
+ - Birden çok test masası tek analiz bilgisayarını paylaşır
+ - POST /analyze : Rigol CSV yükle (ham gövde veya multipart/form-data),
+   CH1-CH4 oranları, DIFF ayarları, kanal ifadeleri (expr=CH1-CH2-CH3,
+   tekrarlanabilir) ve periyot katlama (fold=10) sorgu parametreleriyle verilir
+ - Yükleme belleğe alınmaz, parça parça geçici dosyaya akıtılır
+ - Analiz sınırlı süreç havuzunda çalışır; eşzamanlılık sınırı ve
+   bekleme kuyruğu dolunca 503 döner
+ - GET /health : havuz ve kuyruk durumu
+
+ Kullanım:
+   python analysis_server.py --port 8050 --workers 2
+   curl -X POST --data-binary @kayit.csv "http://127.0.0.1:8050/analyze?ch1_ratio=20&ch2_ratio=20"
+"""
+
+import os
+import json
+import argparse
+import tempfile
+import threading
+import multiprocessing
+import concurrent.futures
+
+from harmonic_core import AnalysisSettings, ChannelSettings, FilterSettings
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_PORT = 8050
+
+
+def settings_from_query(query):
+    """Sorgu parametrelerinden analyze_capture için AnalysisSettings oluştur"""
+    def get(name, default):
+        values = query.get(name)
+        return values[-1] if values else default
+
+    def get_bool(name, default):
+        return get(name, '1' if default else '0').lower() in ('1', 'true', 'yes', 'on')
+
+    channels = []
+    for ch in ('CH1', 'CH2', 'CH3', 'CH4'):
+        prefix = ch.lower()
+        filter_type = get(f'{prefix}_filter', 'off')
+        channels.append(ChannelSettings(
+            ch,
+            enabled=get_bool(f'{prefix}_enabled', True),
+            type=get(f'{prefix}_type', 'Akim'),
+            ratio=float(get(f'{prefix}_ratio', 20.0)),
+            filter_enabled=filter_type != 'off',
+            filter_type=filter_type if filter_type != 'off' else 'savgol',
+            filter_cutoff=float(get(f'{prefix}_cutoff', 2500))))
+        if channels[-1].type not in ('Akim', 'Voltaj'):
+            raise ValueError(f"{prefix}_type 'Akim' veya 'Voltaj' olmalı")
+
+    diff_filter = get('diff_filter', 'off')
+    num_harmonics = int(get('num_harmonics', 40))
+    if not 1 <= num_harmonics <= 50:
+        raise ValueError("num_harmonics 1-50 arasında olmalı")
+    fold_cycles = int(get('fold', 0))
+    if fold_cycles < 0:
+        raise ValueError("fold 0 veya pozitif olmalı")
+
+    return AnalysisSettings(
+        num_harmonics=num_harmonics,
+        channels=channels,
+        diff_filter=FilterSettings(diff_filter != 'off', diff_filter if diff_filter != 'off' else 'savgol',
+                                   float(get('diff_cutoff', 500))),
+        expressions=[e for values in query.get('expr', []) for e in values.split(';') if e.strip()],
+        fold_cycles=fold_cycles)
+
+
+def results_to_json(results):
+    """Analiz sonuçlarını JSON uyumlu sözlüğe çevir (dalga formları hariç)"""
+    channels = {}
+    for ch, res in results.items():
+        channels[ch] = {
+            'channel': res['channel'],
+            'type': res['type'],
+            'unit': res['unit'],
+            'ratio': float(res['ratio']),
+            'filter': res['filter_info'].strip(' |[]'),
+            'fundamental': float(res['fundamental']),
+            'thd': float(res['thd']),
+            'tdd': float(res['tdd']),
+            'rms': float(res['rms']),
+            'ipk': float(res['ipk']),
+            'cf': float(res['cf']),
+            'pf': float(res['pf']),
+            'passed': bool(res['passed']),
+            'failed': res['failed']['harmonic'].tolist(),
+            'harmonics': res['harmonics'].to_dicts(),
+            'groups': {key: values.tolist() for key, values in res['groups'].items()}
+        }
+        if 'power' in res:
+            channels[ch]['power'] = {key: values.tolist() if hasattr(values, 'tolist') else values
+                                     for key, values in res['power'].items()}
+    return channels
+
+
+def analyze_upload(filepath, settings):
+    """İşçi süreçte çalışır: yüklenen CSV'yi oku ve analiz et"""
+    from harmonic_core import load_rigol_csv, analyze_capture
+    data = load_rigol_csv(filepath)
+    results = analyze_capture(data, settings)
+    return {
+        'points': int(len(data['time'])),
+        'sample_rate': float(data['sample_rate']),
+        'channels': results_to_json(results)
+    }
+
+
+class UploadError(Exception):
+    """İstemci kaynaklı yükleme hatası (HTTP 4xx)"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def iter_body(rfile, headers):
+    """İstek gövdesini parça parça oku (Content-Length veya chunked)"""
+    if headers.get('Transfer-Encoding', '').lower() == 'chunked':
+        while True:
+            size_line = rfile.readline(1024)
+            try:
+                size = int(size_line.split(b';')[0].strip(), 16)
+            except ValueError:
+                raise UploadError(400, "Geçersiz chunked kodlama")
+            if size == 0:
+                # Son parçadan sonraki (varsa) başlıkları atla
+                while rfile.readline(1024) not in (b'\r\n', b'\n', b''):
+                    pass
+                return
+            while size > 0:
+                block = rfile.read(min(size, CHUNK_SIZE))
+                if not block:
+                    raise UploadError(400, "Gövde beklenenden kısa")
+                size -= len(block)
+                yield block
+            rfile.readline(1024)
+        return
+
+    length = headers.get('Content-Length')
+    if length is None:
+        raise UploadError(411, "Content-Length veya chunked gövde gerekli")
+    remaining = int(length)
+    while remaining > 0:
+        block = rfile.read(min(remaining, CHUNK_SIZE))
+        if not block:
+            raise UploadError(400, "Gövde beklenenden kısa")
+        remaining -= len(block)
+        yield block
+
+
+def stream_multipart_file(chunks, boundary, out):
+    """multipart/form-data gövdesindeki ilk dosya alanını akış halinde out'a yaz"""
+    delimiter = b'--' + boundary
+    buffer = b''
+    state = 'preamble'
+    for chunk in chunks:
+        buffer += chunk
+        while True:
+            if state == 'preamble':
+                idx = buffer.find(delimiter)
+                if idx < 0:
+                    buffer = buffer[-len(delimiter):]
+                    break
+                buffer = buffer[idx + len(delimiter):]
+                state = 'headers'
+            if state == 'headers':
+                idx = buffer.find(b'\r\n\r\n')
+                if idx < 0:
+                    break
+                part_headers = buffer[:idx].decode('latin-1').lower()
+                buffer = buffer[idx + 4:]
+                state = 'file' if 'filename=' in part_headers else 'preamble'
+                continue
+            if state == 'file':
+                idx = buffer.find(b'\r\n' + delimiter)
+                if idx >= 0:
+                    out.write(buffer[:idx])
+                    state = 'done'
+                    break
+                # Sınırın bir kısmı parça sonuna denk gelebilir; kuyruğu tut
+                keep = len(delimiter) + 2
+                if len(buffer) > keep:
+                    out.write(buffer[:-keep])
+                    buffer = buffer[-keep:]
+                break
+            if state == 'done':
+                break
+    if state != 'done':
+        raise UploadError(400, "multipart gövdesinde dosya alanı bulunamadı")
+
+
+class AnalysisService:
+    """Sınırlı süreç havuzu + eşzamanlılık sınırı + bekleme kuyruğu"""
+
+    def __init__(self, workers=2, max_concurrent=None, max_queue=8, queue_timeout=60.0):
+        self.workers = max(1, workers)
+        self.max_concurrent = max_concurrent or self.workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context('spawn'))
+        self.slots = threading.BoundedSemaphore(self.max_concurrent)
+        self.lock = threading.Lock()
+        self.waiting = 0
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def status(self):
+        return {
+            'status': 'ok',
+            'workers': self.workers,
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'active': self.active,
+            'queued': self.waiting,
+            'completed': self.completed,
+            'rejected': self.rejected
+        }
+
+    def saturated(self):
+        return self.waiting >= self.max_queue
+
+    def reject_if_saturated(self):
+        """Kuyruk doluysa isteği reddedilmiş say ve True döndür (kontrol ve sayaç tek kilitte)"""
+        with self.lock:
+            if self.saturated():
+                self.rejected += 1
+                return True
+            return False
+
+    def admit(self):
+        """Kuyruğa gir ve çalışma hakkı bekle; kuyruk doluysa False"""
+        with self.lock:
+            if self.saturated():
+                self.rejected += 1
+                return False
+            self.waiting += 1
+        acquired = self.slots.acquire(timeout=self.queue_timeout)
+        with self.lock:
+            self.waiting -= 1
+            if acquired:
+                self.active += 1
+            else:
+                self.rejected += 1
+        return acquired
+
+    def release(self):
+        with self.lock:
+            self.active -= 1
+            self.completed += 1
+        self.slots.release()
+
+    def run(self, filepath, settings):
+        return self.executor.submit(analyze_upload, filepath, settings).result()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    server_version = "HarmonicAnalyzer/1.0"
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def discard_body(self):
+        """Reddedilen isteğin gövdesini diske/belleğe almadan tüket"""
+        try:
+            for _ in iter_body(self.rfile, self.headers):
+                pass
+        except (UploadError, OSError, ValueError):
+            pass
+        self.close_connection = True
+
+    def handle_expect_100(self):
+        # "Expect: 100-continue" gönderen istemciler kuyruk doluysa gövdeyi hiç yüklemez
+        if self.command == 'POST' and self.server.service.reject_if_saturated():
+            self.close_connection = True
+            self.send_json(503, {'error': 'Analiz kuyruğu dolu, daha sonra tekrar deneyin'},
+                           headers={'Retry-After': '5'})
+            return False
+        return super().handle_expect_100()
+
+    def do_GET(self):
+        if urlparse(self.path).path == '/health':
+            self.send_json(200, self.server.service.status())
+        else:
+            self.send_json(404, {'error': 'Bulunamadı'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/analyze':
+            self.discard_body()
+            self.send_json(404, {'error': 'Bulunamadı'})
+            return
+
+        try:
+            settings = settings_from_query(parse_qs(url.query))
+        except ValueError as e:
+            self.discard_body()
+            self.send_json(400, {'error': f"Geçersiz parametre: {e}"})
+            return
+
+        service = self.server.service
+        if not service.admit():
+            self.discard_body()
+            self.send_json(503, {'error': 'Analiz kuyruğu dolu, daha sonra tekrar deneyin'},
+                           headers={'Retry-After': '5'})
+            return
+
+        tmp = tempfile.NamedTemporaryFile(prefix='upload_', suffix='.csv', delete=False)
+        try:
+            try:
+                with tmp:
+                    chunks = iter_body(self.rfile, self.headers)
+                    content_type = self.headers.get('Content-Type', '')
+                    if content_type.startswith('multipart/form-data'):
+                        boundary = content_type.split('boundary=')[-1].strip('"').encode('latin-1')
+                        stream_multipart_file(chunks, boundary, tmp)
+                    else:
+                        for chunk in chunks:
+                            tmp.write(chunk)
+                result = service.run(tmp.name, settings)
+            except UploadError as e:
+                self.close_connection = True
+                self.send_json(e.status, {'error': str(e)})
+                return
+            except ValueError as e:
+                self.send_json(422, {'error': str(e)})
+                return
+            except Exception as e:
+                self.send_json(500, {'error': f"Analiz hatası: {e}"})
+                return
+            finally:
+                service.release()
+
+            result['file'] = self.headers.get('X-Filename', os.path.basename(tmp.name))
+            self.send_json(200, result)
+        finally:
+            os.unlink(tmp.name)
+
+    def log_message(self, format, *args):
+        print(f"[{self.address_string()}] {format % args}")
+
+
+class AnalysisServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        super().__init__(address, AnalysisRequestHandler)
+        self.service = service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yerel HTTP harmonik analiz servisi")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument('--max-concurrent', type=int, default=None,
+                        help="Aynı anda analiz edilen en fazla istek (varsayılan: işçi sayısı)")
+    parser.add_argument('--max-queue', type=int, default=8, help="Bekleyen en fazla istek")
+    args = parser.parse_args()
+
+    service = AnalysisService(args.workers, args.max_concurrent, args.max_queue)
+    server = AnalysisServer((args.host, args.port), service)
+    print(f"Analiz servisi: http://{args.host}:{args.port}  (işçi={service.workers}, "
+          f"eşzamanlı={service.max_concurrent}, kuyruk={service.max_queue})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -14,338 +14,36 @@
  Akım Probu Dönüşümü: 5A -> 0.25V demek ratio = 20 A/V
 """
 
+from time import perf_counter
+_IMPORT_START = perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from matplotlib.widgets import Cursor
 import numpy as np
-from scipy.fft import fft, fftfreq
-from scipy.signal import butter, filtfilt, savgol_filter, find_peaks
-from scipy.ndimage import gaussian_filter1d
 from datetime import datetime
 import os
-import json
+import argparse
 from collections import defaultdict
-import threading
-
-# IEC 61000-3-2 CLASS A LIMITLERI (Amper)
-IEC_CLASS_A_LIMITS = {
-    2: 1.0800, 3: 2.3000, 4: 0.4300, 5: 1.1400, 6: 0.3000,
-    7: 0.7700, 8: 0.2300, 9: 0.4000, 10: 0.1840, 11: 0.3300,
-    12: 0.1533, 13: 0.2100, 14: 0.1314, 15: 0.1500, 16: 0.1150,
-    17: 0.1324, 18: 0.1022, 19: 0.1184, 20: 0.0920, 21: 0.1071,
-    22: 0.0836, 23: 0.0978, 24: 0.0767, 25: 0.0900, 26: 0.0708,
-    27: 0.0833, 28: 0.0657, 29: 0.0776, 30: 0.0613, 31: 0.0726,
-    32: 0.0575, 33: 0.0682, 34: 0.0541, 35: 0.0643, 36: 0.0511,
-    37: 0.0608, 38: 0.0484, 39: 0.0577, 40: 0.0460,
-}
-
-# Preset dönüşüm oranları (A/V)
-RATIO_PRESETS = {
-    "5A->0.25V (20 A/V)": 20.0,
-    "10A->1V (10 A/V)": 10.0,
-    "1A->0.1V (10 A/V)": 10.0,
-    "1A->1V (1 A/V)": 1.0,
-    "100mV/A (10 A/V)": 10.0,
-    "50mV/A (20 A/V)": 20.0,
-    "Manual": None
-}
+import concurrent.futures
 
-# Analiz presetleri
-ANALYSIS_PRESETS = {
-    "IEC61000-3-2 Class A": {
-        "harmonics": 40,
-        "fundamental_range": (45, 65),
-        "thd_limit": 100,
-        "limits": IEC_CLASS_A_LIMITS
-    },
-    "Hızlı Analiz": {
-        "harmonics": 20,
-        "fundamental_range": (45, 65),
-        "thd_limit": 100,
-        "limits": {k: IEC_CLASS_A_LIMITS[k] for k in range(2, 21)}
-    },
-    "Geniş Bant": {
-        "harmonics": 50,
-        "fundamental_range": (45, 65),
-        "thd_limit": 100,
-        "limits": IEC_CLASS_A_LIMITS
-    }
-}
+from scope_acquisition import ScopeSimulator, SCPI_PORT
+from analysis_pipeline import StagedPipeline, ScopeFrameSource, FrameAnalysisJob
+from watch_folder import FolderWatchService
+from results_store import ResultsStore, DEFAULT_DB_NAME, CHANNEL_METRICS
+from results_archive import write_archive, capture_name, capture_meta, capture_waveforms
+from report_figures import draw_overlay, overlay_data, figure_job, render_batch_figures
 
-
-class ImageWaveformExtractor:
-    """PNG görüntüden dalga formu çıkarma sınıfı"""
-    
-    def __init__(self):
-        self.calibration = {
-            'x0': 50, 'x1': 750,  # Grid sınırları
-            'y0': 50, 'y1': 550,
-            'time_scale': 0.02,  # 20ms tam skala
-            'volt_scale': 1.0,   # 1V tam skala
-            'time_unit': 's',
-            'volt_unit': 'V'
-        }
-    
-    def extract_waveform(self, image_path, calibration=None):
-        """Görüntüden dalga formu çıkar"""
-        try:
-            from PIL import Image, ImageOps
-            import cv2
-            import numpy as np
-            
-            if calibration:
-                self.calibration.update(calibration)
-            
-            # Görüntüyü aç
-            img = Image.open(image_path)
-            img_gray = ImageOps.grayscale(img)
-            img_array = np.array(img_gray)
-            
-            # Threshold ile waveform detection
-            _, binary = cv2.threshold(img_array, 127, 255, cv2.THRESH_BINARY)
-            
-            # Morfolojik işlemler
-            kernel = np.ones((3, 3), np.uint8)
-            binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-            
-            # Grid alanını belirle
-            x_start, x_end = self.calibration['x0'], self.calibration['x1']
-            y_start, y_end = self.calibration['y0'], self.calibration['y1']
-            
-            # Her x için y değerini bul
-            waveform_y = []
-            waveform_x = []
-            
-            grid_width = x_end - x_start
-            grid_height = y_end - y_start
-            
-            for i in range(grid_width):
-                col = x_start + i
-                col_data = binary[y_start:y_end, col]
-                
-                # En üst non-zero pixel'i bul (waveform tipik olarak grid üstünde)
-                nonzero_indices = np.where(col_data < 255)[0]
-                
-                if len(nonzero_indices) > 0:
-                    # Tipik olarak grid ortasından yukarı çizim
-                    # En yakın sinyal pixel'ini bul
-                    y_idx = y_start + (y_end - y_start) - nonzero_indices[0]
-                    waveform_y.append(y_idx)
-                    waveform_x.append(i)
-            
-            if len(waveform_x) < 10:
-                return None
-            
-            # Normalize et
-            time = np.array(waveform_x) / len(waveform_x) * self.calibration['time_scale']
-            signal = (self.calibration['y1'] - np.array(waveform_y)) / (self.calibration['y1'] - self.calibration['y0'])
-            signal = (signal - 0.5) * 2 * self.calibration['volt_scale']
-            
-            # Interpolasyon ile düzleştir
-            from scipy.interpolate import interp1d
-            f = interp1d(time, signal, kind='cubic', fill_value='extrapolate')
-            time_smooth = np.linspace(time.min(), time.max(), len(time) * 2)
-            signal_smooth = f(time_smooth)
-            
-            sample_rate = len(time) / (time.max() - time.min()) if time.max() > time.min() else 10000
-            
-            return {
-                'time': time_smooth,
-                'signal': signal_smooth,
-                'sample_rate': sample_rate,
-                'calibration': self.calibration.copy()
-            }
-            
-        except ImportError:
-            messagebox.showwarning("Eksik Kütüphane", 
-                "PIL ve OpenCV kurulu değil. pip install pillow opencv-python")
-            return None
-        except Exception as e:
-            messagebox.showerror("Hata", f"Görüntü işleme hatası: {str(e)}")
-            return None
-
-
-class HarmonicAnalyzer:
-    """Profesyonel Harmonik Analiz Sınıfı - Labaratuvar Cihazı Uyumlu"""
-    
-    def __init__(self):
-        self.iec_limits = IEC_CLASS_A_LIMITS
-    
-    def calculate_all_metrics(self, signal, sample_rate, fundamental_freq=None, num_harmonics=40):
-        """Tüm metrikleri hesapla - harmonik_simple.py ve iec_harmonic_analyzer.py ile uyumlu"""
-        # DC offset kaldır (opsiyonel - harmonik analiz için önemli değil ama temiz veri için)
-        signal = signal - np.mean(signal)
-        
-        # Temel frekans bul - harmonik_simple.py ile aynı yöntem
-        if fundamental_freq is None:
-            fundamental_freq = self.find_fundamental(signal, sample_rate)
-        
-        # Harmonik analizi - iec_harmonic_analyzer.py yöntemi ile aynı
-        harmonics = self.calculate_harmonics_standard(signal, sample_rate, fundamental_freq, num_harmonics)
-        
-        # THD hesapla
-        thd = self.calculate_thd(harmonics)
-        
-        # TDD hesapla
-        tdd = self.calculate_tdd(harmonics)
-        
-        # RMS hesapla
-        rms = np.sqrt(np.mean(signal**2))
-        
-        # Peak değerleri
-        ipk = np.max(np.abs(signal))
-        
-        # Crest Factor
-        cf = ipk / rms if rms > 0 else 0
-        
-        # Power Factor
-        pf = self.calculate_power_factor(signal, sample_rate, fundamental_freq)
-        
-        return {
-            'fundamental': fundamental_freq,
-            'harmonics': harmonics,
-            'thd': thd,
-            'tdd': tdd,
-            'rms': rms,
-            'ipk': ipk,
-            'cf': cf,
-            'pf': pf,
-            'ff': cf,
-            'passed': self.check_iec_compliance(harmonics),
-            'failed': [h for h in harmonics if h['status'] == 'FAIL']
-        }
-    
-    def find_fundamental(self, signal, sample_rate):
-        """Temel frekansı bul - harmonik_simple.py ile aynı"""
-        n = len(signal)
-        yf = np.abs(fft(signal))[:n//2]
-        xf = fftfreq(n, 1/sample_rate)[:n//2]
-        
-        # 45-65 Hz arası ara
-        mask = (xf >= 45) & (xf <= 65)
-        idx = np.where(mask)[0]
-        
-        if len(idx) > 0:
-            peak_idx = idx[np.argmax(yf[idx])]
-            return xf[peak_idx]
-        return 50.0
-    
-    def calculate_harmonics_standard(self, signal, sample_rate, fundamental, num_harmonics=40):
-        """Standart harmonik hesaplama - iec_harmonic_analyzer.py ile aynı"""
-        n = len(signal)
-        
-        # Tam FFT - pencereleme YOK (lab cihazları gibi)
-        yf_full = fft(signal)
-        xf_full = fftfreq(n, 1/sample_rate)
-        
-        positive_mask = xf_full >= 0
-        xf_pos = xf_full[positive_mask]
-        
-        # Genlik hesaplama: 2/n ölçekleme (tepe genlik için)
-        yf_pos = np.abs(yf_full[positive_mask]) * 2 / n
-        
-        harmonics = []
-        for h in range(1, num_harmonics + 1):
-            target_freq = h * fundamental
-            
-            # Hedef frekansın indeksini bul
-            idx = np.argmin(np.abs(xf_pos - target_freq))
-            
-            # ±3 bin lokal arama (harmonik_simple.py ile aynı)
-            search_start = max(0, idx - 3)
-            search_end = min(len(yf_pos), idx + 4)
-            local_max_idx = search_start + np.argmax(yf_pos[search_start:search_end])
-            
-            amplitude = yf_pos[local_max_idx]
-            
-            # Faz hesabı
-            phase = np.angle(yf_full[positive_mask][local_max_idx]) * 180 / np.pi
-            
-            # Limit kontrolü
-            limit = self.iec_limits.get(h, 0) if h > 1 else 0
-            percent = (amplitude / limit * 100) if limit > 0 else 0
-            
-            harmonics.append({
-                'harmonic': h,
-                'frequency': target_freq,
-                'amplitude': amplitude,
-                'phase': phase,
-                'limit': limit,
-                'percent': percent,
-                'status': 'FUND' if h == 1 else ('FAIL' if percent > 100 else 'PASS')
-            })
-        
-        return harmonics
-    
-    def calculate_thd(self, harmonics):
-        """THD hesapla - harmonik_simple.py ile aynı"""
-        fundamental = harmonics[0]['amplitude']
-        if fundamental == 0:
-            return 0
-        sum_squares = sum(h['amplitude']**2 for h in harmonics[1:41])
-        return np.sqrt(sum_squares) / fundamental * 100
-    
-    def calculate_tdd(self, harmonics, fundamental_rms=None):
-        """TDD hesapla"""
-        if fundamental_rms is None:
-            fundamental_rms = harmonics[0]['amplitude']
-        if fundamental_rms == 0:
-            return 0
-        sum_squares = sum(h['amplitude']**2 for h in harmonics[1:41])
-        return np.sqrt(sum_squares) / fundamental_rms * 100
-    
-    def calculate_power_factor(self, signal, sample_rate, fundamental):
-        """Güç faktörü hesapla - iec_harmonic_analyzer.py yöntemi"""
-        n = len(signal)
-        
-        # Basit yaklaşım: temel harmonik genliği / RMS
-        yf_full = fft(signal)
-        xf_full = fftfreq(n, 1/sample_rate)
-        
-        idx = np.argmin(np.abs(xf_full - fundamental))
-        fundamental_amplitude = np.abs(yf_full[idx]) * 2 / n
-        
-        rms = np.sqrt(np.mean(signal**2))
-        
-        if rms > 0 and fundamental_amplitude > 0:
-            # Displacement factor yaklaşık
-            displacement = fundamental_amplitude / rms
-            return min(1.0, displacement)
-        
-        return 1.0
-    
-    def check_iec_compliance(self, harmonics):
-        """IEC uyumluluğunu kontrol et"""
-        for h in harmonics[1:]:
-            if h['status'] == 'FAIL':
-                return False
-        return True
-        sum_squares = sum(h['amplitude']**2 for h in harmonics[1:])
-        return np.sqrt(sum_squares) / fundamental_rms * 100
-    
-    def calculate_power_factor(self, signal, sample_rate, fundamental):
-        """Güç faktörü hesapla"""
-        n = len(signal)
-        yf = fft(signal)
-        xf = fftfreq(n, 1/sample_rate)
-        
-        # Temel frekans indeksini bul
-        idx = np.argmin(np.abs(xf - fundamental))
-        if idx < len(yf):
-            fundamental_amplitude = np.abs(yf[idx]) * 2 / n
-            # Basit PF hesabı
-            return min(1.0, fundamental_amplitude / (np.sqrt(np.mean(signal**2)) + 0.0001))
-        return 1.0
-    
-    def check_iec_compliance(self, harmonics):
-        """IEC uyumluluğunu kontrol et"""
-        for h in harmonics[1:]:  # Temel hariç
-            if h['status'] == 'FAIL':
-                return False
-        return True
+# Analiz çekirdeği (Tk bağımsız); eski içe aktarmalar için buradan da erişilebilir
+from harmonic_core import (ANALYSIS_PRESETS, AnalysisSettings, analyze_capture, analyze_captures,
+    BATCH_FFT_SAMPLES, capture_signal, CHANNEL_COLORS, CHANNEL_NAMES,
+    ChannelSettings, CoherentAverager, evaluate_result_classes,
+    filter_channel_signal, filter_diff_signal, FilterSettings, fold_cycles, format_import_times,
+    group_thd, harmonic_spectrograms, harmonic_zoom, HarmonicAnalyzer, HarmonicTable, IEC_CLASS_A_LIMITS,
+    ImageWaveformExtractor, IMPORT_TIMES, lazy_import, LIMIT_CLASSES, load_rigol_csv, load_spilled_waveforms,
+    NOMINAL_VOLTAGE, ObservationPeriodEvaluator, parse_expressions, RATIO_PRESETS, result_cycles, rfft,
+    signal_parts, spill_waveforms, STATUS_FAIL, STATUS_NAMES, summarize_results,
+    TimeAxis, zoom_peak, zoom_spectrum)
+IMPORT_TIMES['(açılış modülleri)'] = perf_counter() - _IMPORT_START
 
 
 class DualCurrentAnalyzer:
@@ -368,10 +66,34 @@ class DualCurrentAnalyzer:
         # Batch processing
         self.batch_files = []
         self.batch_index = 0
+        self.batch_dut = ''
+        self.batch_results = []
+        self.batch_spill_dir = None
+        self.batch_average = {}
+        self.results_db_path = DEFAULT_DB_NAME
+        
+        # scipy.fft iş parçacığı sayısı (2-B FFT satırları paralel işlenir); büyük CSV'ler de bu kadar süreçte okunur
+        self.fft_workers = os.cpu_count() or 1
+        # Kanal filtre + metrik işleri için ortak iş parçacığı havuzu (iş parçacıkları ilk işte açılır)
+        self.channel_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(2, min(len(CHANNEL_NAMES), self.fft_workers)), thread_name_prefix='channel')
+        
+        # Canlı osiloskop bağlantısı
+        self.live_pipeline = None
+        self.live_simulator = None
+        
+        # Zoom görünümü: (sonuçlar, harmonik, kanal görünümleri) ve arka planda hesaplanan (sonuçlar, harmonik)
+        self.zoom_view = None
+        self.zoom_pending = None
+        
+        # Klasör izleme
+        self.folder_watch = None
         
         self.setup_styles()
         self.setup_ui()
         self.setup_shortcuts()
+        self.startup_time = perf_counter() - _IMPORT_START
+        self.status_bar.config(text=f"Hazır ({self.startup_time:.2f} s) | F1: Yardım | Ctrl+O: Dosya | Ctrl+I: Görüntü")
     
     def setup_styles(self):
         """GUI stilleri"""
@@ -402,6 +124,7 @@ class DualCurrentAnalyzer:
         # === ÜST PANEL: Sekmeler ===
         notebook = ttk.Notebook(main_frame)
         notebook.pack(fill=tk.X, pady=(0, 5))
+        self.notebook = notebook
         
         # Ana sekme
         self.main_tab = ttk.Frame(notebook, style='Dark.TFrame')
@@ -416,14 +139,27 @@ class DualCurrentAnalyzer:
         notebook.add(self.report_tab, text="📋 Rapor")
         
         self.setup_main_tab()
-        self.setup_batch_tab()
-        self.setup_report_tab()
+        # Batch ve Rapor sekmeleri ilk açıldıklarında kurulur
+        self.deferred_tabs = {str(self.batch_tab): self.setup_batch_tab,
+                              str(self.report_tab): self.build_report_tab}
+        notebook.bind('<<NotebookTabChanged>>', lambda e: self.ensure_tab(notebook.select()))
         
         # === DURUM ÇUBUĞU ===
         self.status_bar = ttk.Label(main_frame, text="Hazır | F1: Yardım | Ctrl+O: Dosya | Ctrl+I: Görüntü",
                                     style='Status.TLabel', anchor='w')
         self.status_bar.pack(fill=tk.X, pady=(5, 0))
     
+    def ensure_tab(self, tab):
+        """Ertelenmiş sekmeyi (henüz kurulmadıysa) şimdi kur"""
+        builder = self.deferred_tabs.pop(str(tab), None)
+        if builder is not None:
+            builder()
+    
+    def build_report_tab(self):
+        """Rapor sekmesini kur ve mevcut sonuçlarla doldur"""
+        self.setup_report_tab()
+        self.refresh_report()
+    
     def setup_main_tab(self):
         """Ana sekme arayüzü"""
         # Sol panel - Kontroller
@@ -433,9 +169,13 @@ class DualCurrentAnalyzer:
         # Dosya seçimi
         self.create_file_section(control_panel)
         
-        # Kanal ayarları
-        self.create_channel_section(control_panel, 'CH1', '#00d4ff')
-        self.create_channel_section(control_panel, 'CH2', '#ff8844')
+        # Kanal ayarları (CH1-CH4 sekmeleri)
+        channel_tabs = ttk.Notebook(control_panel)
+        channel_tabs.pack(fill=tk.X, pady=(0, 8))
+        for channel in CHANNEL_NAMES:
+            tab = ttk.Frame(channel_tabs)
+            channel_tabs.add(tab, text=channel)
+            self.create_channel_section(tab, channel, CHANNEL_COLORS[channel])
         
         # Analiz ayarları
         self.create_analysis_section(control_panel)
@@ -452,11 +192,17 @@ class DualCurrentAnalyzer:
                                        style='Dark.TLabel', font=('Consolas', 12))
         self.result_banner.pack(fill=tk.X, pady=(0, 5))
         
-        # Grafik alanı
+        # Grafik alanı: matplotlib pencere ekrana geldikten sonra yüklenir
+        self.fig = None
+        self.root.after(1, self.setup_graph_area, graph_panel)
+    
+    def setup_graph_area(self, graph_panel):
+        """Grafik alanı ve araç çubuğu (matplotlib ilk burada içe aktarılır)"""
+        plt = lazy_import('matplotlib.pyplot')
         self.fig = plt.figure(figsize=(12, 8))
         self.fig.patch.set_facecolor('#1a1a2e')
         
-        self.canvas = FigureCanvasTkAgg(self.fig, master=graph_panel)
+        self.canvas = lazy_import('matplotlib.backends.backend_tkagg').FigureCanvasTkAgg(self.fig, master=graph_panel)
         self.canvas.draw()
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         
@@ -466,6 +212,7 @@ class DualCurrentAnalyzer:
         # Cursor event
         self.canvas.mpl_connect('button_press_event', self.on_canvas_click)
         self.canvas.mpl_connect('motion_notify_event', self.on_mouse_move)
+        self.update_plots()
     
     def create_custom_toolbar(self, parent):
         """Özel araç çubuğu - Zoom, Pan, Referans"""
@@ -678,6 +425,9 @@ class DualCurrentAnalyzer:
         ttk.Button(btn_frame, text="PNG Aç", command=self.browse_image, width=10).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_frame, text="Kalibrasyon", command=self.show_calibration_dialog, width=12).pack(side=tk.LEFT, padx=2)
         
+        self.live_button = ttk.Button(file_frame, text="🔌 Canlı Osiloskop", command=self.toggle_live_acquisition)
+        self.live_button.pack(fill=tk.X, pady=2)
+        
         self.file_status = ttk.Label(file_frame, text="Dosya yok", style='Status.TLabel')
         self.file_status.pack(pady=(5, 0))
     
@@ -686,7 +436,7 @@ class DualCurrentAnalyzer:
         frame = ttk.LabelFrame(parent, text=f"{channel} Ayarları", padding="8")
         frame.pack(fill=tk.X, pady=(0, 8))
         
-        color_hex = {'CH1': '#00d4ff', 'CH2': '#ff8844'}[channel]
+        color_hex = CHANNEL_COLORS[channel]
         
         # Enable checkbox
         var_enabled = tk.BooleanVar(value=(channel == 'CH1'))
@@ -754,6 +504,14 @@ class DualCurrentAnalyzer:
         ttk.Radiobutton(view_frame, text="Overlay", variable=self.view_mode, value='overlay').pack(side=tk.LEFT)
         ttk.Radiobutton(view_frame, text="Ayrı", variable=self.view_mode, value='separate').pack(side=tk.LEFT)
         ttk.Radiobutton(view_frame, text="Karşılaştır", variable=self.view_mode, value='compare').pack(side=tk.LEFT)
+        ttk.Radiobutton(view_frame, text="Spektrogram", variable=self.view_mode, value='spectrogram').pack(side=tk.LEFT)
+        ttk.Radiobutton(view_frame, text="Periyot", variable=self.view_mode, value='cycles').pack(side=tk.LEFT)
+        zoom_frame = ttk.Frame(frame)
+        zoom_frame.pack(anchor='w')
+        ttk.Radiobutton(zoom_frame, text="Zoom", variable=self.view_mode, value='zoom').pack(side=tk.LEFT)
+        ttk.Label(zoom_frame, text="Harmonik:").pack(side=tk.LEFT, padx=(5, 0))
+        self.zoom_harmonic = tk.StringVar(value="1")
+        ttk.Spinbox(zoom_frame, from_=1, to=50, textvariable=self.zoom_harmonic, width=5).pack(side=tk.LEFT, padx=2)
 
         # CH1-CH2 Fark Grafiği Filtresi
         ttk.Label(frame, text="CH1-CH2 Fark Filtresi:").pack(anchor='w', pady=(8, 0))
@@ -769,6 +527,20 @@ class DualCurrentAnalyzer:
 
         self.diff_filter_cutoff = tk.StringVar(value="500")
         ttk.Entry(diff_filter_frame, textvariable=self.diff_filter_cutoff, width=6).pack(side=tk.LEFT, padx=2)
+
+        # Kanal ifadeleri (KCL düğümü, üç faz nötr akımı vb.)
+        ttk.Label(frame, text="Kanal İfadeleri (ör. CH1-CH2-CH3; CH1+CH2+CH3):").pack(anchor='w', pady=(8, 0))
+        self.channel_expressions = tk.StringVar(value="")
+        ttk.Entry(frame, textvariable=self.channel_expressions, width=28).pack(anchor='w')
+        
+        # Kanalları eşzamanlı analiz et (filtre + metrik işleri iş parçacığı havuzunda)
+        self.parallel_channels = tk.BooleanVar(value=True)
+        ttk.Checkbutton(frame, text="Paralel kanal analizi", variable=self.parallel_channels).pack(anchor='w', pady=(8, 0))
+        
+        # Senkron periyot katlama (kararlı DUT, uzun kayıt)
+        ttk.Label(frame, text="Periyot Katlama (periyot, 0=kapalı):").pack(anchor='w', pady=(8, 0))
+        self.fold_cycles = tk.StringVar(value="0")
+        ttk.Spinbox(frame, from_=0, to=50, textvariable=self.fold_cycles, width=10).pack(anchor='w')
     
     def create_action_section(self, parent):
         """İşlem butonları bölümü"""
@@ -779,6 +551,7 @@ class DualCurrentAnalyzer:
         ttk.Button(frame, text="📄 Rapor Kaydet", command=self.save_report, width=15).pack(fill=tk.X, pady=2)
         ttk.Button(frame, text="💾 PNG Kaydet", command=self.save_figure, width=15).pack(fill=tk.X, pady=2)
         ttk.Button(frame, text="📊 CSV Export", command=self.export_csv, width=15).pack(fill=tk.X, pady=2)
+        ttk.Button(frame, text="🗄 Arşiv (H5/Parquet)", command=self.export_archive, width=15).pack(fill=tk.X, pady=2)
     
     def setup_batch_tab(self):
         """Batch işlem sekmesi"""
@@ -790,6 +563,18 @@ class DualCurrentAnalyzer:
         ttk.Button(control_frame, text="📁 Dosya Ekle", command=self.batch_add_files, width=20).pack(fill=tk.X, pady=5)
         ttk.Button(control_frame, text="▶️ Batch Analiz Başlat", command=self.run_batch_analysis, width=20).pack(fill=tk.X, pady=5)
         ttk.Button(control_frame, text="📄 Tüm Raporu Kaydet", command=self.save_batch_report, width=20).pack(fill=tk.X, pady=5)
+        ttk.Button(control_frame, text="🗄 Batch Arşivi (H5/Parquet)", command=self.export_batch_archive, width=20).pack(fill=tk.X, pady=5)
+        ttk.Button(control_frame, text="🖼 Batch Grafikleri (PNG/PDF)", command=self.save_batch_figures, width=20).pack(fill=tk.X, pady=5)
+        self.batch_spill = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame, text="Dalga formlarını diske yaz (.npz)",
+                        variable=self.batch_spill).pack(anchor=tk.W, pady=5)
+        self.batch_coherent = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame, text="Koherent vektör ortalama (aynı DUT)",
+                        variable=self.batch_coherent).pack(anchor=tk.W, pady=5)
+        self.watch_button = ttk.Button(control_frame, text="👁 Klasör İzle", command=self.toggle_folder_watch, width=20)
+        self.watch_button.pack(fill=tk.X, pady=5)
+        ttk.Button(control_frame, text="🔎 Sorgu / Trend", command=self.show_results_query, width=20).pack(fill=tk.X, pady=5)
+        ttk.Button(control_frame, text="⏱ IEC Gözlem Süresi", command=self.run_observation_evaluation, width=20).pack(fill=tk.X, pady=5)
         
         # Dosya listesi
         list_frame = ttk.LabelFrame(self.batch_tab, text="Dosya Listesi", padding="10")
@@ -827,6 +612,7 @@ class DualCurrentAnalyzer:
         self.root.bind('<Control-i>', lambda e: self.browse_image())
         self.root.bind('<F5>', lambda e: self.run_analysis())
         self.root.bind('<F1>', lambda e: self.show_help())
+        self.root.bind('<Control-l>', lambda e: self.toggle_live_acquisition())
     
     def show_help(self):
         """Yardım dialog"""
@@ -837,6 +623,7 @@ KLAVYE KISAYOLLARI:
   Ctrl+O   - CSV Dosyası Aç
   Ctrl+I   - PNG Görüntü Aç
   F5       - Analiz Et
+  Ctrl+L   - Canlı Osiloskop Başlat/Durdur
   F1       - Bu Yardım
 
 KULLANIM:
@@ -846,6 +633,13 @@ KULLANIM:
 4. "Analiz Et" butonuna basın
 5. Sonuçları grafiklerde ve raporda görün
 
+CANLI OSİLOSKOP:
+  - Adres olarak IP[:port] girin (varsayılan port 5555)
+  - "sim" yazarak yerel SCPI simülatörüne bağlanın
+  - Okuma, analiz (işçi havuzu) ve çizim ayrı aşamalarda çalışır
+  - Çizim yetişemezse eski çerçeveler atılır; kuyruk derinliği ve
+    atılan çerçeve sayısı durum çubuğunda gösterilir
+
 PNG KALİBRASYON:
   - Grid sınırlarını ayarlayın
   - X ve Y eksen ölçeklerini belirtin
@@ -856,6 +650,7 @@ EXPORT:
   - CSV: Harmonik verileri
   - TXT: Tam rapor
 """
+        help_text += f"\nİÇE AKTARMA SÜRELERİ:\n{format_import_times()}\n"
         messagebox.showinfo("Yardım", help_text)
     
     def update_ratio(self, channel):
@@ -887,6 +682,105 @@ EXPORT:
             self.file_path.set(filepath)
             self.load_image(filepath)
     
+    def toggle_live_acquisition(self):
+        """Canlı osiloskop veri akışını başlat/durdur"""
+        if self.live_pipeline is not None:
+            self.stop_live_acquisition()
+            return
+        
+        address = simpledialog.askstring(
+            "Canlı Osiloskop",
+            "Osiloskop adresi (IP[:port]) veya yerel simülatör için 'sim':",
+            initialvalue="sim", parent=self.root)
+        if not address:
+            return
+        
+        try:
+            if address.strip().lower() == 'sim':
+                self.live_simulator = ScopeSimulator('127.0.0.1', 0).start()
+                host, port = self.live_simulator.address
+            else:
+                host, _, port = address.strip().partition(':')
+                port = int(port) if port else SCPI_PORT
+        except (OSError, ValueError) as e:
+            self.stop_live_acquisition()
+            messagebox.showerror("Bağlantı Hatası", f"Geçersiz adres veya simülatör hatası: {e}")
+            return
+        
+        # Okuyucu -> analiz havuzu -> çizici; çizim Tk ana iş parçacığında yapılır
+        try:
+            self.live_job = FrameAnalysisJob(self.get_analysis_settings())
+        except ValueError as e:
+            self.stop_live_acquisition()
+            messagebox.showerror("Ayar Hatası", str(e))
+            return
+        self.live_pipeline = StagedPipeline(ScopeFrameSource(host, port), self.live_job,
+                                            self.render_live_result,
+                                            workers=max(1, min(4, (os.cpu_count() or 2) - 1)))
+        self.live_pipeline.start()
+        
+        self.live_button.config(text="⏹ Canlı Durdur")
+        self.file_path.set(f"scpi://{host}:{port}")
+        self.status_bar.config(text=f"Canlı: {host}:{port} bağlanıyor...")
+        self.root.after(500, self.watch_live_pipeline)
+    
+    def stop_live_acquisition(self):
+        """Canlı veri akışını durdur"""
+        if self.live_pipeline is not None:
+            self.live_pipeline.stop()
+            self.live_pipeline = None
+        if self.live_simulator is not None:
+            self.live_simulator.stop()
+            self.live_simulator = None
+        self.live_button.config(text="🔌 Canlı Osiloskop")
+    
+    def render_live_result(self, item):
+        """Boru hattı çizici aşaması: sonucu Tk iş parçacığında göster (arka plandan çağrılır)"""
+        done = concurrent.futures.Future()
+        
+        def apply():
+            try:
+                pipeline = self.live_pipeline
+                if pipeline is None:
+                    return
+                frame, results = item
+                self.data = frame
+                self.results = results
+                self.update_plots()
+                self.display_results()
+                self.refresh_report()
+                # Sonraki çerçeveler güncel ayarlarla analiz edilsin
+                # (ifade hatalıysa düzeltilene kadar önceki ayarlar kalır)
+                try:
+                    self.live_job.settings = self.get_analysis_settings()
+                except ValueError:
+                    pass
+                self.file_status.config(
+                    text=f"● Canlı | {len(frame['time']):,} nokta | {frame['sample_rate']/1e6:.2f}MSa/s",
+                    foreground="#00ff88")
+                self.status_bar.config(text=f"Canlı | {pipeline.format_stats()}")
+            finally:
+                done.set_result(None)
+        
+        self.root.after(0, apply)
+        return done
+    
+    def watch_live_pipeline(self):
+        """Boru hattı hatalarını izle, kuyruk durumunu raporla"""
+        pipeline = self.live_pipeline
+        if pipeline is None:
+            return
+        
+        if not pipeline.running:
+            error = pipeline.error
+            self.stop_live_acquisition()
+            messagebox.showerror("Canlı Osiloskop", f"Veri toplama durdu: {error}")
+            return
+        
+        if pipeline.counters['rendered'] == 0:
+            self.status_bar.config(text=f"Canlı | {pipeline.format_stats()}")
+        self.root.after(1000, self.watch_live_pipeline)
+    
     def show_calibration_dialog(self):
         """Kalibrasyon dialog"""
         dialog = tk.Toplevel(self.root)
@@ -943,82 +837,20 @@ EXPORT:
     def load_file(self, filepath):
         """CSV dosyası yükle"""
         try:
-            with open(filepath, 'r') as f:
-                # Dosya formatını kontrol et. Dalga formu CSV'leri "Model:" ile başlamaz.
-                line1 = f.readline()
-                if line1.startswith("Model:"):
-                    raise ValueError("Bu bir ayar dosyası gibi görünüyor, dalga formu verisi değil. Lütfen osiloskoptan dalga formunu CSV olarak kaydedin.")
-                f.seek(0) # Dosyayı başa sar
-
-                header1_str = f.readline().strip()
-                header2_str = f.readline().strip()
-
-                header1 = header1_str.split(',')
-                header2 = header2_str.split(',')
-            
-            has_ch1 = 'CH1' in header1
-            has_ch2 = 'CH2' in header1
-            print(f"Kanal tespiti: CH1={has_ch1}, CH2={has_ch2}")
-            
-            try:
-                if has_ch1 and has_ch2:
-                    print("Çift kanal (CH1 & CH2) modu...")
-                    start_time = float(header2[3])
-                    increment = float(header2[4])
-                    df = pd.read_csv(filepath, skiprows=2, header=None, usecols=[0, 1, 2],
-                                    names=['index', 'ch1', 'ch2'])
-                    ch1_data = df['ch1'].values
-                    ch2_data = df['ch2'].values
-                elif has_ch1:
-                    print("Tek kanal (CH1) modu...")
-                    start_time = float(header2[2])
-                    increment = float(header2[3])
-                    df = pd.read_csv(filepath, skiprows=2, header=None, usecols=[0, 1],
-                                    names=['index', 'ch1'])
-                    ch1_data = df['ch1'].values
-                    ch2_data = None
-                elif has_ch2:
-                    print("Tek kanal (CH2) modu...")
-                    start_time = float(header2[2])
-                    increment = float(header2[3])
-                    df = pd.read_csv(filepath, skiprows=2, header=None, usecols=[0, 1],
-                                    names=['index', 'ch2'])
-                    ch1_data = None
-                    ch2_data = df['ch2'].values
-                else:
-                    raise ValueError("CSV dosyasında CH1 veya CH2 kanalı bulunamadı.")
-
-            except IndexError as ie:
-                raise ValueError(f"CSV başlık formatı hatalı (IndexError). Beklenen Rigol dalga formu formatında değil. Header2: '{header2_str}'")
-            
-            time = start_time + df['index'].values * increment
-            sample_rate = 1 / increment
-            
-            self.data = {
-                'time': time,
-                'ch1': ch1_data,
-                'ch2': ch2_data,
-                'dt': increment,
-                'sample_rate': sample_rate,
-                'has_ch2': has_ch2,
-                'filepath': filepath,
-                'source': 'csv'
-            }
+            self.data = load_rigol_csv(filepath, workers=self.fft_workers)
             
-            n_points = len(df)
-            duration = n_points * increment * 1000
+            channel_names = self.data['channel_names']
+            n_points = len(self.data['time'])
+            duration = n_points * self.data['dt'] * 1000
             fname = os.path.basename(filepath)
             
-            status = f"✓ {fname} | {n_points:,} nokta | {duration:.1f}ms"
-            if has_ch1 and has_ch2: status += " | CH1+CH2"
-            elif has_ch1: status += " | CH1"
-            elif has_ch2: status += " | CH2"
+            status = f"✓ {fname} | {n_points:,} nokta | {duration:.1f}ms | {'+'.join(channel_names)}"
             self.file_status.config(text=status, foreground="#00ff88")
             
-            self.ch1_enabled.set(has_ch1)
-            self.ch2_enabled.set(has_ch2)
+            for channel in CHANNEL_NAMES:
+                getattr(self, f'{channel.lower()}_enabled').set(channel in channel_names)
             
-            self.status_bar.config(text=f"Yüklü: {os.path.basename(filepath)}")
+            self.status_bar.config(text=f"Yüklü: {fname} | {len(channel_names)} kanal: {', '.join(channel_names)}")
             
         except ValueError as e:
             # Kendi oluşturduğumuz veya formatla ilgili ValueError'ları yakala
@@ -1030,110 +862,96 @@ EXPORT:
     
     def load_image(self, filepath):
         """PNG görüntü yükle ve dalga formu çıkar"""
-        result = self.image_extractor.extract_waveform(filepath)
-        
-        if result is not None:
-            # PNG'den çıkarılan veriyi standardize et
-            n_samples = len(result['signal'])
-            sample_rate = result['sample_rate']
-            time = np.linspace(0, n_samples / sample_rate, n_samples)
-            
-            self.data = {
-                'time': time,
-                'ch1': result['signal'],
-                'ch2': None,
-                'dt': 1 / sample_rate,
-                'sample_rate': sample_rate,
-                'has_ch2': False,
-                'filepath': filepath,
-                'source': 'png',
-                'calibration': result.get('calibration', {})
-            }
-            
-            status = f"✓ PNG: {n_samples:,} nokta, {time[-1]*1000:.1f}ms, {sample_rate/1e3:.1f}kHz"
-            self.file_status.config(text=status, foreground="#00d4ff")
-            self.ch2_enabled.set(False)
-            
-            self.status_bar.config(text=f"Yüklü: {os.path.basename(filepath)} (PNG çıkarıldı)")
-        else:
+        try:
+            result = self.image_extractor.extract_waveform(filepath)
+        except ImportError:
             self.file_status.config(text="Görüntü işleme hatası", foreground="#ff4444")
+            messagebox.showwarning("Eksik Kütüphane",
+                "PIL ve OpenCV kurulu değil. pip install pillow opencv-python")
+            return
+        except ValueError as e:
+            self.file_status.config(text="Görüntü işleme hatası", foreground="#ff4444")
+            messagebox.showerror("Hata", str(e))
+            return
+        
+        # PNG'den çıkarılan veriyi standardize et
+        n_samples = len(result['signal'])
+        sample_rate = result['sample_rate']
+        time = TimeAxis(0.0, 1 / sample_rate, n_samples)
+        
+        self.data = {
+            'time': time,
+            'ch1': result['signal'],
+            'ch2': None,
+            'dt': 1 / sample_rate,
+            'sample_rate': sample_rate,
+            'has_ch2': False,
+            'filepath': filepath,
+            'source': 'png',
+            'calibration': result.get('calibration', {})
+        }
+        
+        status = f"✓ PNG: {n_samples:,} nokta, {time[-1]*1000:.1f}ms, {sample_rate/1e3:.1f}kHz"
+        self.file_status.config(text=status, foreground="#00d4ff")
+        for channel in CHANNEL_NAMES[1:]:
+            getattr(self, f'{channel.lower()}_enabled').set(False)
+        
+        self.status_bar.config(text=f"Yüklü: {os.path.basename(filepath)} (PNG çıkarıldı)")
     
     def apply_filter(self, signal, sample_rate, channel):
         """Filtre uygula"""
-        if channel == 'CH1':
-            if not self.ch1_filter_enabled.get():
-                return signal, False, ""
-            filter_type = self.ch1_filter_type.get()
-            try:
-                cutoff = float(self.ch1_filter_cutoff.get())
-            except:
-                cutoff = 2500
-        else:
-            if not self.ch2_filter_enabled.get():
-                return signal, False, ""
-            filter_type = self.ch2_filter_type.get()
-            try:
-                cutoff = float(self.ch2_filter_cutoff.get())
-            except:
-                cutoff = 2500
-        
-        filter_info = f" | {filter_type}"
-        
-        if filter_type == 'lowpass':
-            nyq = sample_rate / 2
-            cutoff = min(cutoff, nyq * 0.9)
-            b, a = butter(4, cutoff / nyq, btype='low')
-            filter_info += f" {cutoff:.0f}Hz"
-            return filtfilt(b, a, signal), True, filter_info
-        
-        elif filter_type == 'savgol':
-            window = 51  # Must be an odd number
-            filter_info += f" w={window}"
-            return savgol_filter(signal, window, 3), True, filter_info
-        
-        elif filter_type == 'moving_avg':
-            window = 51
-            kernel = np.ones(window) / window
-            filter_info += f" w={window}"
-            return np.convolve(signal, kernel, mode='same'), True, filter_info
-        
-        return signal, False, ""
+        ch_settings = self.get_channel_settings(channel)
+        if not ch_settings.filter_enabled:
+            return signal, False, ""
+        return filter_channel_signal(signal, sample_rate, ch_settings.filter_type, ch_settings.filter_cutoff)
 
     def apply_diff_filter(self, signal, sample_rate):
         """CH1-CH2 fark grafiği için filtre uygula"""
-        filter_type = self.diff_filter_type.get()
+        diff_settings = self.get_analysis_settings().diff_filter
+        return filter_diff_signal(signal, sample_rate, diff_settings.type, diff_settings.cutoff)
+
+    def get_channel_settings(self, channel):
+        """Kanal ayarlarını Tk değişkenlerinden ChannelSettings olarak oku"""
+        prefix = channel.lower()
         try:
-            cutoff = float(self.diff_filter_cutoff.get())
+            ratio = float(getattr(self, f'{prefix}_ratio').get())
         except:
-            cutoff = 500
-
-        filter_label = f" [{filter_type}"
-
-        if filter_type == 'lowpass':
-            nyq = sample_rate / 2
-            cutoff = min(cutoff, nyq * 0.9)
-            b, a = butter(4, cutoff / nyq, btype='low')
-            filter_label += f" {cutoff:.0f}Hz]"
-            return filtfilt(b, a, signal), filter_label
-
-        elif filter_type == 'savgol':
-            window = int(cutoff) if cutoff > 10 else 51
-            if window % 2 == 0:
-                window += 1  # Must be odd
-            window = min(window, len(signal) - 1)
-            if window < 5:
-                window = 5
-            filter_label += f" w={window}]"
-            return savgol_filter(signal, window, 3), filter_label
-
-        elif filter_type == 'moving_avg':
-            window = int(cutoff) if cutoff > 1 else 51
-            window = min(window, len(signal) - 1)
-            kernel = np.ones(window) / window
-            filter_label += f" w={window}]"
-            return np.convolve(signal, kernel, mode='same'), filter_label
+            ratio = 20.0
+        try:
+            cutoff = float(getattr(self, f'{prefix}_filter_cutoff').get())
+        except:
+            cutoff = 2500
+        return ChannelSettings(channel,
+                               enabled=getattr(self, f'{prefix}_enabled').get(),
+                               type=getattr(self, f'{prefix}_type').get(),
+                               ratio=ratio,
+                               filter_enabled=getattr(self, f'{prefix}_filter_enabled').get(),
+                               filter_type=getattr(self, f'{prefix}_filter_type').get(),
+                               filter_cutoff=cutoff)
 
-        return signal, ""
+    def get_analysis_settings(self):
+        """Tüm analiz ayarlarının değişmez (Tk bağımsız) anlık görüntüsü: AnalysisSettings.
+        
+        Geçersiz kanal ifadesi veya ratio değerinde ValueError fırlatır.
+        """
+        try:
+            num_harm = int(self.num_harmonics.get())
+        except:
+            num_harm = 40
+        try:
+            diff_cutoff = float(self.diff_filter_cutoff.get())
+        except:
+            diff_cutoff = 500
+        try:
+            fold_cycles = max(0, int(self.fold_cycles.get()))
+        except:
+            fold_cycles = 0
+        return AnalysisSettings(
+            num_harmonics=num_harm,
+            channels=[self.get_channel_settings(ch) for ch in CHANNEL_NAMES],
+            diff_filter=FilterSettings(self.diff_filter_enabled.get(), self.diff_filter_type.get(), diff_cutoff),
+            expressions=parse_expressions(self.channel_expressions.get()),
+            fold_cycles=fold_cycles)
 
     def run_analysis(self):
         """Ana analiz fonksiyonu"""
@@ -1142,123 +960,13 @@ EXPORT:
             return
         
         try:
-            num_harm = int(self.num_harmonics.get())
-        except:
-            num_harm = 40
-        
-        self.results = {}
-        time = self.data['time']
-        sample_rate = self.data['sample_rate']
-        
-        # CH1 Analizi
-        if self.ch1_enabled.get() and self.data['ch1'] is not None:
-            try:
-                ratio = float(self.ch1_ratio.get())
-            except:
-                ratio = 20.0
-            
-            ch_type = self.ch1_type.get()
-            raw_data = self.data['ch1']
-            
-            if ch_type == 'Akim':
-                signal = raw_data * ratio
-                unit = 'A'
-            else:
-                signal = raw_data * 10
-                unit = 'V'
-            
-            signal_filtered, filter_active, filter_info = self.apply_filter(signal, sample_rate, 'CH1')
-            
-            metrics = self.analyzer.calculate_all_metrics(signal_filtered, sample_rate, num_harmonics=num_harm)
-            
-            self.results['CH1'] = {
-                'channel': 'CH1',
-                'type': ch_type,
-                'unit': unit,
-                'ratio': ratio,
-                'time': time[:len(signal_filtered)],
-                'signal': signal_filtered,
-                'signal_raw': signal,
-                'sample_rate': sample_rate,
-                'filter_active': filter_active,
-                'filter_info': filter_info,
-                **metrics
-            }
-        
-        # CH2 Analizi
-        if self.ch2_enabled.get() and self.data.get('ch2') is not None:
-            try:
-                ratio = float(self.ch2_ratio.get())
-            except:
-                ratio = 20.0
-            
-            ch_type = self.ch2_type.get()
-            raw_data = self.data['ch2']
-            
-            if ch_type == 'Akim':
-                signal = raw_data * ratio
-                unit = 'A'
-            else:
-                signal = raw_data * 10
-                unit = 'V'
-            
-            signal_filtered, filter_active, filter_info = self.apply_filter(signal, sample_rate, 'CH2')
-            
-            metrics = self.analyzer.calculate_all_metrics(signal_filtered, sample_rate, num_harmonics=num_harm)
-            
-            self.results['CH2'] = {
-                'channel': 'CH2',
-                'type': ch_type,
-                'unit': unit,
-                'ratio': ratio,
-                'time': time[:len(signal_filtered)],
-                'signal': signal_filtered,
-                'signal_raw': signal,
-                'sample_rate': sample_rate,
-                'filter_active': filter_active,
-                'filter_info': filter_info,
-                **metrics
-            }
-
-        # CH1-CH2 FARK ANALİZİ
-        if 'CH1' in self.results and 'CH2' in self.results:
-            ch1_res = self.results['CH1']
-            ch2_res = self.results['CH2']
-
-            # Fark sinyali oluştur
-            min_len = min(len(ch1_res['signal']), len(ch2_res['signal']))
-            diff_signal = ch1_res['signal'][:min_len] - ch2_res['signal'][:min_len]
-            diff_time = ch1_res['time'][:min_len]
-
-            # Fark sinyaline filtre uygula (opsiyonel)
-            filter_info_diff = ''
-            if self.diff_filter_enabled.get():
-                diff_signal, filter_info_diff = self.apply_diff_filter(diff_signal, sample_rate)
-
-            # Fark sinyalinin tam analizi
-            diff_metrics = self.analyzer.calculate_all_metrics(diff_signal, sample_rate, num_harmonics=num_harm)
-
-            # Birim belirleme (her iki kanal aynı türse o birim, değilse genel)
-            if ch1_res['type'] == ch2_res['type']:
-                diff_unit = ch1_res['unit']
-                diff_type = ch1_res['type']
-            else:
-                diff_unit = 'V/A'
-                diff_type = 'Karma'
-
-            self.results['DIFF'] = {
-                'channel': 'CH1-CH2',
-                'type': diff_type,
-                'unit': diff_unit,
-                'ratio': 1.0,
-                'time': diff_time,
-                'signal': diff_signal,
-                'signal_raw': diff_signal,
-                'sample_rate': sample_rate,
-                'filter_active': self.diff_filter_enabled.get(),
-                'filter_info': filter_info_diff,
-                **diff_metrics
-            }
+            settings = self.get_analysis_settings()
+        except ValueError as e:
+            messagebox.showerror("Ayar Hatası", str(e))
+            return
+        executor = self.channel_executor if self.parallel_channels.get() else None
+        self.results = analyze_capture(self.data, settings, self.analyzer, workers=self.fft_workers,
+                                       executor=executor)
 
         self.update_plots()
         self.display_results()
@@ -1288,7 +996,10 @@ EXPORT:
     
     def update_plots(self):
         """Grafikleri güncelle"""
-        if not self.results:
+        # Eski sonuçların zoom görünümü (ve dalga formları) bellekte tutulmaz
+        if self.zoom_view is not None and self.zoom_view[0] is not self.results:
+            self.zoom_view = None
+        if not self.results or self.fig is None:
             return
         
         self.fig.clear()
@@ -1298,6 +1009,12 @@ EXPORT:
             self.plot_separate()
         elif mode == 'compare':
             self.plot_compare()
+        elif mode == 'spectrogram':
+            self.plot_spectrogram()
+        elif mode == 'cycles':
+            self.plot_cycles()
+        elif mode == 'zoom':
+            self.plot_zoom()
         else:
             self.plot_overlay()
         
@@ -1305,169 +1022,43 @@ EXPORT:
         self.canvas.draw()
     
     def plot_overlay(self):
-        """Overlay grafik"""
-        ax1 = self.fig.add_subplot(3, 2, 1)
-        ax2 = self.fig.add_subplot(3, 2, 2)
-        ax3 = self.fig.add_subplot(3, 2, 3)
-        ax4 = self.fig.add_subplot(3, 2, 4)
-        ax5 = self.fig.add_subplot(3, 2, 5)
-        ax6 = self.fig.add_subplot(3, 2, 6)
-
-        # DIFF hariç ana kanallar
-        main_channels = {ch: res for ch, res in self.results.items() if ch != 'DIFF'}
-        colors = {'CH1': '#00d4ff', 'CH2': '#ff8844'}
-        width = 0.35
-        h_nums = list(range(1, 41))
-
-        # Harmonik bar
-        ax1.set_facecolor('#16213e')
-        for i, (ch, res) in enumerate(main_channels.items()):
-            amps = [h['amplitude'] * 1000 for h in res['harmonics'][:40]]
-            offset = -width/2 if i == 0 else width/2
-            label = f'{ch} THD={res["thd"]:.1f}%'
-            ax1.bar([x + offset for x in h_nums], amps, width, color=colors.get(ch, '#ffffff'), alpha=0.7, label=label)
-
-        any_current = any(res['type'] == 'Akim' for ch, res in main_channels.items())
-        if any_current:
-            limits = [IEC_CLASS_A_LIMITS.get(h, 0) * 1000 for h in range(1, 41)]
-            ax1.step(h_nums[1:], limits[1:], where='mid', color='#ffaa00', linewidth=2, linestyle='--', label='IEC Limit')
-
-        ax1.set_xlabel('Harmonik No', color='white')
-        ax1.set_ylabel('Genlik (mA/mV)', color='white')
-        ax1.set_title('Harmonik Spektrum', color='white', fontweight='bold')
-        ax1.set_xlim(0, 42)
-        ax1.legend(loc='upper right', facecolor='#16213e', labelcolor='white', fontsize=8)
-        ax1.grid(True, alpha=0.3, axis='y')
-        ax1.tick_params(colors='white')
-
-        # Dalga formu 60ms
-        ax2.set_facecolor('#16213e')
-        for ch, res in main_channels.items():
-            samples_60ms = int(0.060 * res['sample_rate'])
-            samples_to_show = min(samples_60ms, len(res['signal']))
-            start = len(res['signal']) // 2 - samples_to_show // 2
-            time_ms = (res['time'][start:start+samples_to_show] - res['time'][start]) * 1000
-            ax2.plot(time_ms, res['signal'][start:start+samples_to_show] * 1000,
-                    color=colors.get(ch, '#ffffff'), linewidth=0.6, label=f'{ch} RMS={res["rms"]*1000:.1f}m{res["unit"]}')
-        ax2.axhline(0, color='gray', linestyle='--', linewidth=0.5)
-        ax2.set_xlabel('Zaman (ms)', color='white')
-        ax2.set_ylabel('Genlik (mA/mV)', color='white')
-        ax2.set_title('Dalga Formu (60ms)', color='white')
-        ax2.legend(loc='upper right', facecolor='#16213e', labelcolor='white', fontsize=8)
-        ax2.grid(True, alpha=0.3)
-        ax2.tick_params(colors='white')
-        
-        # Limit yüzdeleri
-        ax3.set_facecolor('#16213e')
-        current_channels = {ch: res for ch, res in main_channels.items() if res['type'] == 'Akim'}
-        if current_channels:
-            for i, (ch, res) in enumerate(current_channels.items()):
-                percents = [h['percent'] for h in res['harmonics'][1:41]]
-                offset = -width/2 if i == 0 else width/2
-                bar_colors = [colors.get(ch, '#ffffff') if p <= 100 else '#ff4444' for p in percents]
-                ax3.bar([x + offset for x in range(2, 41)], percents, width, color=bar_colors, alpha=0.7, label=ch)
-            ax3.axhline(100, color='red', linestyle='--', linewidth=2, label='100% Limit')
-            ax3.set_xlabel('Harmonik No', color='white')
-            ax3.set_ylabel('Limite Göre (%)', color='white')
-            ax3.set_title('IEC Limit Karşılaştırma', color='white')
-            ax3.set_xlim(1, 41)
-            ax3.legend(loc='upper right', facecolor='#16213e', labelcolor='white', fontsize=8)
-        ax3.grid(True, alpha=0.3, axis='y')
-        ax3.tick_params(colors='white')
-        
-        # Dalga formu 10ms
-        ax4.set_facecolor('#16213e')
-        for ch, res in main_channels.items():
-            samples_10ms = int(0.010 * res['sample_rate'])
-            samples_to_show = min(samples_10ms, len(res['signal']))
-            start = len(res['signal']) // 2 - samples_to_show // 2
-            time_ms = (res['time'][start:start+samples_to_show] - res['time'][start]) * 1000
-            ax4.plot(time_ms, res['signal'][start:start+samples_to_show] * 1000,
-                    color=colors.get(ch, '#ffffff'), linewidth=0.8, label=f'{ch} Pk={res["ipk"]*1000:.1f}m{res["unit"]}')
-        ax4.axhline(0, color='gray', linestyle='--', linewidth=0.5)
-        ax4.set_xlabel('Zaman (ms)', color='white')
-        ax4.set_ylabel('Genlik (mA/mV)', color='white')
-        ax4.set_title('Dalga Formu (10ms)', color='white')
-        ax4.legend(loc='upper right', facecolor='#16213e', labelcolor='white', fontsize=8)
-        ax4.grid(True, alpha=0.3)
-        ax4.tick_params(colors='white')
-        
-        # CH1-CH2 Fark Sinyalinin Harmonik Analizi
-        ax5.set_facecolor('#16213e')
-        if 'DIFF' in self.results:
-            diff_res = self.results['DIFF']
-
-            # Harmonikleri çiz
-            h_nums = [h['harmonic'] for h in diff_res['harmonics'][:40]]
-            h_amps = [h['amplitude'] * 1000 for h in diff_res['harmonics'][:40]]
-            ax5.bar(h_nums, h_amps, color='#00ff88', edgecolor='white', linewidth=0.3, alpha=0.8)
-
-            # Başlıkta tüm önemli verileri göster
-            title = f"FARK Harmonik | RMS={diff_res['rms']*1000:.2f}m{diff_res['unit']} | THD={diff_res['thd']:.1f}% | CF={diff_res['cf']:.2f}"
-            ax5.set_xlabel('Harmonik No', color='white')
-            ax5.set_ylabel('Genlik (mA)', color='white')
-            ax5.set_title(title, color='#00ff88', fontsize=9)
-            ax5.set_xlim(0, 42)
-        else:
-            ax5.text(0.5, 0.5, 'Fark için 2 kanal gerekli', transform=ax5.transAxes,
-                    ha='center', va='center', color='gray', fontsize=12)
-        ax5.grid(True, alpha=0.3, axis='y')
-        ax5.tick_params(colors='white')
-
-        # Kanal farkı - Dalga Formu (CH1 - CH2)
-        ax6.set_facecolor('#16213e')
-        if 'DIFF' in self.results:
-            diff_res = self.results['DIFF']
-
-            # 60ms göster
-            samples_60ms = int(0.060 * diff_res['sample_rate'])
-            samples_to_show = min(samples_60ms, len(diff_res['signal']))
-            start = len(diff_res['signal']) // 2 - samples_to_show // 2
-
-            time_ms = (diff_res['time'][start:start+samples_to_show] - diff_res['time'][start]) * 1000
-            diff_wave = diff_res['signal'][start:start+samples_to_show] * 1000
-
-            filter_label = diff_res.get('filter_info', '')
-            ax6.plot(time_ms, diff_wave, color='#00ff88', linewidth=0.6, label=f'CH1-CH2{filter_label}')
-            ax6.axhline(0, color='white', linestyle='--', linewidth=0.5)
-            ax6.set_xlabel('Zaman (ms)', color='white')
-            ax6.set_ylabel('Fark (mA/mV)', color='white')
-
-            # Başlıkta Peak ve f0 göster
-            title = f"FARK Dalga | Pk={diff_res['ipk']*1000:.2f}m{diff_res['unit']} | f0={diff_res['fundamental']:.2f}Hz"
-            ax6.set_title(title, color='#00ff88', fontsize=9)
-            ax6.legend(loc='upper right', facecolor='#16213e', labelcolor='white', fontsize=8)
-        else:
-            ax6.text(0.5, 0.5, 'Fark için 2 kanal gerekli', transform=ax6.transAxes,
-                    ha='center', va='center', color='gray', fontsize=12)
-        ax6.grid(True, alpha=0.3)
-        ax6.tick_params(colors='white')
+        """Overlay grafik (batch grafik raporuyla aynı çizim)"""
+        draw_overlay(self.fig, overlay_data(self.results))
     
     def plot_separate(self):
         """Ayrı grafikler"""
-        # DIFF hariç kanalları al
-        channels = {ch: res for ch, res in self.results.items() if ch != 'DIFF'}
+        # DIFF ve ifadeler hariç kanalları al
+        channels = {ch: res for ch, res in self.results.items() if ch in CHANNEL_NAMES}
         n = len(channels)
-        colors = {'CH1': '#00d4ff', 'CH2': '#ff8844'}
+        colors = CHANNEL_COLORS
 
         for i, (ch, res) in enumerate(channels.items()):
             ax1 = self.fig.add_subplot(2, n*2, 1 + i*2)
             ax2 = self.fig.add_subplot(2, n*2, 2 + i*2)
-            ax3 = self.fig.add_subplot(2, n*2, 3 + n*2 + i*2)
-            ax4 = self.fig.add_subplot(2, n*2, 4 + n*2 + i*2)
+            ax3 = self.fig.add_subplot(2, n*2, 1 + n*2 + i*2)
+            ax4 = self.fig.add_subplot(2, n*2, 2 + n*2 + i*2)
             
             color = colors[ch]
             
             # Harmonik bar
             ax1.set_facecolor('#16213e')
-            h_nums = range(1, 41)
-            amps = [h['amplitude'] * 1000 for h in res['harmonics'][:40]]
-            bar_colors = [color if h['status'] != 'FAIL' else '#ff4444' for h in res['harmonics'][:40]]
+            # Harmonik sayısı analiz ayarından gelir (10-50); eksen grup dizileriyle aynı boyda
+            groups = res['groups']
+            orders = groups['subgroup'].shape[-1]
+            h_nums = np.arange(1, orders + 1)
+            amps = res['harmonics']['amplitude'][:orders] * 1000
+            bar_colors = np.where(res['harmonics']['status'][:orders] == STATUS_FAIL, '#ff4444', color)
             ax1.bar(h_nums, amps, color=bar_colors, edgecolor='white', linewidth=0.3)
+            # IEC 61000-4-7 alt grupları ve harmonikler arasındaki ara harmonik alt grupları
+            ax1.plot(h_nums, groups['subgroup'] * 1000, '_', color='white', markersize=6, label='Alt grup')
+            ax1.bar(h_nums + 0.5, groups['interharmonic_subgroup'] * 1000, 0.3,
+                    color='#888888', label='Ara harmonik')
+            ax1.legend(loc='upper right', facecolor='#16213e', labelcolor='white', fontsize=6)
             ax1.set_xlabel('Harmonik', color='white')
             ax1.set_ylabel('mA/mV', color='white')
-            ax1.set_title(f'{ch} THD={res["thd"]:.1f}%', color=color, fontweight='bold')
-            ax1.set_xlim(0, 42)
+            ax1.set_title(f'{ch} THD={res["thd"]:.1f}% THDG={group_thd(groups["group"]):.1f}%',
+                          color=color, fontweight='bold')
+            ax1.set_xlim(0, orders + 2)
             ax1.grid(True, alpha=0.3)
             ax1.tick_params(colors='white')
             
@@ -1488,8 +1079,8 @@ EXPORT:
             # FFT spektrum
             ax3.set_facecolor('#16213e')
             n_pts = len(res['signal'])
-            yf = np.abs(fft(res['signal']))[:n_pts//2] * 2 / n_pts * 1000
-            xf = fftfreq(n_pts, 1/res['sample_rate'])[:n_pts//2]
+            yf = np.abs(rfft(np.asarray(res['signal'])))[:n_pts//2] * 2 / n_pts * 1000
+            xf = np.arange(n_pts // 2) * (res['sample_rate'] / n_pts)
             mask = xf <= 2500
             ax3.plot(xf[mask], yf[mask], color=color, linewidth=0.5)
             ax3.set_xlabel('Frekans (Hz)', color='white')
@@ -1501,23 +1092,23 @@ EXPORT:
             # Limit yüzdesi
             ax4.set_facecolor('#16213e')
             if res['type'] == 'Akim':
-                percents = [h['percent'] for h in res['harmonics'][1:41]]
-                bar_colors = ['#00ff88' if p <= 100 else '#ff4444' for p in percents]
-                ax4.bar(range(2, 41), percents, color=bar_colors, edgecolor='white', linewidth=0.3)
+                percents = res['harmonics']['percent'][1:orders]
+                bar_colors = np.where(percents <= 100, '#00ff88', '#ff4444')
+                ax4.bar(h_nums[1:], percents, color=bar_colors, edgecolor='white', linewidth=0.3)
                 ax4.axhline(100, color='red', linestyle='--', linewidth=2)
                 ax4.set_xlabel('Harmonik', color='white')
                 ax4.set_ylabel('Limite (%)', color='white')
                 ax4.set_title(f'{ch} IEC %', color='white')
-                ax4.set_xlim(1, 41)
+                ax4.set_xlim(1, orders + 1)
             ax4.grid(True, alpha=0.3)
             ax4.tick_params(colors='white')
     
     def plot_compare(self):
         """Karşılaştırmalı grafik"""
-        colors = {'CH1': '#00d4ff', 'CH2': '#ff8844', 'DIFF': '#00ff88'}
+        colors = CHANNEL_COLORS
 
-        # DIFF hariç kanalları al
-        channels = {ch: res for ch, res in self.results.items() if ch != 'DIFF'}
+        # DIFF ve ifadeler hariç kanalları al
+        channels = {ch: res for ch, res in self.results.items() if ch in CHANNEL_NAMES}
 
         if len(channels) == 1:
             ch = list(channels.keys())[0]
@@ -1525,9 +1116,9 @@ EXPORT:
             ax1 = self.fig.add_subplot(2, 1, 1)
             ax2 = self.fig.add_subplot(2, 1, 2)
             
-            h_nums = range(1, 41)
-            amps = [h['amplitude'] * 1000 for h in res['harmonics'][:40]]
-            bar_colors = [colors[ch] if h['status'] != 'FAIL' else '#ff4444' for h in res['harmonics'][:40]]
+            h_nums = res['harmonics']['harmonic']
+            amps = res['harmonics']['amplitude'] * 1000
+            bar_colors = np.where(res['harmonics']['status'] == STATUS_FAIL, '#ff4444', colors[ch])
             ax1.bar(h_nums, amps, color=bar_colors, edgecolor='white', linewidth=0.3)
             ax1.set_xlabel('Harmonik', color='white')
             ax1.set_ylabel('mA/mV', color='white')
@@ -1547,70 +1138,57 @@ EXPORT:
             ax2.tick_params(colors='white')
             return
         
-        ax1 = self.fig.add_subplot(2, 2, 1)
-        ax2 = self.fig.add_subplot(2, 2, 2)
-        ax3 = self.fig.add_subplot(2, 1, 2)
-        
-        # Ayrı harmonikler
-        for ch, res in channels.items():
-            ax = ax1 if ch == 'CH1' else ax2
-            h_nums = range(1, 41)
-            amps = [h['amplitude'] * 1000 for h in res['harmonics'][:40]]
-            ax.bar(h_nums, amps, color=colors.get(ch, '#ffffff'), alpha=0.7, label=ch)
+        # Ayrı harmonikler: kanal başına bir grafik (üst sıra), tablo alt sırada
+        n = len(channels)
+        for i, (ch, res) in enumerate(channels.items()):
+            ax = self.fig.add_subplot(2, n, i + 1)
+            color = colors.get(ch, '#ffffff')
+            h_nums = res['harmonics']['harmonic']
+            amps = res['harmonics']['amplitude'] * 1000
+            bar_colors = np.where(res['harmonics']['status'] == STATUS_FAIL, '#ff4444', color)
+            ax.bar(h_nums, amps, color=bar_colors, alpha=0.7, label=ch)
             ax.set_xlabel('Harmonik', color='white')
-            ax.set_ylabel('mA/mV', color='white')
-            ax.set_title(f'{ch} THD={res["thd"]:.1f}%', color=colors.get(ch, '#ffffff'), fontweight='bold')
+            ax.set_ylabel(f'm{res["unit"]}', color='white')
+            ax.set_title(f'{ch} THD={res["thd"]:.1f}%', color=color, fontweight='bold')
             ax.legend(loc='upper right', facecolor='#16213e', labelcolor='white')
             ax.grid(True, alpha=0.3)
             ax.tick_params(colors='white')
         
-        # Tablo
+        # Tablo: tüm kanalların genlik ve limit yüzdeleri; CH1 ve CH2 varsa farkları
+        ax3 = self.fig.add_subplot(2, 1, 2)
         ax3.axis('off')
         table_data = []
-        headers = ['H#', 'CH1(mA)', 'CH2(mA)', 'Fark', 'Limit', 'CH1%', 'CH2%']
-        
-        ch1 = self.results.get('CH1')
-        ch2 = self.results.get('CH2')
+        with_diff = 'CH1' in channels and 'CH2' in channels
+        headers = (['H#'] + [f'{ch}(m{res["unit"]})' for ch, res in channels.items()]
+                   + (['Fark'] if with_diff else []) + ['Limit'] + [f'{ch}%' for ch in channels])
         
-        for h_idx in range(20):
+        rows = min([20] + [len(res['harmonics']) for res in channels.values()])
+        for h_idx in range(rows):
             h = h_idx + 1
             row = [str(h)]
+            row += [f'{res["harmonics"]["amplitude"][h_idx]*1000:.2f}' for res in channels.values()]
             
-            if ch1:
-                row.append(f'{ch1["harmonics"][h_idx]["amplitude"]*1000:.2f}')
-            else:
-                row.append('-')
-            
-            if ch2:
-                row.append(f'{ch2["harmonics"][h_idx]["amplitude"]*1000:.2f}')
-            else:
-                row.append('-')
-            
-            if ch1 and ch2:
-                diff = (ch1['harmonics'][h_idx]['amplitude'] - ch2['harmonics'][h_idx]['amplitude']) * 1000
+            if with_diff:
+                diff = (channels['CH1']['harmonics']['amplitude'][h_idx]
+                        - channels['CH2']['harmonics']['amplitude'][h_idx]) * 1000
                 row.append(f'{diff:+.2f}')
-            else:
-                row.append('-')
             
             limit = IEC_CLASS_A_LIMITS.get(h, 0)
             row.append(f'{limit*1000:.1f}' if h > 1 else '-')
             
-            if ch1 and h > 1:
-                row.append(f'{ch1["harmonics"][h_idx]["percent"]:.1f}%')
-            else:
-                row.append('-')
-            
-            if ch2 and h > 1:
-                row.append(f'{ch2["harmonics"][h_idx]["percent"]:.1f}%')
-            else:
-                row.append('-')
+            # Limitler akım içindir; gerilim kanallarında yüzde gösterilmez
+            for res in channels.values():
+                if h > 1 and res['type'] == 'Akim':
+                    row.append(f'{res["harmonics"]["percent"][h_idx]:.1f}%')
+                else:
+                    row.append('-')
             
             table_data.append(row)
         
         table = ax3.table(cellText=table_data, colLabels=headers, loc='center',
-                         cellLoc='center', colColours=['#0f3460']*7)
+                         cellLoc='center', colColours=['#0f3460']*len(headers))
         table.auto_set_font_size(False)
-        table.set_fontsize(9)
+        table.set_fontsize(9 if len(headers) <= 7 else 7)
         table.scale(1.2, 1.5)
         
         for (row, col), cell in table.get_celld().items():
@@ -1620,15 +1198,142 @@ EXPORT:
                 cell.set_facecolor('#0f3460')
                 cell.set_text_props(fontweight='bold', color='#00d4ff')
     
+    def plot_spectrogram(self):
+        """Harmonik-zaman ısı haritaları (kanallar, DIFF ve ifadeler); çizim genişliğine seyreltilmiş"""
+        columns = max(100, int(self.fig.get_figwidth() * self.fig.dpi))
+        spectrograms = harmonic_spectrograms(self.results, max_columns=columns, workers=self.fft_workers)
+        
+        for i, (ch, spec) in enumerate(spectrograms.items()):
+            ax = self.fig.add_subplot(len(spectrograms), 1, i + 1)
+            ax.set_facecolor('#16213e')
+            # Temel harmonik renk ölçeğini bastırmasın diye H2'den itibaren
+            amps = spec['amplitude'][1:] * 1000
+            time = spec['time']
+            if amps.shape[1] == 0:
+                ax.text(0.5, 0.5, f'{ch}: kayıt pencereden kısa', transform=ax.transAxes,
+                        ha='center', va='center', color='gray')
+                continue
+            image = ax.imshow(amps, aspect='auto', origin='lower', cmap='magma', interpolation='nearest',
+                              extent=(time[0], time[-1], 1.5, amps.shape[0] + 1.5))
+            cbar = self.fig.colorbar(image, ax=ax, pad=0.01)
+            cbar.ax.tick_params(colors='white', labelsize=7)
+            cbar.set_label(f"m{self.results[ch]['unit']}", color='white', fontsize=8)
+            ax.set_ylabel(f'{ch}\nHarmonik', color=CHANNEL_COLORS.get(ch, '#ffffff'))
+            ax.tick_params(colors='white')
+            if i == len(spectrograms) - 1:
+                ax.set_xlabel('Zaman (s)', color='white')
+            if i == 0:
+                ax.set_title(f'Harmonik Spektrogram (4 periyot pencere, 1 periyot adım, {spec["frames"]} çerçeve)',
+                             color='white', fontweight='bold')
+    
+    def plot_cycles(self):
+        """Periyot periyot RMS, crest factor, THD ve frekans trendleri"""
+        panels = [('rms', 'RMS (mA/mV)', 1000), ('cf', 'Crest Factor', 1),
+                  ('thd', 'THD (%)', 1), ('frequency', 'Frekans (Hz)', 1)]
+        axes = [self.fig.add_subplot(2, 2, i + 1) for i in range(len(panels))]
+        
+        for ch, res in self.results.items():
+            cycles, stats = result_cycles(res)
+            if len(cycles['rms']) == 0:
+                continue
+            color = CHANNEL_COLORS.get(ch, '#ffffff')
+            for ax, (key, label, factor) in zip(axes, panels):
+                mean, _, _, std = stats[key]
+                ax.plot(cycles['start'], cycles[key] * factor, color=color, linewidth=0.8,
+                        marker='.', markersize=2, label=f'{ch} {mean*factor:.2f}±{std*factor:.2f}')
+        
+        for ax, (key, label, factor) in zip(axes, panels):
+            ax.set_facecolor('#16213e')
+            ax.set_xlabel('Zaman (s)', color='white')
+            ax.set_ylabel(label, color='white')
+            ax.set_title(f'Periyot Bazlı {label}', color='white', fontsize=10)
+            ax.grid(True, alpha=0.3)
+            ax.tick_params(colors='white')
+            if ax.lines:
+                ax.legend(loc='upper right', facecolor='#16213e', labelcolor='white', fontsize=7)
+    
+    def plot_zoom(self):
+        """Seçilen harmonik çevresinde zoom FFT (chirp-z) ve ham FFT binleri.
+        
+        Dönüşümler kanal havuzunda (Tk iş parçacığı dışında) hesaplanır; bu
+        sırada bekleme yazısı çizilir, hazır olunca görünüm yeniden çizilir.
+        Hesaplanan görünüm aynı sonuç ve harmonik için yeniden kullanılır.
+        """
+        try:
+            order = max(1, int(self.zoom_harmonic.get()))
+        except ValueError:
+            order = 1
+        
+        results = self.results
+        view = self.zoom_view
+        if view is None or view[0] is not results or view[1] != order:
+            if self.zoom_pending is None or self.zoom_pending[0] is not results or self.zoom_pending[1] != order:
+                self.zoom_pending = (results, order)
+                workers = self.fft_workers
+                future = self.channel_executor.submit(
+                    lambda: {ch: harmonic_zoom(res, order, workers=workers) for ch, res in results.items()})
+                future.add_done_callback(lambda f: self.root.after(0, self.on_zoom_ready, results, order, f))
+            ax = self.fig.add_subplot(1, 1, 1)
+            ax.set_facecolor('#16213e')
+            ax.set_axis_off()
+            ax.text(0.5, 0.5, f'H{order} zoom FFT hesaplanıyor...', transform=ax.transAxes,
+                    ha='center', va='center', color='white', fontsize=12)
+            return
+        
+        zooms = view[2]
+        keys = list(zooms)
+        for i, ch in enumerate(keys):
+            res = results[ch]
+            zoom = zooms[ch]
+            ax = self.fig.add_subplot(len(keys), 1, i + 1)
+            ax.set_facecolor('#16213e')
+            color = CHANNEL_COLORS.get(ch, '#ffffff')
+            ax.plot(zoom['freqs'], zoom['amplitude'] * 1000, color=color, linewidth=1.2, label=f'{ch} zoom')
+            
+            # Karşılaştırma için aynı banttaki ham FFT binleri (pencere yok, 2/n ölçek)
+            if len(zoom['bins']):
+                ax.stem(zoom['bin_freqs'], zoom['bins'] * 1000, linefmt='gray', markerfmt='o', basefmt=' ', label='FFT bin')
+            
+            peak_freq, peak_amp, _ = zoom['peak']
+            center = zoom['center']
+            ax.axvline(center, color='#ffaa00', linestyle='--', linewidth=1, label=f'{order} x f1 = {center:.3f} Hz')
+            ax.set_title(f'{ch} H{order}: tepe {peak_freq:.4f} Hz, {peak_amp*1000:.3f} m{res["unit"]} '
+                         f'(FFT çözünürlüğü {zoom["df"]:.3f} Hz)', color='white', fontsize=9)
+            ax.set_ylabel(f'm{res["unit"]}', color='white')
+            ax.tick_params(colors='white')
+            ax.grid(True, alpha=0.3)
+            ax.legend(loc='upper right', facecolor='#16213e', labelcolor='white', fontsize=7)
+            if i == len(keys) - 1:
+                ax.set_xlabel('Frekans (Hz)', color='white')
+    
+    def on_zoom_ready(self, results, order, future):
+        """Arka planda hesaplanan zoom görünümünü sakla ve hâlâ geçerliyse çiz (Tk iş parçacığında)"""
+        if self.zoom_pending == (results, order):
+            self.zoom_pending = None
+        if results is not self.results:
+            return
+        try:
+            self.zoom_view = (results, order, future.result())
+        except Exception as e:
+            self.status_bar.config(text=f"Zoom FFT hatası: {e}")
+            return
+        if self.view_mode.get() == 'zoom':
+            self.update_plots()
+    
     def display_results(self):
         """Sonuçları göster"""
-        current_channels = [ch for ch, res in self.results.items() if res['type'] == 'Akim' and ch != 'DIFF']
+        current_channels = [ch for ch, res in self.results.items() if res['type'] == 'Akim' and ch in CHANNEL_NAMES]
 
-        # DIFF özet bilgisi
+        # DIFF ve kanal ifadeleri özet bilgisi
         diff_info = ""
-        if 'DIFF' in self.results:
-            diff = self.results['DIFF']
-            diff_info = f" | FARK: RMS={diff['rms']*1000:.2f}m{diff['unit']} THD={diff['thd']:.1f}%"
+        for ch, diff in self.results.items():
+            if ch in CHANNEL_NAMES:
+                continue
+            name = 'FARK' if ch == 'DIFF' else ch
+            diff_info += f" | {name}: RMS={diff['rms']*1000:.2f}m{diff['unit']} THD={diff['thd']:.1f}%"
+        for ch, res in self.results.items():
+            if 'power' in res:
+                diff_info += f" | {ch}: P={res['power']['P']:.1f}W PF={res['power']['pf']:.3f}"
 
         if current_channels:
             all_passed = all(self.results[ch]['passed'] for ch in current_channels)
@@ -1676,10 +1381,57 @@ Power Factor: {res['pf']:.4f}
 IEC 61000-3-2: {status}
 """
             
+            if res.get('fold'):
+                fold = res['fold']
+                report += (f"Periyot Katlama: {fold['records']} x {fold['cycles']} periyot ortalandı "
+                           f"(f = {fold['fundamental']:.4f} Hz)\n")
+            
             if res['failed']:
                 failed_list = ', '.join([f'H{h["harmonic"]}(%{h["percent"]:.1f})' for h in res['failed']])
                 report += f"Limit Aşan Harmonikler: {failed_list}\n"
             
+            cycles = result_cycles(res)[1]
+            if cycles['count']:
+                report += f"Periyot İstatistikleri ({cycles['count']} periyot, ort / min / maks / std):\n"
+                for key, label, factor in (('rms', 'RMS (m)', 1000), ('peak', 'Peak (m)', 1000),
+                                           ('cf', 'Crest Factor', 1), ('thd', 'THD (%)', 1),
+                                           ('frequency', 'Frekans (Hz)', 1)):
+                    values = ' / '.join(f"{v*factor:.3f}" for v in cycles[key])
+                    report += f"  {label.replace('(m)', '(m' + res['unit'] + ')'):<14} {values}\n"
+            
+            if 'power' in res:
+                power = res['power']
+                report += (f"Güç ({power['voltage']} x {ch}): P={power['P']:.3f} W, Q={power['Q']:.3f} var, "
+                           f"S={power['S']:.3f} VA, D={power['D']:.3f} VA, PF={power['pf']:.4f}, "
+                           f"DPF={power['dpf']:.4f}\n")
+                report += "  Sıra      P(W)      Q(var)      S(VA)    Faz(°)\n"
+                significant = np.flatnonzero(power['s'] > 1e-3 * power['s'][0])[:15]
+                for h in significant:
+                    report += (f"  {power['harmonic'][h]:4d} {power['p'][h]:10.3f} {power['q'][h]:10.3f} "
+                               f"{power['s'][h]:10.3f} {power['phase'][h]:8.1f}\n")
+            
+            groups = res['groups']
+            report += (f"IEC 61000-4-7 Gruplama: THDG={group_thd(groups['group']):.2f} %, "
+                       f"THDS={group_thd(groups['subgroup']):.2f} %\n")
+            inter = groups['interharmonic_subgroup']
+            top = [i for i in np.argsort(inter)[::-1][:5] if inter[i] > 1e-6 * groups['group'][0]]
+            if top:
+                inter_list = ', '.join(f"H{i+1}-{i+2} {inter[i]*1000:.3f}" for i in top)
+                report += f"Ara Harmonikler (merkezli alt grup, m{res['unit']}): {inter_list}\n"
+            
+            if res['type'] == 'Akim':
+                classes = evaluate_result_classes([res])
+                if classes['measured'][0]:
+                    basis = f"P={classes['power'][0]:.1f} W ölçülen ({res['power']['voltage']}), λ={classes['pf'][0]:.3f}"
+                else:
+                    basis = (f"P≈{classes['power'][0]:.0f} W tahmini (V x I1rms @ {NOMINAL_VOLTAGE:.0f} V), "
+                             f"λ≈{classes['pf'][0]:.3f}")
+                report += f"Sınıf Marjları ({basis}, RMS): "
+                report += ' | '.join(
+                    f"{name}: %{classes['margin_percent'][0, k]:.1f} (H{classes['worst_harmonic'][0, k]}) "
+                    f"{'PASS' if classes['passed'][0, k] else 'FAIL'}" if classes['applicable'][0, k] else f"{name}: -"
+                    for k, name in enumerate(LIMIT_CLASSES)) + "\n"
+            
             report += """
 Sıra   Frekans(Hz)   Genlik(mA)   Limit(mA)    %%      Faz(°)   Durum
 """
@@ -1709,6 +1461,8 @@ Sıra   Frekans(Hz)   Genlik(mA)   Limit(mA)    %%      Faz(°)   Durum
     
     def refresh_report(self):
         """Rapor sekmesini güncelle"""
+        if str(self.report_tab) in self.deferred_tabs:
+            return  # sekme açıldığında doldurulur
         if not self.results:
             self.report_text.delete(1.0, tk.END)
             self.report_text.insert(tk.END, "Henüz analiz yapılmadı.\nVeri yükleyip analiz edin.")
@@ -1772,24 +1526,62 @@ Sıra   Frekans(Hz)   Genlik(mA)   Limit(mA)    %%      Faz(°)   Durum
         )
         
         if filepath:
-            data = []
+            frames = []
             for ch, res in self.results.items():
-                for h in res['harmonics']:
-                    data.append({
-                        'Kanal': ch,
-                        'Harmonik': h['harmonic'],
-                        'Frekans(Hz)': h['frequency'],
-                        'Genlik(mA)': h['amplitude'] * 1000,
-                        'Limit(mA)': h['limit'] * 1000,
-                        'Limit%': h['percent'],
-                        'Faz(°)': h['phase'],
-                        'Durum': h['status']
-                    })
-            
-            df = pd.DataFrame(data)
+                table = res['harmonics']
+                groups = res['groups']
+                frames.append(lazy_import('pandas').DataFrame({
+                    'Kanal': ch,
+                    'Harmonik': table['harmonic'],
+                    'Frekans(Hz)': table['frequency'],
+                    'Genlik(mA)': table['amplitude'] * 1000,
+                    'Limit(mA)': table['limit'] * 1000,
+                    'Limit%': table['percent'],
+                    'Faz(°)': table['phase'],
+                    'Durum': table.statuses,
+                    # IEC 61000-4-7: h. ara harmonik h ile h+1 arasındadır
+                    'Grup(mA)': groups['group'] * 1000,
+                    'AltGrup(mA)': groups['subgroup'] * 1000,
+                    'AraHarmonikGrup(mA)': groups['interharmonic_group'] * 1000,
+                    'AraHarmonikAltGrup(mA)': groups['interharmonic_subgroup'] * 1000
+                }))
+            
+            df = lazy_import('pandas').concat(frames, ignore_index=True)
             df.to_csv(filepath, index=False, encoding='utf-8')
             messagebox.showinfo("Başarılı", f"Veriler kaydedildi:\n{filepath}")
     
+    def ask_archive_path(self, prefix):
+        """Arşiv dosyası seç (.h5 veya .parquet)"""
+        return filedialog.asksaveasfilename(
+            defaultextension=".h5",
+            filetypes=[("HDF5", "*.h5 *.hdf5"), ("Parquet", "*.parquet")],
+            initialfile=f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        )
+    
+    def save_archive(self, filepath, records):
+        """Kayıtları arşive yaz; eksik kütüphane ve yazma hatalarını bildir"""
+        try:
+            count = write_archive(filepath, records, mode='w')
+        except ImportError as e:
+            messagebox.showwarning("Eksik Kütüphane", str(e))
+            return
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Arşiv Hatası", str(e))
+            return
+        messagebox.showinfo("Başarılı", f"{count} kayıt arşivlendi:\n{filepath}")
+    
+    def export_archive(self):
+        """Ham dalga formları, metrikler ve harmonikleri sütunlu arşive (HDF5/Parquet) yaz"""
+        if not self.results:
+            messagebox.showwarning("Uyarı", "Önce analiz yapın!")
+            return
+        
+        filepath = self.ask_archive_path("harmonic_archive")
+        if filepath:
+            source = self.data.get('filepath')
+            self.save_archive(filepath, [(capture_name(source), self.results, capture_meta(self.results, source),
+                                          capture_waveforms(self.results))])
+    
     # ===================== BATCH PROCESSING =====================
     
     def batch_add_files(self):
@@ -1811,41 +1603,406 @@ Sıra   Frekans(Hz)   Genlik(mA)   Limit(mA)    %%      Faz(°)   Durum
             messagebox.showwarning("Uyarı", "Önce dosya ekleyin!")
             return
         
+        # Her dosyada mevcut kanalların hepsi analiz edilir (load_file ile aynı)
+        try:
+            settings = self.get_analysis_settings().with_all_channels()
+        except ValueError as e:
+            messagebox.showerror("Ayar Hatası", str(e))
+            return
+        
+        dut = simpledialog.askstring("Batch Analiz", "DUT adı (veritabanı kaydı için):",
+                                     initialvalue=self.batch_dut, parent=self.root)
+        if dut is None:
+            return
+        self.batch_dut = dut.strip()
+        
         self.batch_index = 0
         self.batch_results = []
         self.batch_progress['maximum'] = len(self.batch_files)
         
+        # Koherent ortalama: kanal başına artımlı fazör ortalaması, kayıtlar geldikçe
+        self.batch_average = defaultdict(CoherentAverager) if self.batch_coherent.get() else {}
+        
+        # Dalga formları bellekte tutulmaz; istenirse her dosya için diske yazılır
+        self.batch_spill_dir = None
+        if self.batch_spill.get():
+            self.batch_spill_dir = os.path.join(
+                os.getcwd(), 'batch_waveforms', datetime.now().strftime('%Y%m%d_%H%M%S'))
+            os.makedirs(self.batch_spill_dir, exist_ok=True)
+        
+        batch_errors = []
+        
         def process_next():
             if self.batch_index < len(self.batch_files):
-                fp = self.batch_files[self.batch_index]
-                self.batch_status.config(text=f"İşleniyor: {os.path.basename(fp)} ({self.batch_index+1}/{len(self.batch_files)})")
+                # Bellek sınırlı bir grup dosyayı yükle; eşit uzunluklu kayıtlar tek 2-B FFT ile analiz edilir
+                chunk, samples = [], 0
+                while self.batch_index + len(chunk) < len(self.batch_files) and samples < BATCH_FFT_SAMPLES:
+                    fp = self.batch_files[self.batch_index + len(chunk)]
+                    try:
+                        data = load_rigol_csv(fp, workers=self.fft_workers)
+                        samples += len(data['channel_names']) * len(data['time'])
+                    except Exception as e:
+                        batch_errors.append(f"{os.path.basename(fp)}: {e}")
+                        data = None
+                    chunk.append((self.batch_index + len(chunk), fp, data))
+                
+                last = self.batch_index + len(chunk)
+                self.batch_status.config(
+                    text=f"İşleniyor: {os.path.basename(chunk[0][1])} ({self.batch_index+1}-{last}/{len(self.batch_files)})")
                 self.root.update()
                 
-                # Analiz yap
-                self.file_path.set(fp)
-                self.load_file(fp)
-                self.run_analysis()
+                loaded = [entry for entry in chunk if entry[2] is not None]
+                batch = analyze_captures([data for _, _, data in loaded], settings, self.analyzer,
+                                         workers=self.fft_workers,
+                                         executor=self.channel_executor if self.parallel_channels.get() else None)
                 
-                # Sonuç kaydet
-                self.batch_results.append({
-                    'file': fp,
-                    'results': self.results.copy()
-                })
+                # Sonuç kaydet: yalnızca özet (dalga formları isteğe bağlı diske)
+                for (index, fp, data), results in zip(loaded, batch):
+                    waveform_file = None
+                    if self.batch_spill_dir is not None:
+                        name = f"{index:04d}_{os.path.splitext(os.path.basename(fp))[0]}.npz"
+                        waveform_file = spill_waveforms(results, os.path.join(self.batch_spill_dir, name))
+                    if self.batch_coherent.get():
+                        for ch, res in results.items():
+                            self.batch_average[ch].add(res['harmonics'])
+                    self.batch_results.append({
+                        'file': fp,
+                        'results': summarize_results(results),
+                        'sample_rate': data['sample_rate'],
+                        'points': len(data['time']),
+                        'waveform_file': waveform_file
+                    })
+                del chunk, loaded, batch
                 
-                self.batch_index += 1
+                self.batch_index = last
                 self.batch_progress['value'] = self.batch_index
                 
-                # Sonraki dosya
+                # Sonraki grup
                 self.root.after(100, process_next)
             else:
-                self.batch_status.config(text=f"Tamamlandı! {len(self.batch_files)} dosya işlendi.")
-                messagebox.showinfo("Tamamlandı", f"Batch işlem tamamlandı.\n{len(self.batch_files)} dosya işlendi.")
+                # Son dosyayı ana görünümde göster
+                if self.batch_results:
+                    fp = self.batch_results[-1]['file']
+                    self.file_path.set(fp)
+                    self.load_file(fp)
+                    self.run_analysis()
+                
+                db_info = self.store_batch_results()
+                if self.batch_spill_dir is not None:
+                    db_info += f"\nDalga formları: {self.batch_spill_dir}"
+                if self.batch_average:
+                    db_info += "\nKoherent ortalama: " + ', '.join(
+                        f"{ch} THD={avg.table().thd():.2f}% (N={avg.count})" for ch, avg in self.batch_average.items())
+                if batch_errors:
+                    db_info += f"\nOkunamayan {len(batch_errors)} dosya:\n" + "\n".join(batch_errors[:10])
+                done = len(self.batch_results)
+                self.batch_status.config(text=f"Tamamlandı! {done} dosya işlendi. {db_info.splitlines()[0]}")
+                messagebox.showinfo("Tamamlandı", f"Batch işlem tamamlandı.\n{done} dosya işlendi.\n{db_info}")
         
         process_next()
     
+    def store_batch_results(self):
+        """Batch sonuçlarını tek işlemde veritabanına yaz"""
+        records = [(br['file'], br['results'], self.batch_dut, None,
+                    {'source': 'csv', 'sample_rate': br['sample_rate'], 'points': br['points']})
+                   for br in self.batch_results]
+        try:
+            with ResultsStore(self.results_db_path) as store:
+                store.add_many(records)
+        except Exception as e:
+            messagebox.showerror("Veritabanı Hatası", f"Sonuçlar kaydedilemedi: {e}")
+            return "Veritabanına kaydedilemedi."
+        return f"Veritabanı: {os.path.basename(self.results_db_path)} (DUT: {self.batch_dut or '-'})"
+    
+    def toggle_folder_watch(self):
+        """Klasör izleme modunu başlat/durdur"""
+        if self.folder_watch is not None:
+            self.folder_watch.stop()
+            self.folder_watch = None
+            self.watch_button.config(text="👁 Klasör İzle")
+            self.batch_status.config(text="Klasör izleme durduruldu")
+            return
+        
+        try:
+            settings = self.get_analysis_settings()
+        except ValueError as e:
+            messagebox.showerror("Ayar Hatası", str(e))
+            return
+        
+        folder = filedialog.askdirectory(title="İzlenecek Klasörü Seç", initialdir=os.getcwd())
+        if not folder:
+            return
+        
+        self.folder_watch = FolderWatchService(
+            folder, settings,
+            workers=max(1, (os.cpu_count() or 2) - 1),
+            on_result=lambda path, summary, error: self.root.after(
+                0, self.on_watch_result, path, summary, error))
+        self.folder_watch.start()
+        self.watch_button.config(text="⏹ İzlemeyi Durdur")
+        self.batch_status.config(
+            text=f"İzleniyor ({self.folder_watch.mode}): {folder} | Rapor: {self.folder_watch.report.path}")
+    
+    def on_watch_result(self, path, summary, error):
+        """Klasör izleme sonucu geldi (Tk iş parçacığında)"""
+        name = os.path.basename(path)
+        if error is not None:
+            self.batch_listbox.insert(tk.END, f"✗ {name} | Hata: {error}")
+        else:
+            passed = all(res['passed'] for res in summary.values())
+            line = ' | '.join(f"{ch} THD={res['thd']:.1f}%" for ch, res in summary.items())
+            self.batch_listbox.insert(tk.END, f"{'✓' if passed else '✗'} {name} | {line}")
+        self.batch_listbox.see(tk.END)
+        
+        if self.folder_watch is not None:
+            stats = self.folder_watch.stats
+            self.batch_status.config(
+                text=f"İzleniyor ({self.folder_watch.mode}) | {stats['done']} analiz, "
+                     f"{stats['failed']} hata, {stats['skipped']} önceden işlenmiş")
+    
+    def run_observation_evaluation(self):
+        """Batch dosyalarını ardışık kayıt olarak IEC 61000-3-2 gözlem süresi boyunca değerlendir"""
+        if not self.batch_files:
+            messagebox.showwarning("Uyarı", "Önce dosya ekleyin!")
+            return
+        
+        try:
+            settings = self.get_analysis_settings().with_all_channels()
+        except ValueError as e:
+            messagebox.showerror("Ayar Hatası", str(e))
+            return
+        
+        channel = simpledialog.askstring("IEC Gözlem Süresi", "Kanal (CH1-CH4, DIFF veya ifade):",
+                                         initialvalue='DIFF', parent=self.root)
+        if not channel:
+            return
+        channel = channel.strip().upper()
+        
+        # Dosyalar sırayla okunur; bellekte yalnızca o anki kayıt ve harmonik istatistikleri kalır
+        evaluator = ObservationPeriodEvaluator(num_harmonics=settings.num_harmonics,
+                                               analyzer=self.analyzer, workers=self.fft_workers)
+        self.batch_progress['maximum'] = len(self.batch_files)
+        try:
+            for i, fp in enumerate(self.batch_files):
+                self.batch_status.config(text=f"Gözlem süresi: {os.path.basename(fp)} ({i+1}/{len(self.batch_files)})")
+                self.batch_progress['value'] = i + 1
+                self.root.update()
+                data = load_rigol_csv(fp, workers=self.fft_workers)
+                evaluator.add_capture(capture_signal(data, settings, channel), data['sample_rate'])
+                del data
+            result = evaluator.result()
+        except ValueError as e:
+            messagebox.showerror("Gözlem Süresi Hatası", str(e))
+            return
+        
+        report = "=" * 80 + "\n"
+        report += "          IEC 61000-3-2 GÖZLEM SÜRESİ DEĞERLENDİRMESİ\n"
+        report += "=" * 80 + "\n"
+        report += f"Kanal: {channel} | {len(self.batch_files)} dosya | {result['windows']} pencere "
+        report += f"({evaluator.window_cycles} periyot) | {result['duration']:.1f} s\n"
+        report += f"Yumuşatma: 1.5 s birinci derece filtre | Ortalama <= %100, Maksimum <= %150 limit\n\n"
+        report += "Sıra   Ort.RMS(mA)    Maks(mA)   Limit(mA)   Ort%     Maks%    Durum\n"
+        report += "-" * 75 + "\n"
+        for h, avg, peak, limit, avg_pct, max_pct, status in zip(
+                result['harmonic'], result['average'], result['maximum'], result['limit'],
+                result['average_percent'], result['maximum_percent'], STATUS_NAMES[result['status']]):
+            if h == 1:
+                report += f"  {h:2d}   {avg*1000:11.2f}   {peak*1000:9.2f}      ---        ---      ---     FUND\n"
+            else:
+                report += f"  {h:2d}   {avg*1000:11.2f}   {peak*1000:9.2f}   {limit*1000:8.2f}   "
+                report += f"{avg_pct:6.1f}%  {max_pct:6.1f}%   {status}\n"
+        verdict = "PASSED" if result['passed'] else "FAILED"
+        report += f"\nSONUÇ: {verdict}"
+        if len(result['failed']):
+            report += " | Limit Aşan: " + ', '.join(f"H{h}" for h in result['failed'])
+        report += "\n"
+        
+        self.ensure_tab(self.report_tab)
+        self.report_text.delete(1.0, tk.END)
+        self.report_text.insert(tk.END, report)
+        self.batch_status.config(text=f"Gözlem süresi {result['duration']:.1f} s: {verdict} (rapor sekmesinde)")
+        messagebox.showinfo("IEC Gözlem Süresi", f"{channel}: {verdict}\n{result['windows']} pencere, "
+                                                 f"{result['duration']:.1f} s\nAyrıntılar Rapor sekmesinde.")
+    
+    # ===================== SONUÇ VERİTABANI =====================
+    
+    def show_results_query(self):
+        """Veritabanı sorgu ve trend penceresi"""
+        try:
+            with ResultsStore(self.results_db_path) as store:
+                duts = [d['dut'] for d in store.duts()]
+        except Exception as e:
+            messagebox.showerror("Veritabanı Hatası", f"Veritabanı açılamadı: {e}")
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"Sonuç Sorgu / Trend - {os.path.basename(self.results_db_path)}")
+        dialog.geometry("1100x800")
+        dialog.configure(bg='#1a1a2e')
+        
+        filter_frame = ttk.LabelFrame(dialog, text="Filtre", padding="10")
+        filter_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        dut_var = tk.StringVar(value=self.batch_dut if self.batch_dut in duts else (duts[0] if duts else ''))
+        channel_var = tk.StringVar(value='DIFF')
+        harmonic_var = tk.StringVar(value='5')
+        percent_var = tk.StringVar(value='90')
+        status_var = tk.StringVar(value='Tümü')
+        metric_var = tk.StringVar(value='H5')
+        
+        fields = [
+            ("DUT:", ttk.Combobox(filter_frame, textvariable=dut_var, values=duts, width=16)),
+            ("Kanal:", ttk.Combobox(filter_frame, textvariable=channel_var,
+                                    values=['Tümü', *CHANNEL_NAMES, 'DIFF'], width=12)),
+            ("Harmonik:", ttk.Entry(filter_frame, textvariable=harmonic_var, width=5)),
+            ("Min %:", ttk.Entry(filter_frame, textvariable=percent_var, width=6)),
+            ("Durum:", ttk.Combobox(filter_frame, textvariable=status_var,
+                                    values=['Tümü', 'PASS', 'FAIL'], state='readonly', width=6)),
+        ]
+        for col, (label, widget) in enumerate(fields):
+            ttk.Label(filter_frame, text=label).grid(row=0, column=2 * col, padx=(10, 2), sticky='e')
+            widget.grid(row=0, column=2 * col + 1, sticky='w')
+        
+        ttk.Label(filter_frame, text="Trend:").grid(row=1, column=0, padx=(10, 2), pady=(8, 0), sticky='e')
+        ttk.Combobox(filter_frame, textvariable=metric_var, width=16,
+                     values=list(CHANNEL_METRICS) + ['H3', 'H5', 'H7', 'H9', 'H11', 'H13']
+                     ).grid(row=1, column=1, pady=(8, 0), sticky='w')
+        
+        result_text = tk.Text(dialog, font=('Consolas', 9), bg='#16213e', fg='#e8e8e8',
+                              relief='flat', height=14)
+        
+        plt = lazy_import('matplotlib.pyplot')
+        fig, ax = plt.subplots(figsize=(10, 3.5), facecolor='#1a1a2e')
+        canvas = lazy_import('matplotlib.backends.backend_tkagg').FigureCanvasTkAgg(fig, master=dialog)
+        dialog.bind('<Destroy>', lambda e: plt.close(fig) if e.widget is dialog else None)
+        
+        def optional(var, cast):
+            value = var.get().strip()
+            return cast(value) if value and value != 'Tümü' else None
+        
+        def run_query():
+            try:
+                kwargs = dict(dut=optional(dut_var, str), channel=optional(channel_var, str),
+                              harmonic=optional(harmonic_var, int),
+                              min_percent=optional(percent_var, float),
+                              status=optional(status_var, str))
+            except ValueError:
+                messagebox.showerror("Hata", "Harmonik ve yüzde sayısal olmalı!", parent=dialog)
+                return
+            t0 = datetime.now()
+            with ResultsStore(self.results_db_path) as store:
+                rows = store.query(**kwargs)
+            elapsed = (datetime.now() - t0).total_seconds() * 1000
+            
+            result_text.delete(1.0, tk.END)
+            result_text.insert(tk.END, f"{'Tarih':<20} {'DUT':<12} {'Kanal':<5} {'H':>3} "
+                                       f"{'Genlik(mA)':>11} {'%Limit':>7}  Durum  Dosya\n")
+            for r in rows:
+                result_text.insert(tk.END, f"{r['captured_at']:<20} {r['dut']:<12} {r['channel']:<5} "
+                                           f"{r['harmonic']:>3} {r['amplitude']*1000:>11.2f} "
+                                           f"{r['percent']:>7.1f}  {r['status']:<5}  "
+                                           f"{os.path.basename(r['file'])}\n")
+            result_text.insert(tk.END, f"\n{len(rows)} satır ({elapsed:.1f} ms)\n")
+        
+        def run_trend():
+            dut = dut_var.get().strip()
+            channel = channel_var.get() if channel_var.get() != 'Tümü' else 'DIFF'
+            metric = metric_var.get().strip()
+            t0 = datetime.now()
+            try:
+                with ResultsStore(self.results_db_path) as store:
+                    rows = store.trend(dut, channel, metric)
+            except ValueError as e:
+                messagebox.showerror("Hata", str(e), parent=dialog)
+                return
+            elapsed = (datetime.now() - t0).total_seconds() * 1000
+            
+            ax.clear()
+            ax.set_facecolor('#16213e')
+            values = [r['value'] for r in rows]
+            ax.plot(range(len(values)), values, 'o-', color='#00d4ff', markersize=3, linewidth=1)
+            if metric.upper().startswith('H'):
+                ax.axhline(100, color='#ff4757', linestyle='--', linewidth=1, label='Limit')
+                ax.axhline(90, color='#ffa502', linestyle=':', linewidth=1, label='%90')
+                ax.legend(loc='upper right', fontsize=8)
+            ax.set_title(f"{dut or '(boş)'} - {channel} {metric} trendi ({len(rows)} kayıt, {elapsed:.1f} ms)",
+                         color='white', fontsize=10)
+            ax.set_xlabel('Kayıt (tarih sırası)', color='white')
+            ax.set_ylabel('% Limit' if metric.upper().startswith('H') else metric, color='white')
+            ax.tick_params(colors='white')
+            ax.grid(True, alpha=0.3)
+            fig.tight_layout()
+            canvas.draw()
+        
+        btn_frame = ttk.Frame(filter_frame)
+        btn_frame.grid(row=1, column=2, columnspan=8, pady=(8, 0), sticky='w')
+        ttk.Button(btn_frame, text="🔎 Sorgula", command=run_query).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="📈 Trend", command=run_trend).pack(side=tk.LEFT, padx=5)
+        
+        result_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+    
+    def export_batch_archive(self):
+        """Batch sonuçlarını sütunlu arşive yaz (dalga formları diske yazıldıysa onlar da)"""
+        if not self.batch_results:
+            messagebox.showwarning("Uyarı", "Önce batch analiz yapın!")
+            return
+        
+        filepath = self.ask_archive_path("Batch_Archive")
+        if not filepath:
+            return
+        
+        def records():
+            # Dalga formları dosya dosya okunur; bellekte tek kayıt kalır
+            for i, br in enumerate(self.batch_results):
+                waveforms = {}
+                if br.get('waveform_file'):
+                    waveforms = {ch: w['signal_raw'] for ch, w in load_spilled_waveforms(br['waveform_file']).items()
+                                 if ch in CHANNEL_NAMES}
+                yield (capture_name(br['file'], i), br['results'],
+                       {'file': br['file'], 'sample_rate': br['sample_rate'], 'points': br['points']}, waveforms)
+        
+        self.save_archive(filepath, records())
+    
+    def save_batch_figures(self):
+        """Her batch sonucu için overlay grafiği: PNG + PDF ve tek çok sayfalı PDF.
+        
+        Çizim ekran dışında (Agg) işçi süreçlerde yapılır; dalga formu panelleri
+        yalnızca dalga formları diske yazıldıysa dolar.
+        """
+        if not self.batch_results:
+            messagebox.showwarning("Uyarı", "Önce batch analiz yapın!")
+            return
+        
+        out_dir = filedialog.askdirectory(title="Grafik klasörü seçin")
+        if not out_dir:
+            return
+        out_dir = os.path.join(out_dir, f"Batch_Figures_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        
+        jobs = [figure_job(f"{i:04d}_{os.path.splitext(os.path.basename(br['file']))[0]}",
+                           os.path.basename(br['file']), br['results'], br.get('waveform_file'))
+                for i, br in enumerate(self.batch_results)]
+        
+        def progress(done, total):
+            self.batch_status.config(text=f"Grafikler çiziliyor: {done}/{total}")
+            self.batch_progress['maximum'] = total
+            self.batch_progress['value'] = done
+            self.root.update()
+        
+        try:
+            written = render_batch_figures(jobs, out_dir, workers=os.cpu_count(), progress=progress)
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Grafik Hatası", str(e))
+            return
+        
+        self.batch_status.config(text=f"{len(jobs)} grafik çizildi")
+        note = "" if any(br.get('waveform_file') for br in self.batch_results) else \
+            "\n\nNot: Dalga formları diske yazılmadığı için dalga formu panelleri boş."
+        messagebox.showinfo("Başarılı", f"{len(written)} dosya kaydedildi:\n{out_dir}{note}")
+    
     def save_batch_report(self):
         """Tüm batch sonuçlarını kaydet"""
-        if not hasattr(self, 'batch_results') or not self.batch_results:
+        if not self.batch_results:
             messagebox.showwarning("Uyarı", "Önce batch analiz yapın!")
             return
         
@@ -1864,6 +2021,8 @@ Sıra   Frekans(Hz)   Genlik(mA)   Limit(mA)    %%      Faz(°)   Durum
             for i, br in enumerate(self.batch_results):
                 report += f"\n{'='*60}\n"
                 report += f"Dosya {i+1}: {br['file']}\n"
+                if br.get('waveform_file'):
+                    report += f"Dalga formu: {br['waveform_file']}\n"
                 report += f"{'='*60}\n\n"
                 
                 for ch, res in br['results'].items():
@@ -1871,7 +2030,65 @@ Sıra   Frekans(Hz)   Genlik(mA)   Limit(mA)    %%      Faz(°)   Durum
                     report += f"{ch}: THD={res['thd']:.2f}%, TDD={res['tdd']:.2f}%, PF={res['pf']:.4f}, IEC={status}\n"
                     
                     if res['failed']:
-                        report += f"  Limit Aşan: {', '.join([f'H{h['harmonic']}' for h in res['failed']])}\n"
+                        failed_list = ', '.join([f"H{h['harmonic']}" for h in res['failed']])
+                        report += f"  Limit Aşan: {failed_list}\n"
+            
+            # Tüm dosyalarda harmonik bazında en kötü durum (dosya x harmonik dizisi)
+            report += f"\n{'='*60}\nEN KÖTÜ DURUM ({len(self.batch_results)} dosya)\n{'='*60}\n"
+            keys = list(dict.fromkeys(ch for br in self.batch_results for ch in br['results']))
+            for ch in keys:
+                tables = [br['results'][ch]['harmonics'] for br in self.batch_results if ch in br['results']]
+                if not tables:
+                    continue
+                try:
+                    stacked = HarmonicTable.stack(tables)
+                except ValueError:
+                    continue
+                worst = stacked['percent'].max(axis=0)
+                fail_count = (stacked['status'] == STATUS_FAIL).sum(axis=0)
+                order = [i for i in np.argsort(worst)[::-1][:5] if worst[i] > 0]
+                worst_list = ', '.join(f"H{stacked['harmonic'][0, i]} %{worst[i]:.1f} ({fail_count[i]} FAIL)"
+                                       for i in order)
+                report += f"{ch}: {worst_list or '-'}\n"
+            
+            # Koherent vektör ortalama: tek kayıt sonuçlarının ortalamasıyla ve gürültü tabanıyla
+            if self.batch_average:
+                count = next(iter(self.batch_average.values())).count
+                report += f"\n{'='*60}\nKOHERENT VEKTÖR ORTALAMA ({count} kayıt, temel faza hizalı)\n{'='*60}\n"
+            for ch, avg in self.batch_average.items():
+                table = avg.table()
+                scalar_thd = np.mean([br['results'][ch]['thd'] for br in self.batch_results if ch in br['results']])
+                report += f"{ch}: THD={table.thd():.2f}% (kayıt ortalaması {scalar_thd:.2f}%), IEC={'PASS' if table.passed() else 'FAIL'}\n"
+                report += "  Sıra   Genlik(mA)   Gürültü(mA)   %Limit\n"
+                for h, amp, noise, pct in zip(table['harmonic'][:15], table['amplitude'][:15],
+                                              avg.noise[:15], table['percent'][:15]):
+                    report += f"  {h:4d}   {amp*1000:10.3f}   {noise*1000:11.4f}   {pct:6.1f}%\n"
+            
+            # Tüm dosyalar ve sınıflar için limit marjları (dosya x sınıf x harmonik tek geçişte)
+            report += (f"\n{'='*60}\nSINIF LİMİT MARJLARI (RMS; P gerilim kanalından ölçülen, "
+                       f"yoksa {NOMINAL_VOLTAGE:.0f} V x I1rms tahmini)\n{'='*60}\n")
+            for ch in keys:
+                files = [br['file'] for br in self.batch_results if ch in br['results']]
+                channel_results = [br['results'][ch] for br in self.batch_results if ch in br['results']]
+                if not channel_results or channel_results[0]['type'] != 'Akim':
+                    continue
+                try:
+                    classes = evaluate_result_classes(channel_results)
+                except ValueError:
+                    continue
+                measured = int(classes['measured'].sum())
+                report += (f"{ch}: P {measured}/{len(channel_results)} kayıtta ölçülen, "
+                           f"{len(channel_results) - measured} kayıtta tahmini\n")
+                for k, name in enumerate(LIMIT_CLASSES):
+                    applicable = classes['applicable'][:, k]
+                    if not applicable.any():
+                        report += f"  {name}: uygulanmaz\n"
+                        continue
+                    margins = np.where(applicable, classes['margin_percent'][:, k], np.inf)
+                    worst = int(np.argmin(margins))
+                    report += (f"  {name}: {int(classes['passed'][applicable, k].sum())}/{int(applicable.sum())} PASS, "
+                               f"en düşük marj %{margins[worst]:.1f} (H{classes['worst_harmonic'][worst, k]}, "
+                               f"{os.path.basename(files[worst])})\n")
             
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write(report)
@@ -1880,9 +2097,16 @@ Sıra   Frekans(Hz)   Genlik(mA)   Limit(mA)    %%      Faz(°)   Durum
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Diferansiyel Harmonik Analizörü")
+    parser.add_argument('--import-times', action='store_true',
+                        help="Çıkışta modül içe aktarma sürelerini yazdır")
+    args = parser.parse_args()
+    
     root = tk.Tk()
     app = DualCurrentAnalyzer(root)
     root.mainloop()
+    if args.import_times:
+        print(f"Açılış: {app.startup_time:.3f} s\n{format_import_times()}")
 
 
 if __name__ == "__main__":
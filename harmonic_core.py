@@ -0,0 +1,2149 @@
+"""
+ Harmonik Analiz Çekirdeği
+ =========================
+ - Tk bağımsız: arayüz, messagebox veya Tk değişkeni kullanmaz
+ - Değişmez parametre nesneleri (AnalysisSettings) girer, düz sonuç
+   sözlükleri çıkar; hatalar istisna olarak bildirilir (ValueError/ImportError)
+ - Paylaşılan durum tutmadığından iş parçacığı ve süreç havuzlarında,
+   analiz servisinde ve klasör izlemede doğrudan çalıştırılabilir
+"""
+
+from time import perf_counter
+import numpy as np
+import io
+import os
+import re
+import sys
+import importlib
+import multiprocessing
+from multiprocessing import shared_memory
+from collections import defaultdict, namedtuple
+import concurrent.futures
+
+# ===================== GECİKMELİ İÇE AKTARMA =====================
+
+# Modül -> içe aktarma süresi (s). Ağır modüller (pandas, matplotlib, scipy)
+# açılışta değil ilk kullanımda yüklenir; süreleri burada toplanır.
+IMPORT_TIMES = {}
+
+
+def lazy_import(name):
+    """Modülü ilk kullanımda içe aktar ve süresini IMPORT_TIMES'a yaz"""
+    module = sys.modules.get(name)
+    if module is None:
+        start = perf_counter()
+        module = importlib.import_module(name)
+        IMPORT_TIMES[name] = perf_counter() - start
+    return module
+
+
+def format_import_times():
+    """IMPORT_TIMES'ın süreye göre sıralı metin dökümü"""
+    return '\n'.join(f"{seconds*1000:8.1f} ms  {name}"
+                     for name, seconds in sorted(IMPORT_TIMES.items(), key=lambda item: -item[1]))
+
+
+def rfft(x, *args, **kwargs):
+    """scipy.fft.rfft; scipy.fft ilk FFT'de yüklenir"""
+    return lazy_import('scipy.fft').rfft(x, *args, **kwargs)
+
+# IEC 61000-3-2 CLASS A LIMITLERI (Amper)
+IEC_CLASS_A_LIMITS = {
+    2: 1.0800, 3: 2.3000, 4: 0.4300, 5: 1.1400, 6: 0.3000,
+    7: 0.7700, 8: 0.2300, 9: 0.4000, 10: 0.1840, 11: 0.3300,
+    12: 0.1533, 13: 0.2100, 14: 0.1314, 15: 0.1500, 16: 0.1150,
+    17: 0.1324, 18: 0.1022, 19: 0.1184, 20: 0.0920, 21: 0.1071,
+    22: 0.0836, 23: 0.0978, 24: 0.0767, 25: 0.0900, 26: 0.0708,
+    27: 0.0833, 28: 0.0657, 29: 0.0776, 30: 0.0613, 31: 0.0726,
+    32: 0.0575, 33: 0.0682, 34: 0.0541, 35: 0.0643, 36: 0.0511,
+    37: 0.0608, 38: 0.0484, 39: 0.0577, 40: 0.0460,
+}
+
+# ===================== IEC 61000-3-2 SINIF LİMİTLERİ =====================
+# Tüm sınıflar için önceden hesaplanmış limit dizileri (indeks = harmonik - 1):
+#   A: mutlak (A), B: 1.5 x A, C: temel akımın yüzdesi (H3: 30 x λ),
+#   D: güç başına (A/W), A sınıfı mutlak limitleriyle sınırlı
+LIMIT_CLASSES = ('A', 'B', 'C', 'D')
+LIMIT_ORDERS = np.arange(1, 41)
+NOMINAL_VOLTAGE = 230.0
+
+CLASS_A_LIMIT_ARRAY = np.array([IEC_CLASS_A_LIMITS.get(h, 0.0) for h in LIMIT_ORDERS])
+CLASS_B_LIMIT_ARRAY = CLASS_A_LIMIT_ARRAY * 1.5
+CLASS_C_PERCENT_ARRAY = np.array([{2: 2.0, 3: 30.0, 5: 10.0, 7: 7.0, 9: 5.0}.get(
+    h, 3.0 if h >= 11 and h % 2 else 0.0) for h in LIMIT_ORDERS])
+CLASS_D_PER_WATT_ARRAY = np.array([{3: 3.4, 5: 1.9, 7: 1.0, 9: 0.5, 11: 0.35}.get(
+    h, 3.85 / h if h >= 13 and h % 2 else 0.0) for h in LIMIT_ORDERS]) * 1e-3
+# D sınıfı limitleri 75 W altında uygulanmaz
+CLASS_D_MIN_POWER = 75.0
+
+
+def class_limit_matrix(power, fundamental, pf):
+    """Kayıt başına (... x sınıf x harmonik) limit matrisi; limit olmayan yerler 0.
+    
+    power (W), fundamental (temel harmonik akımı, A) ve pf (λ) skaler veya
+    kayıt dizisi olabilir; C ve D sınıfı limitleri bunlardan tek seferde hesaplanır.
+    """
+    power, fundamental, pf = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64)
+                                                   for v in (power, fundamental, pf)))
+    shape = power.shape + (len(LIMIT_CLASSES), len(LIMIT_ORDERS))
+    limits = np.empty(shape)
+    limits[..., 0, :] = CLASS_A_LIMIT_ARRAY
+    limits[..., 1, :] = CLASS_B_LIMIT_ARRAY
+    class_c = fundamental[..., None] * CLASS_C_PERCENT_ARRAY / 100
+    class_c[..., 2] *= pf
+    limits[..., 2, :] = class_c
+    class_d = np.minimum(power[..., None] * CLASS_D_PER_WATT_ARRAY, CLASS_A_LIMIT_ARRAY)
+    limits[..., 3, :] = np.where(power[..., None] > CLASS_D_MIN_POWER, class_d, 0.0)
+    return limits
+
+
+def evaluate_limit_classes(amplitudes, power, fundamental, pf):
+    """Harmonik genliklerini (... x harmonik) tüm sınıfların limitlerine karşı tek geçişte değerlendir.
+    
+    Temel hariç limiti olan harmoniklerde limit yüzdesi ve marj (limit - genlik)
+    hesaplanır; sınıf başına karar, en kötü harmonik ve en küçük yüzde marj döner.
+    """
+    amplitudes = np.asarray(amplitudes, dtype=np.float64)
+    h = min(amplitudes.shape[-1], len(LIMIT_ORDERS))
+    amplitudes = amplitudes[..., None, :h]
+    limits = class_limit_matrix(power, fundamental, pf)[..., :h]
+    limited = limits > 0
+    limited[..., 0] = False
+    
+    percent = np.divide(amplitudes * 100, limits, out=np.zeros(limits.shape), where=limited)
+    margin = np.where(limited, limits - amplitudes, np.inf)
+    worst = np.argmax(np.where(limited, percent, -1.0), axis=-1)
+    worst_percent = np.take_along_axis(percent, worst[..., None], axis=-1)[..., 0]
+    applicable = limited.any(axis=-1)
+    return {
+        'classes': LIMIT_CLASSES,
+        'limits': limits,
+        'percent': percent,
+        'margin': margin,
+        'applicable': applicable,
+        'passed': ~(limited & (percent > 100)).any(axis=-1),
+        'worst_harmonic': np.where(applicable, worst + 1, 0),
+        'margin_percent': np.where(applicable, 100 - worst_percent, np.nan)
+    }
+
+
+# Preset dönüşüm oranları (A/V)
+RATIO_PRESETS = {
+    "5A->0.25V (20 A/V)": 20.0,
+    "10A->1V (10 A/V)": 10.0,
+    "1A->0.1V (10 A/V)": 10.0,
+    "1A->1V (1 A/V)": 1.0,
+    "100mV/A (10 A/V)": 10.0,
+    "50mV/A (20 A/V)": 20.0,
+    "Manual": None
+}
+
+# Analiz presetleri
+ANALYSIS_PRESETS = {
+    "IEC61000-3-2 Class A": {
+        "harmonics": 40,
+        "fundamental_range": (45, 65),
+        "thd_limit": 100,
+        "limits": IEC_CLASS_A_LIMITS
+    },
+    "Hızlı Analiz": {
+        "harmonics": 20,
+        "fundamental_range": (45, 65),
+        "thd_limit": 100,
+        "limits": {k: IEC_CLASS_A_LIMITS[k] for k in range(2, 21)}
+    },
+    "Geniş Bant": {
+        "harmonics": 50,
+        "fundamental_range": (45, 65),
+        "thd_limit": 100,
+        "limits": IEC_CLASS_A_LIMITS
+    }
+}
+
+# Rigol CSV'de tanınan kanallar ve grafik renkleri
+CHANNEL_NAMES = ('CH1', 'CH2', 'CH3', 'CH4')
+CHANNEL_COLORS = {'CH1': '#00d4ff', 'CH2': '#ff8844', 'CH3': '#cc66ff', 'CH4': '#ffdd44', 'DIFF': '#00ff88'}
+
+
+# ===================== ANALİZ PARAMETRELERİ =====================
+# Analiz girdileri değişmez (namedtuple) nesnelerdir: iş parçacıkları ve
+# süreçler arasında olduğu gibi paylaşılır, analiz sürerken değiştirilemez.
+
+class ChannelSettings(namedtuple('ChannelSettings', 'name enabled type ratio filter_enabled filter_type filter_cutoff',
+                                 defaults=(True, 'Akim', 20.0, False, 'savgol', 2500))):
+    """Tek kanalın ölçekleme ve filtre ayarları"""
+    __slots__ = ()
+    
+    def __new__(cls, name, *args, **kwargs):
+        self = super().__new__(cls, name, *args, **kwargs)
+        if name not in CHANNEL_NAMES:
+            raise ValueError(f"Bilinmeyen kanal: {name}")
+        if not self.ratio > 0:
+            raise ValueError(f"{name}: ratio pozitif olmalı ({self.ratio})")
+        return self
+
+
+class FilterSettings(namedtuple('FilterSettings', 'enabled type cutoff', defaults=(False, 'savgol', 500))):
+    """DIFF sinyali filtre ayarları"""
+    __slots__ = ()
+
+
+class AnalysisSettings(namedtuple('AnalysisSettings', 'num_harmonics channels diff_filter expressions fold_cycles',
+                                  defaults=(40, tuple(ChannelSettings(ch) for ch in CHANNEL_NAMES),
+                                            FilterSettings(), (), 0))):
+    """Bir analizin tüm parametreleri.
+    
+    channels: ChannelSettings demeti, expressions: DIFF dışındaki kanal
+    ifadeleri ('CH1-CH2-CH3' gibi), fold_cycles: > 0 ise metrikler o kadar
+    periyotluk senkron ortalamadan hesaplanır. Geçersiz değerde ValueError.
+    """
+    __slots__ = ()
+    
+    def __new__(cls, num_harmonics=40, channels=None, diff_filter=None, expressions=(), fold_cycles=0):
+        channels = cls._field_defaults['channels'] if channels is None else tuple(channels)
+        diff_filter = FilterSettings() if diff_filter is None else FilterSettings(*diff_filter)
+        self = super().__new__(cls, int(num_harmonics), channels, diff_filter,
+                               tuple(expressions), int(fold_cycles))
+        if self.num_harmonics < 1:
+            raise ValueError(f"Harmonik sayısı en az 1 olmalı ({self.num_harmonics})")
+        if self.fold_cycles < 0:
+            raise ValueError(f"Katlanacak periyot sayısı negatif olamaz ({self.fold_cycles})")
+        for expression in self.expressions:
+            parse_channel_expression(expression)
+        return self
+    
+    @classmethod
+    def from_dict(cls, settings):
+        """Düz sözlükten ({'num_harmonics', 'channels': {ad: {...}}, 'diff_filter': {...}, ...})"""
+        return cls(settings.get('num_harmonics', 40),
+                   [ChannelSettings(**{**values, 'name': ch}) for ch, values in settings.get('channels', {}).items()],
+                   FilterSettings(**settings.get('diff_filter', {})),
+                   settings.get('expressions', ()), settings.get('fold_cycles', 0))
+    
+    @classmethod
+    def coerce(cls, settings):
+        """AnalysisSettings'i olduğu gibi, düz sözlüğü dönüştürerek döndür"""
+        return settings if isinstance(settings, cls) else cls.from_dict(settings)
+    
+    def channel(self, name):
+        """Kanalın ayarları; ayar yoksa None"""
+        return next((ch for ch in self.channels if ch.name == name), None)
+    
+    def with_all_channels(self):
+        """Tüm kanalları etkin kopya (toplu işlerde dosyada olan her kanal analiz edilir)"""
+        return self._replace(channels=tuple(ch._replace(enabled=True) for ch in self.channels))
+    
+    def to_dict(self):
+        """JSON'a yazılabilir düz sözlük (from_dict'in tersi)"""
+        return {'num_harmonics': self.num_harmonics,
+                'channels': {ch.name: ch._asdict() for ch in self.channels},
+                'diff_filter': self.diff_filter._asdict(),
+                'expressions': list(self.expressions),
+                'fold_cycles': self.fold_cycles}
+
+
+class ImageWaveformExtractor:
+    """PNG görüntüden dalga formu çıkarma sınıfı"""
+    
+    def __init__(self):
+        self.calibration = {
+            'x0': 50, 'x1': 750,  # Grid sınırları
+            'y0': 50, 'y1': 550,
+            'time_scale': 0.02,  # 20ms tam skala
+            'volt_scale': 1.0,   # 1V tam skala
+            'time_unit': 's',
+            'volt_unit': 'V'
+        }
+    
+    def extract_waveform(self, image_path, calibration=None):
+        """Görüntüden dalga formu çıkar.
+        
+        calibration yalnızca bu çağrı için self.calibration'ın üzerine yazılır.
+        PIL/OpenCV yoksa ImportError, dalga formu bulunamazsa ValueError fırlatır.
+        """
+        Image = lazy_import('PIL.Image')
+        ImageOps = lazy_import('PIL.ImageOps')
+        cv2 = lazy_import('cv2')
+        calib = {**self.calibration, **(calibration or {})}
+        
+        try:
+            # Görüntüyü aç
+            img = Image.open(image_path)
+            img_gray = ImageOps.grayscale(img)
+            img_array = np.array(img_gray)
+            
+            # Threshold ile waveform detection
+            _, binary = cv2.threshold(img_array, 127, 255, cv2.THRESH_BINARY)
+            
+            # Morfolojik işlemler
+            kernel = np.ones((3, 3), np.uint8)
+            binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+            
+            # Grid alanını belirle
+            x_start, x_end = calib['x0'], calib['x1']
+            y_start, y_end = calib['y0'], calib['y1']
+            
+            # Her x için y değerini bul
+            waveform_y = []
+            waveform_x = []
+            
+            grid_width = x_end - x_start
+            grid_height = y_end - y_start
+            
+            for i in range(grid_width):
+                col = x_start + i
+                col_data = binary[y_start:y_end, col]
+                
+                # En üst non-zero pixel'i bul (waveform tipik olarak grid üstünde)
+                nonzero_indices = np.where(col_data < 255)[0]
+                
+                if len(nonzero_indices) > 0:
+                    # Tipik olarak grid ortasından yukarı çizim
+                    # En yakın sinyal pixel'ini bul
+                    y_idx = y_start + (y_end - y_start) - nonzero_indices[0]
+                    waveform_y.append(y_idx)
+                    waveform_x.append(i)
+            
+            if len(waveform_x) < 10:
+                raise ValueError("Görüntüde dalga formu bulunamadı (kalibrasyon sınırlarını kontrol edin)")
+            
+            # Normalize et
+            time = np.array(waveform_x) / len(waveform_x) * calib['time_scale']
+            signal = (calib['y1'] - np.array(waveform_y)) / (calib['y1'] - calib['y0'])
+            signal = (signal - 0.5) * 2 * calib['volt_scale']
+            
+            # Interpolasyon ile düzleştir
+            interp1d = lazy_import('scipy.interpolate').interp1d
+            f = interp1d(time, signal, kind='cubic', fill_value='extrapolate')
+            time_smooth = np.linspace(time.min(), time.max(), len(time) * 2)
+            signal_smooth = f(time_smooth)
+            
+            sample_rate = len(time) / (time.max() - time.min()) if time.max() > time.min() else 10000
+            
+            return {
+                'time': time_smooth,
+                'signal': signal_smooth,
+                'sample_rate': sample_rate,
+                'calibration': calib
+            }
+            
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Görüntü işleme hatası: {e}") from e
+
+
+# Blok blok işlenen tam boy dizi hesaplarında geçici tampon boyutu (örnek)
+BLOCK_SIZE = 1 << 20
+
+
+class TimeAxis:
+    """Eşit aralıklı zaman ekseni: t[i] = t0 + i * dt.
+    
+    Dizi olarak saklanmaz; yalnızca istenen pencere (dilim) üretilir.
+    """
+    
+    __slots__ = ('t0', 'dt', 'n')
+    
+    def __init__(self, t0, dt, n):
+        self.t0 = float(t0)
+        self.dt = float(dt)
+        self.n = int(n)
+    
+    def __len__(self):
+        return self.n
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.n)
+            return self.t0 + np.arange(start, stop, step) * self.dt
+        index = int(key)
+        if index < 0:
+            index += self.n
+        if not 0 <= index < self.n:
+            raise IndexError("TimeAxis indeksi aralık dışında")
+        return self.t0 + index * self.dt
+    
+    def __array__(self, dtype=None, copy=None):
+        values = self[:]
+        return values if dtype is None else values.astype(dtype)
+    
+    def __repr__(self):
+        return f"TimeAxis(t0={self.t0:g}, dt={self.dt:g}, n={self.n})"
+    
+    def head(self, n):
+        """İlk n örneklik eksen (kopyasız)"""
+        return self if n >= self.n else TimeAxis(self.t0, self.dt, n)
+
+
+class ScaledSignal:
+    """Ham kanal verisinin ölçekli görünümü: s[i] = raw[i] * scale.
+    
+    Ölçek yalnızca okunan pencereye uygulanır; analiz ölçeği spektruma ve
+    RMS/tepe değerlere yansıtır, böylece tam boy ölçekli kopya oluşmaz.
+    """
+    
+    __slots__ = ('raw', 'scale')
+    
+    def __init__(self, raw, scale):
+        self.raw = raw
+        self.scale = float(scale)
+    
+    def __len__(self):
+        return len(self.raw)
+    
+    def __getitem__(self, key):
+        return self.raw[key] * self.scale
+    
+    def __array__(self, dtype=None, copy=None):
+        values = self.raw * self.scale
+        return values if dtype is None else values.astype(dtype)
+
+
+def signal_parts(signal):
+    """Sinyali (ham dizi, ölçek) olarak ayır"""
+    if isinstance(signal, ScaledSignal):
+        return signal.raw, signal.scale
+    return np.asarray(signal), 1.0
+
+
+def stack_rows(arrays):
+    """Eşit uzunluklu 1-B dizileri (satır x örnek) matrise diz.
+    
+    Diziler aynı C-sıralı matrisin ardışık satırlarıysa (ör. CSV'den okunan
+    kanal matrisi) kopyasız görünüm döndürülür.
+    """
+    first = arrays[0]
+    if len(arrays) == 1:
+        return first[None, :]
+    owner = first.base
+    n = len(first)
+    if isinstance(owner, np.ndarray) and owner.flags.c_contiguous and n > 0:
+        start = first.__array_interface__['data'][0]
+        row_bytes = n * first.itemsize
+        end = owner.__array_interface__['data'][0] + owner.nbytes
+        consecutive = all(
+            a.base is owner and a.dtype == first.dtype and len(a) == n and a.flags.c_contiguous
+            and a.__array_interface__['data'][0] == start + i * row_bytes
+            for i, a in enumerate(arrays))
+        if consecutive and start + len(arrays) * row_bytes <= end:
+            return np.lib.stride_tricks.as_strided(first, shape=(len(arrays), n),
+                                                   strides=(row_bytes, first.itemsize), writeable=False)
+    return np.stack(arrays)
+
+
+def combine_rows(coeffs, matrix, out=None):
+    """coeffs (m x k) @ matrix (k x n), sütun blokları halinde tek geçişte.
+    
+    Her blok atanmadan önce tamamen hesaplandığından out, matrix'in ilk m
+    satırı olabilir (m <= k); geçici diziler blok boyutunda kalır.
+    """
+    coeffs = np.asarray(coeffs)
+    n = matrix.shape[1]
+    if out is None:
+        out = np.empty((len(coeffs), n), dtype=np.result_type(coeffs, matrix))
+    step = max(1, BLOCK_SIZE // max(1, len(matrix)))
+    for i in range(0, n, step):
+        out[:, i:i + step] = coeffs @ matrix[:, i:i + step]
+    return out
+
+
+# Kanal ifadesi terimi: [işaret][katsayı[*]]CHn
+_EXPRESSION_TERM = re.compile(r'([+-]?)(?:(\d+(?:\.\d*)?|\.\d+)\*?)?(CH[1-4])')
+
+
+def parse_channel_expression(expression):
+    """'CH1-CH2-CH3', 'CH1+CH2+CH3', '0.5*CH1-CH2' gibi doğrusal kanal ifadesini
+    CHANNEL_NAMES sırasında katsayı vektörüne çevir; geçersiz ifadede ValueError"""
+    text = expression.replace('−', '-').replace(' ', '').upper()
+    if not text:
+        raise ValueError("Kanal ifadesi boş.")
+    coeffs = np.zeros(len(CHANNEL_NAMES))
+    pos = 0
+    while pos < len(text):
+        match = _EXPRESSION_TERM.match(text, pos)
+        # İlk terim dışındaki her terim + veya - ile başlamalı
+        if match is None or (pos > 0 and not match.group(1)):
+            raise ValueError(f"Geçersiz kanal ifadesi: '{expression}' (ör. CH1-CH2-CH3)")
+        sign = -1.0 if match.group(1) == '-' else 1.0
+        coeffs[CHANNEL_NAMES.index(match.group(3))] += sign * float(match.group(2) or 1)
+        pos = match.end()
+    if not np.any(coeffs):
+        raise ValueError(f"Kanal ifadesi tüm kanalları sıfırlıyor: '{expression}'")
+    return coeffs
+
+
+def format_channel_expression(coeffs):
+    """Katsayı vektörünün kanonik yazımı (sonuç anahtarı olarak kullanılır): 'CH1-CH2-CH3'"""
+    text = ''
+    for ch, c in zip(CHANNEL_NAMES, coeffs):
+        if c == 0:
+            continue
+        sign = '-' if c < 0 else ('+' if text else '')
+        text += sign + ('' if abs(c) == 1 else f'{abs(c):g}*') + ch
+    return text
+
+
+def parse_expressions(text):
+    """Virgül veya noktalı virgülle ayrılmış ifade listesini kanonik yazımlara çevir"""
+    names = []
+    for part in re.split(r'[;,]', text):
+        if part.strip():
+            name = format_channel_expression(parse_channel_expression(part))
+            if name not in names:
+                names.append(name)
+    return names
+
+
+def scaled_rms_peak(signal):
+    """ac_rms_peak, ScaledSignal ölçeği uygulanmış olarak"""
+    raw, scale = signal_parts(signal)
+    rms, peak = ac_rms_peak(raw)
+    return rms * abs(scale), peak * abs(scale)
+
+
+def ac_rms_peak(x):
+    """DC'si çıkarılmış sinyalin RMS ve tepe değeri (tam boy geçici dizi olmadan)"""
+    n = len(x)
+    if n == 0:
+        return 0.0, 0.0
+    mean = np.mean(x)
+    buf = np.empty(min(n, BLOCK_SIZE))
+    sum_squares = 0.0
+    peak = 0.0
+    for i in range(0, n, BLOCK_SIZE):
+        block = buf[:min(BLOCK_SIZE, n - i)]
+        np.subtract(x[i:i + len(block)], mean, out=block)
+        sum_squares += np.dot(block, block)
+        peak = max(peak, np.max(np.abs(block, out=block)))
+    return np.sqrt(sum_squares / n), peak
+
+
+def nearest_bins(freqs, n, sample_rate, n_bins):
+    """Frekanslara en yakın FFT bin indeksleri (fftfreq + argmin ile aynı sonuç)"""
+    df = 1.0 / (n * (1 / sample_rate))
+    freqs = np.atleast_1d(np.asarray(freqs, dtype=np.float64))
+    base = np.clip(np.rint(freqs / df).astype(np.int64), 0, n_bins - 1)
+    near = np.clip(base[:, None] + np.arange(-1, 2), 0, n_bins - 1)
+    # Eşitlikte küçük indeks seçilir
+    return near[np.arange(len(freqs)), np.argmin(np.abs(near * df - freqs[:, None]), axis=1)]
+
+
+# Harmonik durum kodları (HarmonicTable 'status' sütunu)
+STATUS_FUND, STATUS_PASS, STATUS_FAIL = 0, 1, 2
+STATUS_NAMES = np.array(['FUND', 'PASS', 'FAIL'])
+
+HARMONIC_DTYPE = np.dtype([
+    ('harmonic', np.int16),
+    ('frequency', np.float64),
+    ('amplitude', np.float64),
+    ('phase', np.float64),
+    ('limit', np.float64),
+    ('percent', np.float64),
+    ('status', np.int8),
+])
+
+
+class HarmonicTable:
+    """numpy yapılandırılmış dizi tabanlı harmonik sonuç tablosu.
+    
+    Sütun erişimi: table['amplitude'] -> dizi. Eski kodla uyum için satırlar
+    sözlük olarak da okunur: table[0]['amplitude'], for h in table: h['status'].
+    """
+    
+    __slots__ = ('rows',)
+    
+    def __init__(self, rows):
+        self.rows = rows
+    
+    @classmethod
+    def from_arrays(cls, harmonic, frequency, amplitude, phase, limit):
+        """Sütunlardan tablo oluştur; limit yüzdesi ve durum burada hesaplanır"""
+        rows = np.zeros(len(harmonic), dtype=HARMONIC_DTYPE)
+        rows['harmonic'] = harmonic
+        rows['frequency'] = frequency
+        rows['amplitude'] = amplitude
+        rows['phase'] = phase
+        rows['limit'] = limit
+        has_limit = rows['limit'] > 0
+        rows['percent'] = np.divide(rows['amplitude'], rows['limit'],
+                                    out=np.zeros(len(rows)), where=has_limit) * 100
+        rows['status'] = np.where(rows['percent'] > 100, STATUS_FAIL, STATUS_PASS)
+        rows['status'][rows['harmonic'] == 1] = STATUS_FUND
+        return cls(rows)
+    
+    @classmethod
+    def from_dicts(cls, harmonics):
+        """Sözlük listesinden (eski format, JSON) tablo oluştur"""
+        rows = np.zeros(len(harmonics), dtype=HARMONIC_DTYPE)
+        for i, h in enumerate(harmonics):
+            rows[i] = (h['harmonic'], h['frequency'], h['amplitude'], h['phase'], h['limit'],
+                       h['percent'], list(STATUS_NAMES).index(h['status']))
+        return cls(rows)
+    
+    @staticmethod
+    def stack(tables):
+        """Aynı uzunluktaki tabloları (dosya x harmonik) 2 boyutlu diziye yığ"""
+        lengths = {len(t) for t in tables}
+        if len(lengths) > 1:
+            raise ValueError(f"Harmonik sayıları farklı: {sorted(lengths)}")
+        return np.stack([t.rows for t in tables])
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    def __iter__(self):
+        for i in range(len(self.rows)):
+            yield self.row(i)
+    
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.rows[key]
+        if isinstance(key, (int, np.integer)):
+            return self.row(key)
+        return HarmonicTable(self.rows[key])
+    
+    def __repr__(self):
+        return f"HarmonicTable({len(self.rows)} harmonik, THD={self.thd():.2f}%)"
+    
+    def row(self, i):
+        """i. satırın sözlük görünümü (Python skalerleri, durum metin olarak)"""
+        h = dict(zip(HARMONIC_DTYPE.names, self.rows[i].tolist()))
+        h['status'] = str(STATUS_NAMES[h['status']])
+        return h
+    
+    def to_dicts(self):
+        return [self.row(i) for i in range(len(self.rows))]
+    
+    @property
+    def statuses(self):
+        """Durum sütunu metin olarak ('FUND'/'PASS'/'FAIL')"""
+        return STATUS_NAMES[self.rows['status']]
+    
+    def thd(self, max_order=40):
+        """THD (%): 2..max_order harmonikleri / temel"""
+        amps = self.rows['amplitude']
+        if len(amps) == 0 or amps[0] == 0:
+            return 0
+        return np.sqrt(np.sum(amps[1:max_order + 1] ** 2)) / amps[0] * 100
+    
+    def tdd(self, fundamental_rms=None, max_order=40):
+        """TDD (%): verilen akım (varsayılan temel) referanslı"""
+        amps = self.rows['amplitude']
+        if fundamental_rms is None:
+            fundamental_rms = amps[0] if len(amps) else 0
+        if fundamental_rms == 0:
+            return 0
+        return np.sqrt(np.sum(amps[1:max_order + 1] ** 2)) / fundamental_rms * 100
+    
+    def passed(self):
+        """Temel hariç hiçbir harmonik limiti aşmıyorsa True"""
+        return not np.any(self.rows['status'][1:] == STATUS_FAIL)
+    
+    def failed(self):
+        """Limiti aşan harmonikler"""
+        return HarmonicTable(self.rows[self.rows['status'] == STATUS_FAIL])
+
+
+def evaluate_result_classes(results, voltage=NOMINAL_VOLTAGE):
+    """Aynı kanalın sonuç sözlükleri (dosya listesi) için tüm sınıfların değerlendirmesi.
+    
+    Harmonik tabloları tek (dosya x harmonik) dizisine dizilir; tablo
+    genlikleri tepe değeridir, limitler RMS olduğundan √2'ye bölünür.
+    Sonuçta gerilim kanalıyla ölçülmüş güç ('power') varsa P ve λ oradan
+    alınır; yoksa nominal gerilim sinüs ve temel akımla aynı fazda kabul
+    edilir: P = V x I1_rms, λ = P / (V x I_rms) = I1_rms / I_rms.
+    'measured' hangi kayıtlarda P'nin ölçüldüğünü gösterir.
+    """
+    amplitudes = HarmonicTable.stack([res['harmonics'] for res in results])['amplitude'] / np.sqrt(2)
+    rms = np.array([res['rms'] for res in results], dtype=np.float64)
+    measured = np.array(['power' in res for res in results])
+    estimated_power = voltage * amplitudes[:, 0]
+    power = np.array([abs(res['power']['P']) if 'power' in res else p for res, p in zip(results, estimated_power)])
+    estimated_pf = np.divide(estimated_power, voltage * rms, out=np.zeros(len(rms)), where=rms > 0)
+    pf = np.array([abs(res['power']['pf']) if 'power' in res else p for res, p in zip(results, estimated_pf)])
+    evaluation = evaluate_limit_classes(amplitudes, power, amplitudes[:, 0], np.minimum(pf, 1.0))
+    evaluation['power'] = power
+    evaluation['pf'] = pf
+    evaluation['measured'] = measured
+    return evaluation
+
+
+# ===================== IEC 61000-4-7 GRUPLAMA =====================
+
+# IEC 61000-4-7 pencere çözünürlüğü: 10 (50 Hz) / 12 (60 Hz) periyot = 5 Hz
+IEC_GROUP_RESOLUTION = 5.0
+GROUP_KEYS = ('group', 'subgroup', 'interharmonic_group', 'interharmonic_subgroup')
+
+
+def band_power_sums(power, start, stop):
+    """power (satır x bin) üzerinde satır başına [start, stop) bin aralığı toplamları, tek reduceat ile.
+    
+    start/stop (satır x aralık); boş aralıklar 0 verir.
+    """
+    rows, n_bins = power.shape
+    start = np.clip(start, 0, n_bins)
+    stop = np.clip(stop, start, n_bins)
+    offset = (np.arange(rows) * n_bins)[:, None]
+    # Aralıklar [başlangıç, bitiş] çiftleri olarak sıralanır; çift konumlar aralık toplamlarıdır
+    flat = np.append(power.ravel(), 0.0)
+    idx = np.stack([start + offset, stop + offset], axis=-1).ravel()
+    sums = np.add.reduceat(flat, idx)[::2].reshape(start.shape)
+    return np.where(stop > start, sums, 0.0)
+
+
+def harmonic_groups(spectra, n, sample_rate, fundamentals, num_harmonics=40):
+    """IEC 61000-4-7 harmonik grup/alt grup ve ara harmonik grup/merkezli alt grup genlikleri.
+    
+    spectra (satır x bin) tek taraflı DC'siz FFT'dir; tüm satırlar (kanallar,
+    kayıtlar, pencereler) tek geçişte işlenir. Bin aralıkları kayıt süresine
+    ölçeklenir: grup h. harmoniğin ±f1/2 bandı (kenar binler yarım ağırlıklı),
+    alt grup ±5 Hz; h. ara harmonik h ile h+1 arasıdır, merkezli alt grubu
+    harmoniklerin ±5 Hz'ini dışarıda bırakır. Genlikler harmonik tablosuyla
+    aynı 2/n tepe ölçeğindedir. {anahtar: (satır x harmonik)} döndürür.
+    """
+    spectra = np.atleast_2d(spectra)
+    df = sample_rate / n
+    fundamentals = np.asarray(fundamentals, dtype=np.float64)[:, None]
+    orders = np.arange(1, num_harmonics + 2)
+    power = np.abs(spectra) * (2 / n)
+    np.multiply(power, power, out=power)
+    n_bins = power.shape[1]
+    
+    centers = np.rint(orders * fundamentals / df).astype(np.int64)
+    half = np.maximum(1, np.rint(fundamentals / (2 * df))).astype(np.int64)
+    width = max(1, int(round(IEC_GROUP_RESOLUTION / df)))
+    h, k = centers[:, :-1], centers[:, 1:]
+    
+    # Grup: [c-h, c+h] toplamı, kenarlar yarım ağırlıklı
+    low, high = np.clip(h - half, 0, n_bins - 1), np.clip(h + half, 0, n_bins - 1)
+    rows = np.arange(len(power))[:, None]
+    group = (band_power_sums(power, low, high + 1)
+             - 0.5 * (power[rows, low] + power[rows, high]) * (high > low))
+    subgroup = band_power_sums(power, h - width, h + width + 1)
+    inter_group = band_power_sums(power, h + 1, k)
+    inter_subgroup = band_power_sums(power, h + width + 1, k - width)
+    return {key: np.sqrt(np.maximum(values, 0.0)) for key, values in
+            zip(GROUP_KEYS, (group, subgroup, inter_group, inter_subgroup))}
+
+
+def group_thd(amplitudes, max_order=40):
+    """Grup/alt grup genliklerinden THD (%): THDG veya THDS"""
+    amplitudes = np.asarray(amplitudes)
+    if len(amplitudes) == 0 or amplitudes[0] == 0:
+        return 0.0
+    return float(np.sqrt(np.sum(amplitudes[1:max_order] ** 2)) / amplitudes[0] * 100)
+
+
+# ===================== HARMONİK GÜÇ ANALİZİ =====================
+
+def power_pairs(channels):
+    """Kaydın gerilim x akım kanal çiftleri: her akım kanalı ilk gerilim kanalıyla eşlenir"""
+    voltages = [ch for ch, res in channels.items() if res['type'] == 'Voltaj']
+    if not voltages:
+        return []
+    return [(voltages[0], ch) for ch, res in channels.items() if res['type'] == 'Akim']
+
+
+def harmonic_power(spectra, voltage_rows, current_rows, n, sample_rate, fundamentals, num_harmonics=40,
+                   voltage_rms=None, current_rms=None):
+    """Gerilim/akım spektrum satır çiftlerinden harmonik başına P, Q, S ve PF (çapraz spektrum).
+    
+    spectra kayıtların mevcut (satır x bin) DC'siz FFT matrisidir; ek FFT
+    yapılmaz. Harmonik binleri gerilimin temel frekansından alınır, tüm çiftler
+    ve harmonikler tek seferde hesaplanır: S_h = V_h I_h* / 2 (tepe fazörler).
+    Toplam P tüm binlerin çapraz spektrumundan (Parseval, = ortalama v x i),
+    S = Vrms x Irms'dir. Çift başına sözlük listesi döndürür.
+    """
+    voltage_rows = np.asarray(voltage_rows)
+    current_rows = np.asarray(current_rows)
+    fundamentals = np.asarray(fundamentals, dtype=np.float64)
+    orders = np.arange(1, num_harmonics + 1)
+    n_pos = (n - 1) // 2 + 1
+    bins = nearest_bins((orders * fundamentals[:, None]).ravel(), n, sample_rate, n_pos)
+    bins = bins.reshape(len(fundamentals), num_harmonics)
+    
+    v = spectra[voltage_rows[:, None], bins] * (2 / n)
+    i = spectra[current_rows[:, None], bins] * (2 / n)
+    complex_power = v * np.conj(i) / 2
+    
+    results = []
+    for k, (vr, cr) in enumerate(zip(voltage_rows, current_rows)):
+        vs, cs = spectra[vr], spectra[cr]
+        # Tek taraflı spektrumda 1..Nyquist binleri iki kez sayılır (çift n'de Nyquist bir kez)
+        cross = np.dot(vs.real, cs.real) + np.dot(vs.imag, cs.imag)
+        if n % 2 == 0:
+            cross -= (vs[-1] * np.conj(cs[-1])).real / 2
+        total_p = 2 * cross / n ** 2
+        
+        v_rms = voltage_rms[k] if voltage_rms is not None else np.sqrt(2 * np.sum(np.abs(vs) ** 2)) / n
+        i_rms = current_rms[k] if current_rms is not None else np.sqrt(2 * np.sum(np.abs(cs) ** 2)) / n
+        apparent = v_rms * i_rms
+        p, q = complex_power[k].real, complex_power[k].imag
+        s = np.abs(complex_power[k])
+        results.append({
+            'harmonic': orders,
+            'frequency': orders * fundamentals[k],
+            'p': p,
+            'q': q,
+            's': s,
+            'phase': np.angle(complex_power[k], deg=True),
+            'P': float(total_p),
+            'Q': float(np.sum(q)),
+            'S': float(apparent),
+            'D': float(np.sqrt(max(0.0, apparent ** 2 - total_p ** 2 - np.sum(q) ** 2))),
+            'pf': float(total_p / apparent) if apparent > 0 else 0.0,
+            'dpf': float(p[0] / s[0]) if s[0] > 0 else 0.0
+        })
+    return results
+
+
+class HarmonicAnalyzer:
+    """Profesyonel Harmonik Analiz Sınıfı - Labaratuvar Cihazı Uyumlu"""
+    
+    def __init__(self):
+        self.iec_limits = IEC_CLASS_A_LIMITS
+    
+    def calculate_all_metrics(self, signal, sample_rate, fundamental_freq=None, num_harmonics=40):
+        """Tüm metrikleri hesapla - harmonik_simple.py ve iec_harmonic_analyzer.py ile uyumlu"""
+        rms, ipk = scaled_rms_peak(signal)
+        spectra = self.compute_spectra([signal])
+        fundamentals = None if fundamental_freq is None else [fundamental_freq]
+        return self.metrics_from_spectra(spectra, len(signal), sample_rate, [rms], [ipk],
+                                         num_harmonics, fundamentals)[0]
+    
+    def compute_spectrum(self, signal):
+        """DC'si çıkarılmış sinyalin tek taraflı FFT'si (ScaledSignal ölçeği spektruma uygulanır)"""
+        return self.compute_spectra([signal])[0]
+    
+    def compute_spectra(self, signals, workers=None):
+        """Eşit uzunluklu sinyallerin DC'si çıkarılmış FFT'leri (satır x bin), tek 2-B rfft ile.
+        
+        DC offset kopya yerine 0. bin sıfırlanarak kaldırılır; workers scipy.fft
+        iş parçacığı sayısıdır.
+        """
+        parts = [signal_parts(signal) for signal in signals]
+        spectra = rfft(stack_rows([raw for raw, _ in parts]), axis=-1, workers=workers)
+        scales = np.array([scale for _, scale in parts])
+        if np.any(scales != 1.0):
+            spectra *= scales[:, None]
+        spectra[:, 0] = 0
+        return spectra
+    
+    def find_fundamental(self, signal, sample_rate, spectrum=None):
+        """Temel frekansı bul - harmonik_simple.py ile aynı"""
+        if spectrum is None:
+            spectrum = rfft(np.asarray(signal))
+        return self.find_fundamentals(spectrum[None, :], len(signal), sample_rate)[0]
+    
+    def find_fundamentals(self, spectra, n, sample_rate):
+        """Her spektrum satırı için 45-65 Hz arasındaki en büyük bin, Quinn enterpolasyonuyla bin altı hassasiyette"""
+        df = 1.0 / (n * (1 / sample_rate))
+        
+        # 45-65 Hz arası ara (yalnızca bu aralıktaki binler)
+        k = np.arange(max(0, int(45 / df) - 1), min(n // 2, int(65 / df) + 2))
+        xf = k * df
+        idx = k[(xf >= 45) & (xf <= 65)]
+        
+        if len(idx) > 0:
+            peaks = idx[np.argmax(np.abs(spectra[:, idx]), axis=1)]
+            return (peaks + self.interpolate_peaks(spectra, peaks)) * df
+        return np.full(len(spectra), 50.0)
+    
+    @staticmethod
+    def interpolate_peaks(spectra, peaks):
+        """Quinn'in ikinci kestiricisi: tepe binlerinin kesirli kayması (-0.5..0.5), satır başına.
+        
+        Dikdörtgen pencereli spektrumda komşu binlerin oranından hesaplanır;
+        kenardaki veya sıfır tepeli satırlar için 0.
+        """
+        rows = np.arange(len(spectra))
+        inner = (peaks > 0) & (peaks < spectra.shape[1] - 1)
+        k = np.where(inner, peaks, 1)
+        center = spectra[rows, k]
+        valid = inner & (center != 0)
+        center = np.where(valid, center, 1)
+        
+        def tau(x):
+            return (np.log(3 * x ** 2 + 6 * x + 1) / 4
+                    - np.sqrt(6) / 24 * np.log((x + 1 - np.sqrt(2 / 3)) / (x + 1 + np.sqrt(2 / 3))))
+        
+        alpha_minus = (spectra[rows, k - 1] / center).real
+        alpha_plus = (spectra[rows, k + 1] / center).real
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d_minus = alpha_minus / (1 - alpha_minus)
+            d_plus = -alpha_plus / (1 - alpha_plus)
+            delta = (d_plus + d_minus) / 2 + tau(d_plus ** 2) - tau(d_minus ** 2)
+        return np.where(valid & np.isfinite(delta), np.clip(delta, -0.5, 0.5), 0.0)
+    
+    def calculate_harmonics_standard(self, signal, sample_rate, fundamental, num_harmonics=40, spectrum=None):
+        """Standart harmonik hesaplama - iec_harmonic_analyzer.py ile aynı"""
+        # Tam FFT - pencereleme YOK (lab cihazları gibi)
+        if spectrum is None:
+            spectrum = rfft(np.asarray(signal))
+        return self.extract_harmonics(spectrum[None, :], len(signal), sample_rate,
+                                      [fundamental], num_harmonics)[0]
+    
+    def extract_harmonics(self, spectra, n, sample_rate, fundamentals, num_harmonics=40):
+        """Tüm satırlar ve harmonikler için tek seferde harmonik tabloları"""
+        rows = len(spectra)
+        # Pozitif frekans ekseni fftfreq ile aynı: k * df, k = 0..n_pos-1
+        n_pos = (n - 1) // 2 + 1
+        
+        orders = np.arange(1, num_harmonics + 1)
+        target_freq = orders * np.asarray(fundamentals, dtype=np.float64)[:, None]
+        
+        # Hedef frekansa en yakın bin
+        idx = nearest_bins(target_freq.ravel(), n, sample_rate, n_pos).reshape(rows, num_harmonics)
+        
+        # ±3 bin lokal arama (harmonik_simple.py ile aynı)
+        window = np.clip(idx[:, :, None] + np.arange(-3, 4), 0, n_pos - 1)
+        # Genlik hesaplama: 2/n ölçekleme (tepe genlik için)
+        window_amps = np.abs(spectra[np.arange(rows)[:, None, None], window]) * 2 / n
+        pick = np.argmax(window_amps, axis=2)[:, :, None]
+        amplitude = np.take_along_axis(window_amps, pick, axis=2)[:, :, 0]
+        local_max_idx = np.take_along_axis(window, pick, axis=2)[:, :, 0]
+        
+        phase = np.angle(spectra[np.arange(rows)[:, None], local_max_idx]) * 180 / np.pi
+        
+        # Limit kontrolü
+        limit = [self.iec_limits.get(h, 0) if h > 1 else 0 for h in orders]
+        
+        return [HarmonicTable.from_arrays(orders, target_freq[i], amplitude[i], phase[i], limit)
+                for i in range(rows)]
+    
+    def metrics_from_spectra(self, spectra, n, sample_rate, rms, ipk, num_harmonics=40, fundamentals=None):
+        """Spektrum satırlarından metrik sözlükleri (rms/ipk satır başına, DC'siz)"""
+        if fundamentals is None:
+            fundamentals = self.find_fundamentals(spectra, n, sample_rate)
+        tables = self.extract_harmonics(spectra, n, sample_rate, fundamentals, num_harmonics)
+        groups = harmonic_groups(spectra, n, sample_rate, fundamentals, num_harmonics)
+        
+        # Güç faktörü için temel bin genlikleri (calculate_power_factor ile aynı)
+        fund_bins = nearest_bins(fundamentals, n, sample_rate, (n - 1) // 2 + 1)
+        fund_amps = np.abs(spectra[np.arange(len(spectra)), fund_bins]) * 2 / n
+        
+        metrics = []
+        for i, harmonics in enumerate(tables):
+            cf = ipk[i] / rms[i] if rms[i] > 0 else 0
+            metrics.append({
+                'fundamental': fundamentals[i],
+                'harmonics': harmonics,
+                'thd': self.calculate_thd(harmonics),
+                'tdd': self.calculate_tdd(harmonics),
+                'rms': rms[i],
+                'ipk': ipk[i],
+                'cf': cf,
+                'pf': min(1.0, fund_amps[i] / (rms[i] + 0.0001)),
+                'ff': cf,
+                'passed': self.check_iec_compliance(harmonics),
+                'failed': harmonics.failed(),
+                'groups': {key: values[i] for key, values in groups.items()}
+            })
+        return metrics
+    
+    def calculate_thd(self, harmonics):
+        """THD hesapla - harmonik_simple.py ile aynı"""
+        return harmonics.thd()
+    
+    def calculate_tdd(self, harmonics, fundamental_rms=None):
+        """TDD hesapla"""
+        return harmonics.tdd(fundamental_rms)
+    
+    def calculate_power_factor(self, signal, sample_rate, fundamental, spectrum=None, rms=None):
+        """Güç faktörü hesapla"""
+        n = len(signal)
+        if spectrum is None:
+            spectrum = rfft(np.asarray(signal))
+        if rms is None:
+            raw, scale = signal_parts(signal)
+            rms = np.sqrt(np.dot(raw, raw) / n) * abs(scale)
+        
+        # Temel frekans indeksini bul
+        idx = nearest_bins(fundamental, n, sample_rate, (n - 1) // 2 + 1)[0]
+        fundamental_amplitude = np.abs(spectrum[idx]) * 2 / n
+        # Basit PF hesabı
+        return min(1.0, fundamental_amplitude / (rms + 0.0001))
+    
+    def check_iec_compliance(self, harmonics):
+        """IEC uyumluluğunu kontrol et"""
+        return harmonics.passed()  # Temel hariç
+
+
+def read_rigol_header(filepath):
+    """Rigol CSV başlığını çöz: kanal sütunları, zaman ekseni ve veri bölümünün bayt konumu.
+    
+    Format hatalarında ValueError fırlatır.
+    """
+    with open(filepath, 'rb') as f:
+        # Dosya formatını kontrol et. Dalga formu CSV'leri "Model:" ile başlamaz.
+        header1_str = f.readline().decode('utf-8', 'replace').strip()
+        if header1_str.startswith("Model:"):
+            raise ValueError("Bu bir ayar dosyası gibi görünüyor, dalga formu verisi değil. Lütfen osiloskoptan dalga formunu CSV olarak kaydedin.")
+        header2_str = f.readline().decode('utf-8', 'replace').strip()
+        data_offset = f.tell()
+        first_row = f.readline().decode('utf-8', 'replace').split(',')
+
+        header1 = header1_str.split(',')
+        header2 = header2_str.split(',')
+    
+    # Kanal sütunları başlıktan bulunur (CH1-CH4, herhangi bir alt küme)
+    columns = [(i, name) for i, name in enumerate(header1) if name in CHANNEL_NAMES]
+    channel_names = [name for _, name in columns]
+    if not columns:
+        raise ValueError("CSV dosyasında CH1-CH4 kanalı bulunamadı.")
+    
+    try:
+        # Start/Increment değerleri kanal sütunlarından hemen sonra gelir
+        start_col = header1.index('Start') if 'Start' in header1 else columns[-1][0] + 1
+        start_time = float(header2[start_col])
+        increment = float(header2[start_col + 1])
+    except IndexError as ie:
+        raise ValueError(f"CSV başlık formatı hatalı (IndexError). Beklenen Rigol dalga formu formatında değil. Header2: '{header2_str}'")
+    
+    # Zaman ekseni dizi olarak oluşturulmaz: t = start + (index0 + i) * increment
+    try:
+        first_index = float(first_row[0])
+    except ValueError:
+        first_index = 0.0
+    return {
+        'usecols': [i for i, _ in columns],
+        'channel_names': channel_names,
+        't0': start_time + first_index * increment,
+        'increment': increment,
+        'data_offset': data_offset
+    }
+
+
+def load_rigol_csv(filepath, workers=None):
+    """Rigol dalga formu CSV dosyasını oku - Tk bağımsız.
+    
+    Analizörün veri sözlüğünü döndürür; format hatalarında ValueError fırlatır.
+    workers > 1 ve dosya PARALLEL_CSV_MIN_BYTES'tan büyükse veri bölümü
+    read_csv_parallel ile o kadar süreçte okunur.
+    """
+    header = read_rigol_header(filepath)
+    channel_names = header['channel_names']
+    increment = header['increment']
+    
+    if workers and workers > 1 and os.path.getsize(filepath) >= PARALLEL_CSV_MIN_BYTES:
+        matrix = read_csv_parallel(filepath, header['data_offset'], header['usecols'], workers)
+    else:
+        pd = lazy_import('pandas')
+        df = pd.read_csv(filepath, skiprows=2, header=None, usecols=header['usecols'],
+                         names=[name.lower() for name in channel_names])
+        # (kanal x örnek) matris: kanallar tek 2-B FFT'ye ve ifade motoruna kopyasız satır olarak girer
+        matrix = np.ascontiguousarray(df[[name.lower() for name in channel_names]].to_numpy(dtype=np.float64).T)
+    rows = dict(zip(channel_names, matrix))
+    
+    time = TimeAxis(header['t0'], increment, matrix.shape[1])
+    sample_rate = 1 / increment
+    
+    data = {
+        'time': time,
+        'dt': increment,
+        'sample_rate': sample_rate,
+        'has_ch2': 'CH2' in rows,
+        'channels': matrix,
+        'channel_names': channel_names,
+        'filepath': filepath,
+        'source': 'csv'
+    }
+    for ch in CHANNEL_NAMES:
+        data[ch.lower()] = rows.get(ch)
+    return data
+
+
+# ===================== PARALEL CSV OKUMA =====================
+# Veri bölümü satır sınırlarında bayt aralıklarına bölünür; her aralık ayrı
+# süreçte ayrıştırılıp paylaşılan bellekteki (kanal x örnek) matrise kendi
+# satır ofsetinden itibaren yazılır. Örnek indeksi aralık ofsetlerinden
+# gelir; CSV'nin indeks sütunu okunmaz.
+
+# Bu boyutun altındaki dosyalarda süreç başlatma maliyeti kazançtan büyüktür
+PARALLEL_CSV_MIN_BYTES = 32 << 20
+
+# Aralık boyutu: aynı anda ayrıştırılan bloklar (bayt + DataFrame) işçi
+# başına bununla sınırlı kalır; ek bellek dosya boyutuyla büyümez
+CSV_RANGE_BYTES = 16 << 20
+
+# Satır sayımında okunan blok
+CSV_COUNT_BLOCK = 1 << 20
+
+_CSV_BLANK = b'\r\n\t '
+
+
+def csv_line_ranges(filepath, start, parts):
+    """[start, dosya sonu) aralığını satır başlarında bölünmüş en fazla parts bayt aralığına ayır"""
+    size = os.path.getsize(filepath)
+    bounds = [start]
+    with open(filepath, 'rb') as f:
+        for k in range(1, parts):
+            # pos - 1'den itibaren satır sonuna git: pos zaten satır başıysa yerinde kalır
+            f.seek(max(start, start + (size - start) * k // parts - 1))
+            f.readline()
+            pos = f.tell()
+            if bounds[-1] < pos < size:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _read_range(filepath, start, stop):
+    with open(filepath, 'rb') as f:
+        f.seek(start)
+        # Sondaki boş satırlar read_csv tarafından atlanır, sayıma da girmez
+        return f.read(stop - start).rstrip(_CSV_BLANK)
+
+
+def _strip_end(f, start, stop):
+    """Aralığın sondaki boşluklarını at (_read_range'deki rstrip ile aynı) -> yeni bitiş"""
+    while stop > start:
+        pos = max(start, stop - 4096)
+        f.seek(pos)
+        tail = f.read(stop - pos).rstrip(_CSV_BLANK)
+        if tail:
+            return pos + len(tail)
+        stop = pos
+    return start
+
+
+def count_csv_rows(filepath, start, stop):
+    """Bayt aralığındaki veri satırı sayısı (aralık belleğe alınmadan, blok blok)"""
+    with open(filepath, 'rb') as f:
+        stop = _strip_end(f, start, stop)
+        if stop <= start:
+            return 0
+        f.seek(start)
+        count, remaining = 0, stop - start
+        while remaining:
+            block = f.read(min(CSV_COUNT_BLOCK, remaining))
+            count += block.count(b'\n')
+            remaining -= len(block)
+    # Son satırın satır sonu yoktur (boşluklar atıldı)
+    return count + 1
+
+
+def parse_csv_range(filepath, start, stop, usecols, shm_name, shape, offset, count):
+    """İşçi süreçte çalışır: aralığı ayrıştır, paylaşılan matrisin [:, offset:offset+count] dilimine yaz"""
+    pd = lazy_import('pandas')
+    df = pd.read_csv(io.BytesIO(_read_range(filepath, start, stop)), header=None,
+                     usecols=usecols, dtype=np.float64)
+    if len(df) != count:
+        raise ValueError(f"CSV aralığı {start}-{stop}: {count} satır bekleniyordu, {len(df)} okundu "
+                         f"(veri bölümünde boş satır olabilir)")
+    # spawn işçileri ana sürecin resource_tracker'ını paylaşır; bloğu ana süreç siler
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        matrix[:, offset:offset + count] = df.to_numpy().T
+        del matrix
+    finally:
+        shm.close()
+    return count
+
+
+class SharedMatrix:
+    """Paylaşılan bellek bloğunu float64 matris olarak sunar (np.asarray ile).
+    
+    Dizi bu nesneyi taban (base) olarak tutar; blok, dizi ve görünümleri
+    yaşadıkça açık kalır, son görünüm silinince kapanır. Adres
+    __array_interface__ ile verildiğinden shm.buf dışa aktarılmış kalmaz ve
+    kapanış güvenlidir.
+    """
+    
+    def __init__(self, shm, shape):
+        self.shm = shm
+        probe = np.frombuffer(shm.buf, dtype=np.uint8)
+        address = probe.ctypes.data
+        del probe
+        self.__array_interface__ = {'version': 3, 'shape': tuple(shape), 'typestr': '<f8',
+                                    'data': (address, False)}
+
+
+def read_csv_parallel(filepath, start, usecols, workers):
+    """CSV veri bölümünün usecols sütunlarını workers süreçte oku -> (sütun x satır) float64 matrisi.
+    
+    İki geçiş: önce aralıkların satır sayıları sayılır ve ofsetler bulunur,
+    ardından aralıklar paylaşılan bloğa doğrudan ayrıştırılır. Ofsetler
+    ayrıştırmadan önce bilindiği için ayrıştırılan aralıklar işçide
+    biriktirilmez; ek bellek işçi başına bir aralıkla sınırlıdır. Sayım
+    yalnızca satır sonu arar (4 Mpt, 135 MB dosyada 130 ms; ayrıştırma
+    1400 ms). Dönen matris paylaşılan bloğun kendisidir: kopyalanmaz, blok
+    adı işçiler bitince silinir, bellek matrisle birlikte serbest kalır.
+    """
+    size = os.path.getsize(filepath)
+    ranges = csv_line_ranges(filepath, start, max(workers, -(-(size - start) // CSV_RANGE_BYTES)))
+    executor = concurrent.futures.ProcessPoolExecutor(
+        min(workers, len(ranges)), mp_context=multiprocessing.get_context('spawn'))
+    with executor:
+        counts = list(executor.map(count_csv_rows, [filepath] * len(ranges), *zip(*ranges)))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        shape = (len(usecols), int(offsets[-1]))
+        shm = shared_memory.SharedMemory(create=True, size=max(1, shape[0] * shape[1] * 8))
+        try:
+            jobs = [executor.submit(parse_csv_range, filepath, a, b, usecols, shm.name, shape,
+                                    int(offset), count)
+                    for (a, b), offset, count in zip(ranges, offsets, counts) if count]
+            for job in jobs:
+                job.result()
+            matrix = np.asarray(SharedMatrix(shm, shape))
+        except BaseException:
+            shm.close()
+            raise
+        finally:
+            # Ad silinir; eşleme matris yaşadıkça geçerli kalır
+            shm.unlink()
+    return matrix
+
+
+def filter_channel_signal(signal, sample_rate, filter_type, cutoff=2500):
+    """Kanal filtresi uygula -> (sinyal, filtre aktif mi, açıklama)"""
+    scipy_signal = lazy_import('scipy.signal')
+    filter_info = f" | {filter_type}"
+    
+    if filter_type == 'lowpass':
+        nyq = sample_rate / 2
+        cutoff = min(cutoff, nyq * 0.9)
+        b, a = scipy_signal.butter(4, cutoff / nyq, btype='low')
+        filter_info += f" {cutoff:.0f}Hz"
+        return scipy_signal.filtfilt(b, a, signal), True, filter_info
+    
+    elif filter_type == 'savgol':
+        window = 51  # Must be an odd number
+        filter_info += f" w={window}"
+        return scipy_signal.savgol_filter(signal, window, 3), True, filter_info
+    
+    elif filter_type == 'moving_avg':
+        window = 51
+        kernel = np.ones(window) / window
+        filter_info += f" w={window}"
+        return np.convolve(signal, kernel, mode='same'), True, filter_info
+    
+    return signal, False, ""
+
+
+def filter_diff_signal(signal, sample_rate, filter_type, cutoff=500):
+    """CH1-CH2 fark sinyali filtresi -> (sinyal, etiket)"""
+    scipy_signal = lazy_import('scipy.signal')
+    filter_label = f" [{filter_type}"
+
+    if filter_type == 'lowpass':
+        nyq = sample_rate / 2
+        cutoff = min(cutoff, nyq * 0.9)
+        b, a = scipy_signal.butter(4, cutoff / nyq, btype='low')
+        filter_label += f" {cutoff:.0f}Hz]"
+        return scipy_signal.filtfilt(b, a, signal), filter_label
+
+    elif filter_type == 'savgol':
+        window = int(cutoff) if cutoff > 10 else 51
+        if window % 2 == 0:
+            window += 1  # Must be odd
+        window = min(window, len(signal) - 1)
+        if window < 5:
+            window = 5
+        filter_label += f" w={window}]"
+        return scipy_signal.savgol_filter(signal, window, 3), filter_label
+
+    elif filter_type == 'moving_avg':
+        window = int(cutoff) if cutoff > 1 else 51
+        window = min(window, len(signal) - 1)
+        kernel = np.ones(window) / window
+        filter_label += f" w={window}]"
+        return np.convolve(signal, kernel, mode='same'), filter_label
+
+    return signal, ""
+
+
+# Toplu 2-B FFT'de bir seferde işlenecek en fazla örnek sayısı (satır x örnek)
+BATCH_FFT_SAMPLES = 1 << 24
+
+
+def prepare_channels(data, settings, executor=None):
+    """Kaydın etkin kanallarını ölçeklenmiş/filtrelenmiş sinyalleriyle hazırla (metrikler hariç).
+    
+    executor verilirse kanal filtreleri (filtfilt/savgol GIL'i bırakır) havuzda
+    eşzamanlı çalışır; dönüşten önce hepsi beklenir.
+    """
+    settings = AnalysisSettings.coerce(settings)
+    channels = {}
+    time = data['time']
+    sample_rate = data['sample_rate']
+    
+    for channel in CHANNEL_NAMES:
+        ch_settings = settings.channel(channel)
+        raw_data = data.get(channel.lower())
+        if ch_settings is None or not ch_settings.enabled or raw_data is None:
+            continue
+        
+        ratio = ch_settings.ratio
+        ch_type = ch_settings.type
+        
+        # Ölçekleme kopya oluşturmaz; analiz ölçeği spektruma uygular
+        if ch_type == 'Akim':
+            signal = ScaledSignal(raw_data, ratio)
+            unit = 'A'
+        else:
+            signal = ScaledSignal(raw_data, 10)
+            unit = 'V'
+        
+        if ch_settings.filter_enabled:
+            args = (np.asarray(signal), sample_rate, ch_settings.filter_type, ch_settings.filter_cutoff)
+            filtered = executor.submit(filter_channel_signal, *args) if executor else filter_channel_signal(*args)
+        else:
+            filtered = (signal, False, "")
+        
+        channels[channel] = {
+            'channel': channel,
+            'type': ch_type,
+            'unit': unit,
+            'ratio': ratio,
+            'signal_raw': signal,
+            'sample_rate': sample_rate,
+            'filtered': filtered
+        }
+    
+    for res in channels.values():
+        filtered = res.pop('filtered')
+        signal_filtered, res['filter_active'], res['filter_info'] = (
+            filtered.result() if isinstance(filtered, concurrent.futures.Future) else filtered)
+        res['time'] = time.head(len(signal_filtered))
+        res['signal'] = signal_filtered
+    return channels
+
+
+def channel_expressions(channels, settings):
+    """Kaydın türetilmiş sinyal tanımları: [(anahtar, ad, katsayılar)].
+    
+    Katsayılar channels sırasındadır. DIFF (CH1-CH2) iki kanal da varsa ilk
+    sıradadır; settings.expressions ifadelerinden kullandığı kanallardan
+    biri etkin olmayanlar atlanır.
+    """
+    names = list(channels)
+    expressions = []
+    if 'CH1' in channels and 'CH2' in channels:
+        expressions.append(('DIFF', parse_channel_expression('CH1-CH2')))
+    for expression in AnalysisSettings.coerce(settings).expressions:
+        coeffs = parse_channel_expression(expression)
+        name = format_channel_expression(coeffs)
+        if any(format_channel_expression(c) == name for _, c in expressions):
+            continue
+        if all(ch in channels for ch, c in zip(CHANNEL_NAMES, coeffs) if c):
+            expressions.append((name, coeffs))
+    return [(key, format_channel_expression(coeffs),
+             np.array([coeffs[CHANNEL_NAMES.index(ch)] for ch in names]))
+            for key, coeffs in expressions]
+
+
+def prepare_expressions(channels, settings):
+    """DIFF ve kanal ifadesi sinyallerini kanal matrisi üzerinde tek geçişte hesapla (metrikler hariç).
+    
+    (türetilmiş sonuçlar, katsayı matrisi) döndürür; matris satırları sonuç
+    sırasında, sütunları channels sırasındadır.
+    """
+    expressions = channel_expressions(channels, settings)
+    if not expressions:
+        return {}, None
+    
+    names = list(channels)
+    parts = [signal_parts(channels[ch]['signal']) for ch in names]
+    coeffs = np.array([c for _, _, c in expressions])
+    # Kanal ölçekleri katsayılara katılır; CSV kanalları kopyasız matris satırlarıdır
+    scales = np.array([scale for _, scale in parts])
+    signals = combine_rows(coeffs * scales, stack_rows([raw for raw, _ in parts]))
+    
+    first = channels[names[0]]
+    sample_rate = first['sample_rate']
+    diff_settings = AnalysisSettings.coerce(settings).diff_filter
+    derived = {}
+    for (key, name, c), signal in zip(expressions, signals):
+        # Birim belirleme (kullanılan kanallar aynı türse o birim, değilse genel)
+        used = [channels[ch] for ch, ci in zip(names, c) if ci]
+        if len({res['type'] for res in used}) == 1:
+            unit, sig_type = used[0]['unit'], used[0]['type']
+        else:
+            unit, sig_type = 'V/A', 'Karma'
+        
+        # Fark sinyaline filtre uygula (opsiyonel, yalnızca DIFF)
+        filter_active = key == 'DIFF' and diff_settings.enabled
+        filter_info = ''
+        if filter_active:
+            signal, filter_info = filter_diff_signal(
+                signal, sample_rate, diff_settings.type, diff_settings.cutoff)
+        
+        derived[key] = {
+            'channel': name,
+            'type': sig_type,
+            'unit': unit,
+            'ratio': 1.0,
+            'time': first['time'].head(len(signal)),
+            'signal': signal,
+            'signal_raw': signal,
+            'sample_rate': sample_rate,
+            'filter_active': filter_active,
+            'filter_info': filter_info
+        }
+    return derived, coeffs
+
+
+def analyze_capture(data, settings, analyzer=None, workers=None, executor=None):
+    """Yüklü veriyi (data sözlüğü) verilen ayarlarla analiz et - Tk bağımsız.
+    
+    settings değişmez AnalysisSettings (veya eşdeğer düz sözlük) nesnesidir;
+    bu sayede fonksiyon iş parçacığı veya ayrı süreç içinde çalıştırılabilir.
+    """
+    return analyze_captures([data], settings, analyzer, workers, executor)[0]
+
+
+def analyze_captures(captures, settings, analyzer=None, workers=None, executor=None):
+    """Kayıtları toplu analiz et: aynı uzunluk ve örnekleme hızındaki tüm kanal
+    sinyalleri (CH1-CH4 ve aynı kurulumdan gelen dosyalar) tek bir 2-B rfft ile,
+    harmonikler tüm satırlar için tek seferde çıkarılır.
+    
+    Filtresiz DIFF ve kanal ifadesi spektrumları doğrusallıktan kanal
+    spektrumlarının aynı katsayılı toplamı olarak alınır.
+    settings.fold_cycles > 0 ise metrikler, kanalların o kadar periyotluk
+    senkron ortalamasından (fold_channels) hesaplanır; sonuçtaki dalga formları
+    özgün kayıttır.
+    workers: scipy.fft iş parçacığı sayısı. executor (iş parçacığı havuzu) verilirse
+    kanal filtreleri, RMS/tepe hesapları ve filtreli türetilmiş sinyallerin
+    metrikleri kanal başına eşzamanlı çalışır; DIFF ve ifadeler kanallar
+    tamamlandıktan sonra hesaplanır.
+    """
+    settings = AnalysisSettings.coerce(settings)
+    analyzer = analyzer or HarmonicAnalyzer()
+    num_harm = settings.num_harmonics
+    run = executor.map if executor else map
+    prepared = [prepare_channels(data, settings, executor) for data in captures]
+    results = [{} for _ in captures]
+    fold = settings.fold_cycles
+    if fold:
+        originals = prepared
+        prepared = [fold_channels(channels, fold, analyzer) for channels in prepared]
+    
+    # Kayıtlar (uzunluk, örnekleme hızı) gruplarında, bellek sınırlı parçalar halinde işlenir;
+    # bir kaydın kanalları aynı uzunluktadır ve aynı parçada kalır
+    groups = defaultdict(list)
+    for i, channels in enumerate(prepared):
+        if channels:
+            first = next(iter(channels.values()))
+            groups[(len(first['signal']), first['sample_rate'])].append(i)
+    
+    for (n, sample_rate), members in groups.items():
+        width = max(len(prepared[i]) for i in members)
+        per_chunk = max(1, BATCH_FFT_SAMPLES // (width * n))
+        for start in range(0, len(members), per_chunk):
+            chunk = members[start:start + per_chunk]
+            rows = [(i, ch) for i in chunk for ch in prepared[i]]
+            signals = [prepared[i][ch]['signal'] for i, ch in rows]
+            
+            spectra = analyzer.compute_spectra(signals, workers)
+            rms, ipk = zip(*run(scaled_rms_peak, signals))
+            metrics = analyzer.metrics_from_spectra(spectra, n, sample_rate, rms, ipk, num_harm)
+            # Genlik spektrumu (2/n tepe) sonuçta saklanır; ifade spektrumları kanal satırlarının üzerine yazılmadan önce
+            amplitudes = np.abs(spectra) * (2 / n)
+            for r, ((i, ch), row_metrics) in enumerate(zip(rows, metrics)):
+                results[i][ch] = {**prepared[i][ch], **row_metrics, 'spectrum': amplitudes[r]}
+            
+            # Gerilim x akım harmonik güçleri: kanal spektrumları ifadelerle ezilmeden, tüm çiftler birlikte
+            row_of = {key: r for r, key in enumerate(rows)}
+            pairs = [(i, row_of[(i, v)], row_of[(i, c)]) for i in chunk for v, c in power_pairs(prepared[i])]
+            if pairs:
+                _, v_rows, c_rows = zip(*pairs)
+                powers = harmonic_power(spectra, v_rows, c_rows, n, sample_rate,
+                                        [metrics[r]['fundamental'] for r in v_rows], num_harm,
+                                        [rms[r] for r in v_rows], [rms[r] for r in c_rows])
+                for (i, vr, cr), power in zip(pairs, powers):
+                    results[i][rows[cr][1]]['power'] = {'voltage': rows[vr][1], **power}
+            
+            # TÜRETİLMİŞ SİNYALLER (DIFF ve kanal ifadeleri)
+            spectral, filtered, blocks = [], [], []
+            for i in chunk:
+                derived, coeffs = prepare_expressions(prepared[i], settings)
+                keys = [key for key in derived if not derived[key]['filter_active']]
+                filtered += [(i, key, derived[key]) for key in derived if key not in keys]
+                if not keys:
+                    continue
+                # Kanal metrikleri çıkarıldı; satır sayısı yetiyorsa ifade spektrumları
+                # kaydın kanal satırlarına yerinde yazılır
+                r0 = row_of[(i, next(iter(prepared[i])))]
+                channel_spectra = spectra[r0:r0 + len(prepared[i])]
+                sel = [r for r, key in enumerate(derived) if key in keys]
+                out = channel_spectra[:len(sel)] if len(sel) <= len(channel_spectra) else None
+                blocks.append(combine_rows(coeffs[sel], channel_spectra, out))
+                spectral += [(i, key, derived[key]) for key in keys]
+            
+            if spectral:
+                derived_spectra = blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+                rms, ipk = zip(*run(ac_rms_peak, [res['signal'] for _, _, res in spectral]))
+                derived_metrics = analyzer.metrics_from_spectra(derived_spectra, n, sample_rate, rms, ipk, num_harm)
+                amplitudes = np.abs(derived_spectra) * (2 / n)
+                for r, ((i, key, res), row_metrics) in enumerate(zip(spectral, derived_metrics)):
+                    results[i][key] = {**res, **row_metrics, 'spectrum': amplitudes[r]}
+            filtered_metrics = run(lambda res: analyzer.calculate_all_metrics(
+                res['signal'], sample_rate, num_harmonics=num_harm), [res for _, _, res in filtered])
+            for (i, key, res), row_metrics in zip(filtered, filtered_metrics):
+                results[i][key] = {**res, **row_metrics}
+    
+    # Katlanmış kayıtlarda gösterim için özgün dalga formları geri konur
+    if fold:
+        for i, channels in enumerate(originals):
+            if prepared[i] is channels:
+                continue
+            derived, _ = prepare_expressions(channels, settings)
+            for key, res in {**channels, **derived}.items():
+                if key in results[i]:
+                    results[i][key].update({k: res[k] for k in ('time', 'signal', 'signal_raw', 'sample_rate')})
+                    # Katlanmış sinyalin spektrumu özgün dalga formuna ait değil
+                    results[i][key].pop('spectrum', None)
+                    results[i][key]['fold'] = next(iter(prepared[i].values()))['fold']
+    return results
+
+
+def capture_signal(data, settings, channel):
+    """Kaydın tek bir kanal, DIFF veya kanal ifadesi sinyali (gözlem süresi gibi tek kanallı işler için)"""
+    settings = AnalysisSettings.coerce(settings)
+    channels = prepare_channels(data, settings)
+    if channel in channels:
+        return channels[channel]['signal']
+    expressions = () if channel == 'DIFF' else (channel,)
+    derived, _ = prepare_expressions(channels, settings._replace(expressions=expressions))
+    key = channel if channel == 'DIFF' else format_channel_expression(parse_channel_expression(channel))
+    if key not in derived:
+        raise ValueError(f"{channel} bu kayıtta hesaplanamıyor (kanal yok veya etkin değil).")
+    return derived[key]['signal']
+
+
+# ===================== ZOOM FFT (CHIRP-Z) =====================
+
+def zoom_spectrum(signal, sample_rate, f_start, f_stop, points=1024):
+    """[f_start, f_stop] bandında chirp-z (zoom) dönüşümüyle yüksek çözünürlüklü spektrum.
+    
+    Tam boy FFT'yi sıfır dolgusuyla uzatmadan yalnızca banttaki points
+    frekansı hesaplar. Negatif frekans görüntüsünün ve komşu harmoniklerin
+    yan loblarının tepeyi kaydırmaması için Hann penceresi uygulanır; genlikler
+    pencere kazancı düzeltilmiş 2/n tepe ölçeğindedir. (frekanslar, karmaşık
+    genlikler) döndürür.
+    """
+    raw, scale = signal_parts(signal)
+    n = len(raw)
+    window = np.hanning(n + 1)[:n]
+    transform = lazy_import('scipy.signal').ZoomFFT(n, [f_start, f_stop], m=points, fs=sample_rate, endpoint=True)
+    freqs = np.linspace(f_start, f_stop, points)
+    return freqs, transform((raw - np.mean(raw)) * window) * (2 * scale / np.sum(window))
+
+
+def zoom_peak(signal, sample_rate, frequency, span, points=1024, zoom=None):
+    """frequency ± span/2 bandındaki en büyük tepe: (frekans, genlik, faz°).
+    
+    Zoom ızgarası üzerinde parabolik enterpolasyonla ızgara adımının da
+    altında (mHz) frekans verir. zoom: aynı band için önceden hesaplanmış
+    zoom_spectrum çıktısı (frekanslar, değerler); verilirse dönüşüm tekrarlanmaz.
+    """
+    if zoom is None:
+        zoom = zoom_spectrum(signal, sample_rate, frequency - span / 2, frequency + span / 2, points)
+    freqs, values = zoom
+    points = len(freqs)
+    mags = np.abs(values)
+    k = int(np.clip(np.argmax(mags), 1, points - 2))
+    a, b, c = mags[k - 1:k + 2]
+    denom = a - 2 * b + c
+    delta = 0.5 * (a - c) / denom if denom != 0 else 0.0
+    step = freqs[1] - freqs[0]
+    return freqs[k] + delta * step, b - 0.25 * (a - c) * delta, np.angle(values[k], deg=True)
+
+
+def harmonic_zoom(res, order, points=1024, workers=None):
+    """Sonucun order. harmoniği çevresinde (± f1/2) zoom görünümü.
+    
+    Tek chirp-z dönüşümü hem zoom eğrisini hem tepe kestirimini verir; aynı
+    banttaki ham FFT binleri (pencere yok, 2/n ölçek) analiz spektrumundan
+    (result_spectrum) alınır, FFT tekrarlanmaz.
+    """
+    sample_rate = res['sample_rate']
+    fundamental = res['fundamental']
+    center = order * fundamental
+    zoom = zoom_spectrum(res['signal'], sample_rate, center - fundamental / 2, center + fundamental / 2, points)
+    spectrum = result_spectrum(res, workers)
+    df = sample_rate / len(res['signal'])
+    bins = np.arange(max(1, int(np.ceil((center - fundamental / 2) / df))),
+                     min(len(spectrum), int((center + fundamental / 2) / df) + 1))
+    return {
+        'center': center,
+        'df': df,
+        'freqs': zoom[0],
+        'amplitude': np.abs(zoom[1]),
+        'bin_freqs': bins * df,
+        'bins': spectrum[bins],
+        'peak': zoom_peak(res['signal'], sample_rate, center, fundamental, zoom=zoom)
+    }
+
+
+def result_spectrum(res, workers=None):
+    """Sonucun genlik spektrumu (2/n tepe ölçeği, DC'siz), res['spectrum'].
+    
+    analyze_captures kanal ve filtresiz ifade satırları için analizdeki FFT'den
+    doldurur; eksikse (filtreli ifadeler, katlanmış kayıtlar, diskten okunan
+    dalga formları) bir kez hesaplanıp saklanır.
+    """
+    if 'spectrum' not in res:
+        raw, scale = signal_parts(res['signal'])
+        spectrum = np.abs(rfft(raw, workers=workers)) * (2 * abs(scale) / len(raw))
+        spectrum[0] = 0
+        res['spectrum'] = spectrum
+    return res['spectrum']
+
+
+# ===================== SENKRON PERİYOT KATLAMA =====================
+
+def tone_phasor(x, frequency, sample_rate, offset=0.0):
+    """x - offset'in verilen frekanstaki DFT fazörü (bin dışı frekans da olabilir).
+    
+    Kayıt (satır x genişlik) bloklarına bölünür; her satır aynı taban fazör
+    dizisiyle çarpılıp satır başı dönüşüyle toplanır (tam boy karmaşık dizi yok).
+    """
+    n = len(x)
+    width = max(1, min(n, 1 << 16))
+    omega = 2 * np.pi * frequency / sample_rate
+    base = np.exp(-1j * omega * np.arange(width))
+    rows = n // width
+    body = x[:rows * width].reshape(rows, width)
+    partial = body @ base.real + 1j * (body @ base.imag) - offset * base.sum()
+    total = np.dot(partial, np.exp(-1j * omega * width * np.arange(rows)))
+    tail = x[rows * width:]
+    return total + np.exp(-1j * omega * rows * width) * np.dot(tail - offset, base[:len(tail)])
+
+
+def refine_fundamental(signal, sample_rate, fundamental, iterations=2):
+    """find_fundamental'ın bin çözünürlüklü tahminini faz kaymasıyla incelt.
+    
+    Kaydın iki yarısındaki temel fazörlerin faz farkı, frekans hatasının
+    yarım kayıt süresince biriktirdiği fazdır; kaba tahmin hatası en fazla
+    yarım bin olduğundan (< π/2) belirsizlik olmaz.
+    """
+    raw, _ = signal_parts(signal)
+    half = len(raw) // 2
+    if half == 0:
+        return fundamental
+    mean = np.mean(raw)
+    span = half / sample_rate
+    for _ in range(iterations):
+        first = tone_phasor(raw[:half], fundamental, sample_rate, mean)
+        second = tone_phasor(raw[half:2 * half], fundamental, sample_rate, mean)
+        if first == 0 or second == 0:
+            break
+        drift = np.angle(second / first) - 2 * np.pi * fundamental * span
+        drift = (drift + np.pi) % (2 * np.pi) - np.pi
+        fundamental += drift / (2 * np.pi * span)
+    return fundamental
+
+
+def fold_cycles(signal, sample_rate, fundamental, cycles=10, samples_per_cycle=None):
+    """Kaydı temel periyotla katlayıp cycles periyotluk tek ortalama kayda indir.
+    
+    Ardışık cycles periyotluk bölümler ortak ızgaraya (periyot başına
+    samples_per_cycle nokta, varsayılan özgün örnek sayısı) doğrusal
+    enterpolasyonla yeniden örneklenip ortalanır; ızgara t=0'dan başladığından
+    harmonik fazları özgün kayıtla aynıdır. (katlanmış sinyal, katlanmış örnekleme
+    hızı, ortalanan bölüm sayısı) döndürür; tek bölüm bile sığmıyorsa ValueError.
+    """
+    raw, scale = signal_parts(signal)
+    period = sample_rate / fundamental
+    m = samples_per_cycle or int(round(period))
+    length = cycles * m
+    records = int((len(raw) - 1) // (cycles * period))
+    if records < 1:
+        raise ValueError(f"Katlama için kayıt çok kısa: {cycles} periyot gerekli.")
+    
+    grid = np.arange(length) * (period / m)
+    total = np.zeros(length)
+    step = max(1, BLOCK_SIZE // length)
+    for r in range(0, records, step):
+        positions = np.arange(r, min(records, r + step))[:, None] * (cycles * period) + grid
+        i0 = positions.astype(np.int64)
+        frac = positions - i0
+        total += np.sum(raw[i0] * (1 - frac) + raw[np.minimum(i0 + 1, len(raw) - 1)] * frac, axis=0)
+    return ScaledSignal(total / records, scale), m * fundamental, records
+
+
+def fold_channels(channels, cycles=10, analyzer=None):
+    """prepare_channels sonucunu ortak temel frekansla katla (ilk kanal referans).
+    
+    Kayıt katlamaya yetmiyorsa kanallar değiştirilmeden döner.
+    """
+    if not channels:
+        return channels
+    analyzer = analyzer or HarmonicAnalyzer()
+    reference = next(iter(channels.values()))
+    raw, _ = signal_parts(reference['signal'])
+    sample_rate = reference['sample_rate']
+    fundamental = refine_fundamental(raw, sample_rate, analyzer.find_fundamental(raw, sample_rate))
+    
+    folded = {}
+    for ch, res in channels.items():
+        try:
+            signal, rate, records = fold_cycles(res['signal'], sample_rate, fundamental, cycles)
+        except ValueError:
+            return channels
+        folded[ch] = {**res, 'signal': signal, 'signal_raw': signal, 'sample_rate': rate,
+                      'time': TimeAxis(0, 1 / rate, len(signal)),
+                      'fold': {'cycles': cycles, 'records': records, 'fundamental': fundamental}}
+    return folded
+
+
+# ===================== KOHERENT VEKTÖR ORTALAMA =====================
+
+class CoherentAverager:
+    """Aynı DUT'un kayıtlarında harmonik fazörlerinin koherent vektör ortalaması.
+    
+    Her kaydın harmonik tablosu (mevcut FFT'den çıkarılmış genlik/faz) temel
+    harmoniğin fazına hizalanır: z_h * exp(-j h φ1). Hizalanmış fazörlerin
+    ortalaması ve sapması Welford yöntemiyle artımlı tutulur; bellek kayıt
+    sayısından bağımsızdır. Faz ilişkisi olmayan gürültü √N ile düşer.
+    """
+    
+    def __init__(self, limits=IEC_CLASS_A_LIMITS):
+        self.limits = limits
+        self.count = 0
+        self.orders = None
+        self.mean = None
+        self.m2 = None
+        self.frequency = None
+    
+    def add(self, harmonics):
+        """Bir kaydın HarmonicTable'ını ortalamaya ekle (ilk satır temel harmonik)"""
+        phase = np.deg2rad(harmonics['phase'])
+        orders = harmonics['harmonic'].astype(np.float64)
+        aligned = harmonics['amplitude'] * np.exp(1j * (phase - orders * phase[0]))
+        
+        if self.mean is None:
+            self.orders = harmonics['harmonic'].copy()
+            self.mean = np.zeros(len(aligned), dtype=np.complex128)
+            self.m2 = np.zeros(len(aligned))
+            self.frequency = np.zeros(len(aligned))
+        elif len(aligned) != len(self.mean):
+            raise ValueError(f"Harmonik sayısı uyumsuz: {len(aligned)} != {len(self.mean)}")
+        
+        self.count += 1
+        delta = aligned - self.mean
+        self.mean += delta / self.count
+        self.m2 += (delta * np.conj(aligned - self.mean)).real
+        self.frequency += (harmonics['frequency'] - self.frequency) / self.count
+    
+    @property
+    def noise(self):
+        """Ortalamanın standart hatası (harmonik başına, genlik birimi); N<2 için NaN"""
+        if self.count < 2:
+            return np.full(len(self.mean), np.nan)
+        return np.sqrt(self.m2 / (self.count - 1) / self.count)
+    
+    def table(self):
+        """Ortalama fazörlerden HarmonicTable (faz temel harmoniğe göre)"""
+        if self.count == 0:
+            raise ValueError("Ortalama için en az bir kayıt gerekli.")
+        limit = [self.limits.get(h, 0) if h > 1 else 0 for h in self.orders]
+        return HarmonicTable.from_arrays(self.orders, self.frequency, np.abs(self.mean),
+                                         np.angle(self.mean, deg=True), limit)
+
+
+# ===================== PERİYOT BAZLI ANALİZ =====================
+
+def find_cycle_starts(x, hysteresis=0.1):
+    """Yükselen sıfır geçişleri (alt örnek hassasiyetinde kesirli indeksler), vektörel.
+    
+    Gürültüden kaynaklı sahte geçişleri elemek için sinyal önce -h altına inip
+    sonra +h üstüne çıkmalıdır (h = hysteresis x AC RMS); geçiş noktası bu
+    yükselişten önceki son işaret değişimi, doğrusal enterpolasyonla bulunur.
+    """
+    mean = np.mean(x)
+    rms, _ = ac_rms_peak(x)
+    h = hysteresis * rms
+    if h == 0:
+        return np.empty(0)
+    
+    # Histerezis durum değişimleri: yalnızca eşik dışındaki örnekler sırasıyla
+    low = np.flatnonzero(x < mean - h)
+    high = np.flatnonzero(x > mean + h)
+    marks = np.concatenate([low, high])
+    levels = np.concatenate([np.zeros(len(low), np.int8), np.ones(len(high), np.int8)])
+    order = np.argsort(marks, kind='stable')
+    marks, levels = marks[order], levels[order]
+    rises = marks[1:][(levels[1:] == 1) & (levels[:-1] == 0)]
+    
+    # Her yükselişten önceki son işaret değişimi: x[i] < mean <= x[i+1]
+    below = x < mean
+    crossings = np.flatnonzero(below[:-1] & ~below[1:])
+    idx = crossings[np.searchsorted(crossings, rises) - 1]
+    a = x[idx] - mean
+    b = x[idx + 1] - mean
+    return idx + a / (a - b)
+
+
+def cycle_metrics(signal, sample_rate, num_harmonics=40, samples_per_cycle=128, hysteresis=0.1):
+    """Periyot başına RMS, tepe, crest factor, frekans ve THD dizileri.
+    
+    Periyotlar sıfır geçişleriyle bölünür; RMS/tepe np.add/maximum.reduceat ile
+    tek geçişte, THD ise her periyot samples_per_cycle noktaya yeniden
+    örneklenip (periyot x nokta) matrisinin tek 2-B rfft'siyle hesaplanır
+    (senkron örnekleme: h. harmonik tam h. bin).
+    """
+    raw, scale = signal_parts(signal)
+    starts = find_cycle_starts(raw, hysteresis)
+    empty = np.empty(0)
+    if len(starts) < 2:
+        return {'start': empty, 'frequency': empty, 'rms': empty, 'peak': empty, 'cf': empty, 'thd': empty}
+    
+    # Tamsayı periyot sınırları: [b_k, b_k+1)
+    bounds = np.floor(starts).astype(np.int64) + 1
+    ac = raw[bounds[0]:bounds[-1]] - np.mean(raw)
+    edges = bounds[:-1] - bounds[0]
+    counts = np.diff(bounds)
+    peak = np.maximum.reduceat(np.abs(ac), edges) * abs(scale)
+    np.multiply(ac, ac, out=ac)
+    rms = np.sqrt(np.add.reduceat(ac, edges) / counts) * abs(scale)
+    del ac
+    
+    # Periyotları kesirli sınırlardan eşit noktaya doğrusal enterpolasyonla yeniden örnekle
+    m = max(samples_per_cycle, 2 * num_harmonics + 2)
+    positions = starts[:-1, None] + np.diff(starts)[:, None] * (np.arange(m) / m)
+    i0 = np.minimum(positions.astype(np.int64), len(raw) - 2)
+    frac = positions - i0
+    cycles = raw[i0] * (1 - frac) + raw[i0 + 1] * frac
+    spectra = np.abs(rfft(cycles, axis=-1)[:, 1:num_harmonics + 1])
+    fundamental = spectra[:, 0]
+    harmonics = np.sqrt(np.sum(spectra[:, 1:] ** 2, axis=1))
+    thd = np.divide(harmonics * 100, fundamental, out=np.zeros(len(fundamental)), where=fundamental > 0)
+    
+    return {
+        'start': starts[:-1] / sample_rate,
+        'frequency': sample_rate / np.diff(starts),
+        'rms': rms,
+        'peak': peak,
+        'cf': np.divide(peak, rms, out=np.zeros(len(rms)), where=rms > 0),
+        'thd': thd
+    }
+
+
+def summarize_cycles(cycles):
+    """Periyot dizilerinin özeti: {metrik: (ortalama, min, maks, std)}"""
+    summary = {'count': len(cycles['rms'])}
+    for key in ('frequency', 'rms', 'peak', 'cf', 'thd'):
+        values = cycles[key]
+        summary[key] = ((float(np.mean(values)), float(np.min(values)), float(np.max(values)), float(np.std(values)))
+                        if len(values) else (0.0, 0.0, 0.0, 0.0))
+    return summary
+
+
+def result_cycles(res):
+    """Sonucun periyot dizileri ve özeti -> (cycle_metrics, summarize_cycles).
+    
+    Sonuç başına bir kez hesaplanıp res['cycles']'ta saklanır; rapor
+    yenilemeleri ve periyot grafiği tüm sinyali yeniden taramaz.
+    """
+    if 'cycles' not in res:
+        cycles = cycle_metrics(res['signal'], res['sample_rate'], len(res['harmonics']))
+        res['cycles'] = (cycles, summarize_cycles(cycles))
+    return res['cycles']
+
+
+# ===================== KISA ZAMANLI HARMONİK ANALİZİ =====================
+
+class HarmonicSpectrogram:
+    """Harmonik-zaman matrisi (STFT): sliding_window_view ile kopyasız çerçeveler,
+    bellek sınırlı gruplar halinde tek 2-B rfft.
+    
+    Sinyal add() ile parça parça verilebilir (uzun dosyalar); çerçeveler parça
+    sınırlarında kesintisiz devam eder. Çerçeveler column_time süreli sütunlarda
+    ortalama veya maksimumla birleştirilir; bellek giriş uzunluğuyla değil,
+    çıktı sütun sayısıyla orantılıdır.
+    """
+    
+    def __init__(self, sample_rate, fundamental=50.0, num_harmonics=40, window_cycles=10,
+                 hop_cycles=None, column_time=None, reduce='mean', workers=None):
+        if reduce not in ('mean', 'max'):
+            raise ValueError("reduce 'mean' veya 'max' olmalı")
+        self.sample_rate = sample_rate
+        self.fundamental = fundamental
+        self.orders = np.arange(1, num_harmonics + 1)
+        self.window = int(round(window_cycles * sample_rate / fundamental))
+        self.hop = max(1, int(round((hop_cycles or window_cycles) * sample_rate / fundamental)))
+        # Sütun başına çerçeve sayısı (None: her çerçeve ayrı sütun)
+        self.frames_per_column = 1 if column_time is None else max(1, int(column_time * sample_rate / self.hop))
+        self.reduce = reduce
+        self.workers = workers
+        
+        n_bins = self.window // 2 + 1
+        self.bins = nearest_bins(self.orders * fundamental, self.window, sample_rate, n_bins)
+        self.frames = 0
+        self._columns = []
+        self._partial = None
+        self._partial_count = 0
+        self._tail = np.empty(0)
+        self._skip = 0
+    
+    def add(self, signal):
+        """Sinyal parçasını çerçevele ve sütunlara ekle (ScaledSignal kopyalanmaz)"""
+        raw, scale = signal_parts(signal)
+        w, hop = self.window, self.hop
+        # Çerçeve adımı pencereden uzunsa bir sonraki çerçeveye kadarki örnekler atlanır
+        if self._skip:
+            skipped = min(self._skip, len(raw))
+            raw = raw[skipped:]
+            self._skip -= skipped
+        # Kuyruk, bir sonraki çerçevenin başından itibaren önceki parçanın örnekleridir
+        tail_len = len(self._tail)
+        if tail_len:
+            joined = np.concatenate([self._tail, raw[:w - 1] * scale])
+            starts = np.arange(0, min(tail_len, len(joined) - w + 1), hop)
+            if len(starts):
+                frames = np.lib.stride_tricks.sliding_window_view(joined, w)[starts]
+                self._add_frames(frames, 1.0)
+                next_start = starts[-1] + hop
+            else:
+                next_start = 0
+            if next_start < tail_len:
+                # Parça çerçeveyi tamamlamaya yetmedi
+                self._tail = joined[next_start:]
+                return
+            offset = next_start - tail_len
+        else:
+            offset = 0
+        
+        # Parçanın içindeki tam çerçeveler: (çerçeve x örnek) kopyasız görünüm
+        usable = len(raw) - offset
+        count = (usable - w) // hop + 1 if usable >= w else 0
+        if count > 0:
+            view = np.lib.stride_tricks.sliding_window_view(raw[offset:], w)[::hop][:count]
+            step = max(1, BATCH_FFT_SAMPLES // w)
+            for i in range(0, count, step):
+                self._add_frames(view[i:i + step], scale)
+        next_start = offset + count * hop
+        self._skip = max(0, next_start - len(raw))
+        self._tail = raw[next_start:] * scale
+    
+    def _add_frames(self, frames, scale):
+        """Çerçevelerin harmonik genliklerini çıkar ve sütunlarda birleştir"""
+        spectra = rfft(frames, axis=-1, workers=self.workers)
+        amps = np.abs(spectra[:, self.bins]) * (2 / self.window * abs(scale))
+        
+        # Çerçevelerin sütun numaraları; aynı sütundakiler reduceat ile tek seferde birleşir
+        columns = (self.frames + np.arange(len(amps))) // self.frames_per_column
+        self.frames += len(amps)
+        edges = np.flatnonzero(np.diff(columns, prepend=-1))
+        ufunc = np.maximum if self.reduce == 'max' else np.add
+        grouped = ufunc.reduceat(amps, edges, axis=0)
+        counts = np.diff(np.append(edges, len(amps)))
+        
+        # Yarım sütun her zaman len(self._columns) numaralı sütundur
+        for column, values, count in zip(columns[edges], grouped, counts):
+            if self._partial is not None and column == len(self._columns):
+                self._partial = ufunc(self._partial, values)
+                self._partial_count += count
+                continue
+            if self._partial is not None:
+                self._columns.append(self._finish(self._partial, self._partial_count))
+            self._partial, self._partial_count = values, count
+        if self._partial_count >= self.frames_per_column:
+            self._columns.append(self._finish(self._partial, self._partial_count))
+            self._partial, self._partial_count = None, 0
+    
+    def _finish(self, values, count):
+        return values / count if self.reduce == 'mean' else values
+    
+    def result(self):
+        """{'time', 'harmonic', 'amplitude' (harmonik x sütun)}; time sütun ortası (s, sinyal başından)"""
+        columns = list(self._columns)
+        if self._partial is not None:
+            columns.append(self._finish(self._partial, self._partial_count))
+        amplitude = np.array(columns).T if columns else np.empty((len(self.orders), 0))
+        column_span = self.frames_per_column * self.hop
+        time = (np.arange(amplitude.shape[1]) * column_span + (column_span - self.hop + self.window) / 2) / self.sample_rate
+        return {'time': time, 'harmonic': self.orders, 'amplitude': amplitude, 'frames': self.frames}
+
+
+def harmonic_spectrograms(results, max_columns=400, window_cycles=4, hop_cycles=1, reduce='max', workers=None):
+    """Analiz sonuçlarındaki her kanal (CH1-CH4, DIFF, ifadeler) için harmonik-zaman matrisi.
+    
+    Sütun süresi kayıt süresini en fazla max_columns sütuna böler (çizim için seyreltme).
+    """
+    spectrograms = {}
+    for ch, res in results.items():
+        n = len(res['signal'])
+        sample_rate = res['sample_rate']
+        hop = max(1, int(round(hop_cycles * sample_rate / res['fundamental'])))
+        column_time = max(1, int(np.ceil(n / hop / max_columns))) * hop / sample_rate
+        spectrogram = HarmonicSpectrogram(sample_rate, res['fundamental'], len(res['harmonics']),
+                                          window_cycles, hop_cycles, column_time, reduce, workers)
+        spectrogram.add(res['signal'])
+        spectrograms[ch] = spectrogram.result()
+    return spectrograms
+
+
+# ===================== IEC 61000-3-2 GÖZLEM SÜRESİ =====================
+
+class ObservationPeriodEvaluator:
+    """IEC 61000-3-2 gözlem süresi değerlendirmesi (IEC 61000-4-7 pencereleri).
+    
+    Ardışık kayıtlar (veya tek uzun kayıt) add_capture ile sırayla verilir;
+    kayıtlar arka arkaya eklenmiş sayılır, pencereye sığmayan kuyruk bir sonraki
+    kayda taşınır. Her 10 (60 Hz'de 12) periyotluk pencerenin harmonikleri RMS'e
+    çevrilip (limitler RMS'tir) 1.5 s zaman sabitli birinci derece filtreyle
+    yumuşatılır; harmonik başına yalnızca filtre durumu, toplam ve maksimum
+    tutulur, pencereler bellekte kalmaz.
+    
+    Karar: yumuşatılmış değerlerin ortalaması limitin %100'ünü, maksimumu
+    %150'sini aşmamalı.
+    """
+    
+    SHORT_TERM_FACTOR = 1.5
+    
+    def __init__(self, limits=IEC_CLASS_A_LIMITS, num_harmonics=40, mains_freq=50.0,
+                 time_constant=1.5, analyzer=None, workers=None):
+        self.analyzer = analyzer or HarmonicAnalyzer()
+        self.workers = workers
+        self.num_harmonics = num_harmonics
+        self.orders = np.arange(1, num_harmonics + 1)
+        self.limits = np.array([limits.get(h, 0) if h > 1 else 0 for h in self.orders], dtype=np.float64)
+        self.window_cycles = 12 if mains_freq > 55 else 10
+        self.window_time = self.window_cycles / mains_freq
+        # Ayrık birinci derece filtre: y[k] = a*x[k] + (1-a)*y[k-1]
+        self.alpha = 1 - np.exp(-self.window_time / time_constant)
+        
+        self.sample_rate = None
+        self.window_samples = None
+        self.windows = 0
+        self.total = np.zeros(num_harmonics)
+        self.maximum = np.zeros(num_harmonics)
+        self._state = None
+        self._tail = np.empty(0)
+    
+    def add_capture(self, signal, sample_rate):
+        """Kaydı pencerelere böl ve değerlendirmeye ekle (ScaledSignal kopyalanmaz)"""
+        if self.sample_rate is None:
+            self.sample_rate = sample_rate
+            self.window_samples = int(round(self.window_time * sample_rate))
+        elif sample_rate != self.sample_rate:
+            raise ValueError(f"Örnekleme hızı değişti: {self.sample_rate} -> {sample_rate} Sa/s")
+        
+        raw, scale = signal_parts(signal)
+        w = self.window_samples
+        start = 0
+        
+        # Önceki kayıttan kalan kuyruk bu kaydın başıyla tamamlanır
+        if len(self._tail):
+            need = w - len(self._tail)
+            if len(raw) < need:
+                self._tail = np.concatenate([self._tail, raw * scale])
+                return
+            self._add_windows(np.concatenate([self._tail, raw[:need] * scale])[None, :], 1.0)
+            start = need
+        
+        # Tam pencereler (satır x örnek) görünüm olarak, bellek sınırlı gruplar halinde
+        end = start + (len(raw) - start) // w * w
+        step = max(1, BATCH_FFT_SAMPLES // w) * w
+        for i in range(start, end, step):
+            j = min(i + step, end)
+            self._add_windows(raw[i:j].reshape(-1, w), scale)
+        self._tail = raw[end:] * scale
+    
+    def _add_windows(self, windows, scale):
+        """Pencere harmoniklerini tek 2-B rfft ile çıkar, yumuşat ve istatistiklere ekle"""
+        n = windows.shape[1]
+        spectra = rfft(windows, axis=-1, workers=self.workers)
+        spectra[:, 0] = 0
+        fundamentals = self.analyzer.find_fundamentals(spectra, n, self.sample_rate)
+        tables = self.analyzer.extract_harmonics(spectra, n, self.sample_rate, fundamentals, self.num_harmonics)
+        # Tablo genlikleri tepe değeridir; yumuşatmadan önce RMS'e çevrilir
+        amplitudes = np.stack([table['amplitude'] for table in tables]) * (abs(scale) / np.sqrt(2))
+        
+        # Filtre ilk pencere değeriyle başlatılır (açılış geçişi ortalamayı bozmaz)
+        if self._state is None:
+            self._state = (1 - self.alpha) * amplitudes[:1]
+        smoothed, self._state = lazy_import('scipy.signal').lfilter([self.alpha], [1, self.alpha - 1], amplitudes, axis=0, zi=self._state)
+        
+        self.total += smoothed.sum(axis=0)
+        np.maximum(self.maximum, smoothed.max(axis=0), out=self.maximum)
+        self.windows += len(smoothed)
+    
+    @property
+    def duration(self):
+        """Değerlendirilen süre (s), eksik son pencere hariç"""
+        return self.windows * self.window_time
+    
+    def result(self):
+        """Harmonik başına ortalama/maksimum yumuşatılmış RMS değer ve karar"""
+        if self.windows == 0:
+            raise ValueError("Gözlem süresi için en az bir tam pencere gerekli.")
+        average = self.total / self.windows
+        limited = self.limits > 0
+        safe_limits = np.where(limited, self.limits, 1.0)
+        average_percent = np.where(limited, average / safe_limits * 100, 0.0)
+        maximum_percent = np.where(limited, self.maximum / safe_limits * 100, 0.0)
+        failed = limited & ((average_percent > 100) | (maximum_percent > self.SHORT_TERM_FACTOR * 100))
+        status = np.where(failed, STATUS_FAIL, STATUS_PASS).astype(np.int8)
+        status[self.orders == 1] = STATUS_FUND
+        return {
+            'windows': self.windows,
+            'duration': self.duration,
+            'harmonic': self.orders,
+            'average': average,
+            'maximum': self.maximum.copy(),
+            'limit': self.limits,
+            'average_percent': average_percent,
+            'maximum_percent': maximum_percent,
+            'status': status,
+            'passed': not failed.any(),
+            'failed': self.orders[failed]
+        }
+
+
+# Sonuçlarda dalga formu taşıyan (nokta sayısıyla büyüyen) alanlar
+WAVEFORM_KEYS = ('time', 'signal', 'signal_raw', 'spectrum')
+
+
+def summarize_results(results):
+    """Sonuçların dalga formu içermeyen özeti: skaler metrikler + harmonik tablosu.
+    
+    Batch işlemde dosya başına bellek, nokta sayısından bağımsız kalır.
+    """
+    summary = {}
+    for ch, res in results.items():
+        compact = {k: v for k, v in res.items() if k not in WAVEFORM_KEYS}
+        for k in ('fundamental', 'thd', 'tdd', 'rms', 'ipk', 'cf', 'pf', 'ff', 'sample_rate'):
+            if k in compact:
+                compact[k] = float(compact[k])
+        compact['passed'] = bool(compact['passed'])
+        summary[ch] = compact
+    return summary
+
+
+def spill_waveforms(results, filepath):
+    """Kanal dalga formlarını sıkıştırmasız .npz dosyasına yaz (zaman ekseni t0/dt olarak)"""
+    arrays = {}
+    for ch, res in results.items():
+        arrays[f'{ch}_t0'] = res['time'].t0
+        arrays[f'{ch}_dt'] = res['time'].dt
+        arrays[f'{ch}_signal'] = np.asarray(res['signal'])
+        # DIFF ve filtresiz kanallarda signal_raw aynı dizidir; bir kez yazılır
+        if res['signal_raw'] is not res['signal']:
+            arrays[f'{ch}_signal_raw'] = np.asarray(res['signal_raw'])
+    np.savez(filepath, **arrays)
+    return filepath
+
+
+def load_spilled_waveforms(filepath):
+    """spill_waveforms ile yazılan dosyayı {kanal: {time, signal, signal_raw}} olarak oku"""
+    waveforms = {}
+    with np.load(filepath) as npz:
+        for key in npz.files:
+            if not key.endswith('_signal'):
+                continue
+            ch = key[:-len('_signal')]
+            signal = npz[key]
+            raw_key = f'{ch}_signal_raw'
+            waveforms[ch] = {
+                'time': TimeAxis(npz[f'{ch}_t0'], npz[f'{ch}_dt'], len(signal)),
+                'signal': signal,
+                'signal_raw': npz[raw_key] if raw_key in npz.files else signal
+            }
+    return waveforms
@@ -0,0 +1,365 @@
+"""
+ Ekran Dışı Batch Grafik Raporu (PNG / PDF)
+ ==========================================
+ - Ana penceredeki 6 panelli overlay grafiği her batch sonucu için çizer
+ - Çizim Agg ile işçi süreçlerde yapılır (pyplot/Tk yok); çekirdek sayısıyla ölçeklenir
+ - Dalga formları çizimden önce min/max seyreltilir: tepe değerler korunur,
+   nokta sayısı ekran çözünürlüğüyle sınırlı kalır
+ - Kayıt başına PNG/PDF ve tüm kayıtları içeren tek çok sayfalı PDF
+
+ Kullanım:
+   python report_figures.py grafikler/ *.csv --ratio 20 --workers 4
+   python report_figures.py grafikler/ *.csv --formats png --no-combined
+"""
+
+import os
+import argparse
+import time
+import concurrent.futures
+import multiprocessing
+
+import numpy as np
+
+from harmonic_core import (lazy_import, CHANNEL_NAMES, CHANNEL_COLORS, IEC_CLASS_A_LIMITS, WAVEFORM_KEYS,
+                           load_spilled_waveforms)
+
+FIGURE_SIZE = (12, 8)
+FIGURE_DPI = 150
+FIGURE_FACE = '#1a1a2e'
+AXES_FACE = '#16213e'
+
+# Seyreltilmiş dalga formu başına en fazla nokta (12" x 150 dpi ~ 1800 piksel)
+PLOT_POINTS = 2000
+
+# Dalga formu panellerinin pencere süreleri (s)
+WAVE_WINDOWS = {'wave60': 0.060, 'wave10': 0.010}
+
+
+# ===================== ÇİZİM VERİSİ =====================
+
+def decimate_minmax(x, y, max_points):
+    """Min/max seyreltme: her blokta en küçük ve en büyük örnek sırasıyla korunur"""
+    n = len(y)
+    if not max_points or n <= max_points:
+        return x, y
+    blocks = max(1, max_points // 2)
+    size = n // blocks
+    block = y[:blocks * size].reshape(blocks, size)
+    lo = block.argmin(axis=1)
+    hi = block.argmax(axis=1)
+    base = np.arange(blocks) * size
+    idx = np.sort(np.concatenate([base + lo, base + hi, [n - 1]]))
+    return x[idx], y[idx]
+
+
+def center_window(res, seconds, max_points=None):
+    """Kaydın ortasındaki pencere -> (zaman ms, genlik x1000)"""
+    signal = res['signal']
+    count = min(int(seconds * res['sample_rate']), len(signal))
+    start = len(signal) // 2 - count // 2
+    time_ms = (res['time'][start:start + count] - res['time'][start]) * 1000
+    return decimate_minmax(time_ms, np.asarray(signal[start:start + count]) * 1000, max_points)
+
+
+def overlay_data(results, max_points=None):
+    """Overlay grafiğinin ihtiyaç duyduğu veri: dalga formu yerine yalnızca
+    çizilen pencereler (isteğe bağlı seyreltilmiş). Dalga formu olmayan
+    (özet) sonuçlarda pencereler None olur.
+    """
+    data = {}
+    for ch, res in results.items():
+        item = {k: v for k, v in res.items() if k not in WAVEFORM_KEYS}
+        for key, seconds in WAVE_WINDOWS.items():
+            item[key] = center_window(res, seconds, max_points) if 'signal' in res else None
+        data[ch] = item
+    return data
+
+
+# ===================== OVERLAY GRAFİK =====================
+
+def no_waveform(ax):
+    ax.text(0.5, 0.5, 'Dalga formu yok (diske yazılmadı)', transform=ax.transAxes,
+            ha='center', va='center', color='gray', fontsize=12)
+
+
+def draw_overlay(fig, data):
+    """6 panelli overlay grafiği (overlay_data çıktısından)"""
+    ax1 = fig.add_subplot(3, 2, 1)
+    ax2 = fig.add_subplot(3, 2, 2)
+    ax3 = fig.add_subplot(3, 2, 3)
+    ax4 = fig.add_subplot(3, 2, 4)
+    ax5 = fig.add_subplot(3, 2, 5)
+    ax6 = fig.add_subplot(3, 2, 6)
+
+    # DIFF ve ifadeler hariç ana kanallar
+    main_channels = {ch: res for ch, res in data.items() if ch in CHANNEL_NAMES}
+    colors = CHANNEL_COLORS
+    width = 0.7 / max(2, len(main_channels))
+    # Harmonik sırası analiz ayarından gelir (tablo uzunluğu); eksen ve limitler ona göre
+    max_order = max([int(res['harmonics']['harmonic'][-1]) for res in data.values() if len(res['harmonics'])],
+                    default=1)
+
+    # Harmonik bar
+    ax1.set_facecolor(AXES_FACE)
+    for i, (ch, res) in enumerate(main_channels.items()):
+        h_nums = res['harmonics']['harmonic']
+        amps = res['harmonics']['amplitude'] * 1000
+        offset = (i - (max(2, len(main_channels)) - 1) / 2) * width
+        label = f'{ch} THD={res["thd"]:.1f}%'
+        ax1.bar(h_nums + offset, amps, width, color=colors.get(ch, '#ffffff'), alpha=0.7, label=label)
+
+    any_current = any(res['type'] == 'Akim' for ch, res in main_channels.items())
+    if any_current:
+        orders = np.arange(2, max_order + 1)
+        limits = [IEC_CLASS_A_LIMITS.get(h, 0) * 1000 for h in orders]
+        ax1.step(orders, limits, where='mid', color='#ffaa00', linewidth=2, linestyle='--', label='IEC Limit')
+
+    ax1.set_xlabel('Harmonik No', color='white')
+    ax1.set_ylabel('Genlik (mA/mV)', color='white')
+    ax1.set_title('Harmonik Spektrum', color='white', fontweight='bold')
+    ax1.set_xlim(0, max_order + 2)
+    ax1.legend(loc='upper right', facecolor=AXES_FACE, labelcolor='white', fontsize=8)
+    ax1.grid(True, alpha=0.3, axis='y')
+    ax1.tick_params(colors='white')
+
+    # Dalga formu 60ms
+    ax2.set_facecolor(AXES_FACE)
+    for ch, res in main_channels.items():
+        if res['wave60'] is None:
+            continue
+        time_ms, wave = res['wave60']
+        ax2.plot(time_ms, wave, color=colors.get(ch, '#ffffff'), linewidth=0.6,
+                 label=f'{ch} RMS={res["rms"]*1000:.1f}m{res["unit"]}')
+    if any(res['wave60'] is not None for res in main_channels.values()):
+        ax2.axhline(0, color='gray', linestyle='--', linewidth=0.5)
+        ax2.legend(loc='upper right', facecolor=AXES_FACE, labelcolor='white', fontsize=8)
+    else:
+        no_waveform(ax2)
+    ax2.set_xlabel('Zaman (ms)', color='white')
+    ax2.set_ylabel('Genlik (mA/mV)', color='white')
+    ax2.set_title('Dalga Formu (60ms)', color='white')
+    ax2.grid(True, alpha=0.3)
+    ax2.tick_params(colors='white')
+
+    # Limit yüzdeleri
+    ax3.set_facecolor(AXES_FACE)
+    current_channels = {ch: res for ch, res in main_channels.items() if res['type'] == 'Akim'}
+    if current_channels:
+        for i, (ch, res) in enumerate(current_channels.items()):
+            percents = res['harmonics']['percent'][1:]
+            offset = (i - (max(2, len(current_channels)) - 1) / 2) * width
+            bar_colors = np.where(percents <= 100, colors.get(ch, '#ffffff'), '#ff4444')
+            ax3.bar(res['harmonics']['harmonic'][1:] + offset, percents, width, color=bar_colors, alpha=0.7, label=ch)
+        ax3.axhline(100, color='red', linestyle='--', linewidth=2, label='100% Limit')
+        ax3.set_xlabel('Harmonik No', color='white')
+        ax3.set_ylabel('Limite Göre (%)', color='white')
+        ax3.set_title('IEC Limit Karşılaştırma', color='white')
+        ax3.set_xlim(1, max_order + 1)
+        ax3.legend(loc='upper right', facecolor=AXES_FACE, labelcolor='white', fontsize=8)
+    ax3.grid(True, alpha=0.3, axis='y')
+    ax3.tick_params(colors='white')
+
+    # Dalga formu 10ms
+    ax4.set_facecolor(AXES_FACE)
+    for ch, res in main_channels.items():
+        if res['wave10'] is None:
+            continue
+        time_ms, wave = res['wave10']
+        ax4.plot(time_ms, wave, color=colors.get(ch, '#ffffff'), linewidth=0.8,
+                 label=f'{ch} Pk={res["ipk"]*1000:.1f}m{res["unit"]}')
+    if any(res['wave10'] is not None for res in main_channels.values()):
+        ax4.axhline(0, color='gray', linestyle='--', linewidth=0.5)
+        ax4.legend(loc='upper right', facecolor=AXES_FACE, labelcolor='white', fontsize=8)
+    else:
+        no_waveform(ax4)
+    ax4.set_xlabel('Zaman (ms)', color='white')
+    ax4.set_ylabel('Genlik (mA/mV)', color='white')
+    ax4.set_title('Dalga Formu (10ms)', color='white')
+    ax4.grid(True, alpha=0.3)
+    ax4.tick_params(colors='white')
+
+    # CH1-CH2 Fark Sinyalinin (yoksa ilk kanal ifadesinin) Harmonik Analizi
+    derived = [ch for ch in data if ch not in CHANNEL_NAMES]
+    diff_key = 'DIFF' if 'DIFF' in data else (derived[0] if derived else None)
+    diff_name = 'FARK' if diff_key == 'DIFF' else diff_key
+    ax5.set_facecolor(AXES_FACE)
+    if diff_key is not None:
+        diff_res = data[diff_key]
+
+        # Harmonikleri çiz
+        h_nums = diff_res['harmonics']['harmonic']
+        h_amps = diff_res['harmonics']['amplitude'] * 1000
+        ax5.bar(h_nums, h_amps, color='#00ff88', edgecolor='white', linewidth=0.3, alpha=0.8)
+
+        # Başlıkta tüm önemli verileri göster
+        title = f"{diff_name} Harmonik | RMS={diff_res['rms']*1000:.2f}m{diff_res['unit']} | THD={diff_res['thd']:.1f}% | CF={diff_res['cf']:.2f}"
+        ax5.set_xlabel('Harmonik No', color='white')
+        ax5.set_ylabel('Genlik (mA)', color='white')
+        ax5.set_title(title, color='#00ff88', fontsize=9)
+        ax5.set_xlim(0, max_order + 2)
+    else:
+        ax5.text(0.5, 0.5, 'Fark için 2 kanal gerekli', transform=ax5.transAxes,
+                 ha='center', va='center', color='gray', fontsize=12)
+    ax5.grid(True, alpha=0.3, axis='y')
+    ax5.tick_params(colors='white')
+
+    # Kanal farkı - Dalga Formu (CH1 - CH2 veya ifade)
+    ax6.set_facecolor(AXES_FACE)
+    if diff_key is not None and data[diff_key]['wave60'] is not None:
+        diff_res = data[diff_key]
+        time_ms, diff_wave = diff_res['wave60']
+
+        filter_label = diff_res.get('filter_info', '')
+        ax6.plot(time_ms, diff_wave, color='#00ff88', linewidth=0.6, label=f"{diff_res['channel']}{filter_label}")
+        ax6.axhline(0, color='white', linestyle='--', linewidth=0.5)
+        ax6.set_xlabel('Zaman (ms)', color='white')
+        ax6.set_ylabel('Fark (mA/mV)', color='white')
+
+        # Başlıkta Peak ve f0 göster
+        title = f"{diff_name} Dalga | Pk={diff_res['ipk']*1000:.2f}m{diff_res['unit']} | f0={diff_res['fundamental']:.2f}Hz"
+        ax6.set_title(title, color='#00ff88', fontsize=9)
+        ax6.legend(loc='upper right', facecolor=AXES_FACE, labelcolor='white', fontsize=8)
+    elif diff_key is not None:
+        no_waveform(ax6)
+    else:
+        ax6.text(0.5, 0.5, 'Fark için 2 kanal gerekli', transform=ax6.transAxes,
+                 ha='center', va='center', color='gray', fontsize=12)
+    ax6.grid(True, alpha=0.3)
+    ax6.tick_params(colors='white')
+
+
+# ===================== İŞÇİ SÜREÇ =====================
+
+def figure_job(name, title, results=None, waveform_file=None, source=None, settings=None):
+    """Batch grafik işi. results özet ise dalga formları waveform_file'dan
+    okunur; results yoksa source CSV işçide yüklenip settings ile analiz edilir.
+    """
+    return {'name': name, 'title': title, 'results': results, 'waveform_file': waveform_file,
+            'source': source, 'settings': settings}
+
+
+def job_results(job):
+    """İşin sonuçlarını dalga formlarıyla birlikte hazırla"""
+    if job['results'] is None:
+        from harmonic_core import load_rigol_csv, analyze_capture
+        return analyze_capture(load_rigol_csv(job['source']), job['settings'])
+    results = job['results']
+    if job['waveform_file']:
+        waveforms = load_spilled_waveforms(job['waveform_file'])
+        results = {ch: {**res, **waveforms.get(ch, {})} for ch, res in results.items()}
+    return results
+
+
+def render_figure(job, out_dir, formats, max_points, page):
+    """Tek kaydı Agg ile çiz ve kaydet -> (yazılan dosyalar, sayfa RGBA dizisi veya None)"""
+    Figure = lazy_import('matplotlib.figure').Figure
+    FigureCanvasAgg = lazy_import('matplotlib.backends.backend_agg').FigureCanvasAgg
+
+    data = overlay_data(job_results(job), max_points)
+    fig = Figure(figsize=FIGURE_SIZE, dpi=FIGURE_DPI, facecolor=FIGURE_FACE)
+    canvas = FigureCanvasAgg(fig)
+    draw_overlay(fig, data)
+    fig.suptitle(job['title'], color='white', fontsize=10)
+    fig.tight_layout()
+
+    # Agg bir kez çizilir: PNG ve birleşik PDF sayfası aynı tampondan yazılır,
+    # yalnızca kayıt başına PDF kendi vektör çizimini yapar
+    pixels = None
+    if page or 'png' in formats:
+        canvas.draw()
+        pixels = np.asarray(canvas.buffer_rgba())
+    written = []
+    for ext in formats:
+        path = os.path.join(out_dir, f"{job['name']}.{ext}")
+        if ext == 'png':
+            lazy_import('matplotlib.image').imsave(path, pixels, dpi=FIGURE_DPI)
+        else:
+            fig.savefig(path, dpi=FIGURE_DPI, facecolor=FIGURE_FACE)
+        written.append(path)
+    return written, (pixels.copy() if page else None)
+
+
+def render_batch_figures(jobs, out_dir, formats=('png', 'pdf'), combined='Batch_Figures.pdf',
+                         workers=None, max_points=PLOT_POINTS, progress=None):
+    """Batch grafiklerini workers süreçte çiz -> yazılan dosyaların listesi.
+
+    jobs: figure_job sözlükleri
+    combined: tüm kayıtların tek PDF'i (None ise yazılmaz); sayfalar işçilerin
+              çizdiği görüntülerdir, ana süreç yalnızca sırayla ekler
+    progress: progress(bitmiş, toplam) her kayıttan sonra çağrılır
+    """
+    jobs = list(jobs)
+    formats = tuple(ext.lower().lstrip('.') for ext in formats)
+    for ext in formats:
+        if ext not in ('png', 'pdf'):
+            raise ValueError(f"Desteklenmeyen grafik biçimi: '{ext}' (png veya pdf)")
+    if not jobs:
+        return []
+    os.makedirs(out_dir, exist_ok=True)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    page = combined is not None
+    args = ([out_dir] * len(jobs), [formats] * len(jobs), [max_points] * len(jobs), [page] * len(jobs))
+
+    pdf = None
+    written = []
+    if page:
+        combined_path = os.path.join(out_dir, combined)
+        pdf = lazy_import('matplotlib.backends.backend_pdf').PdfPages(combined_path)
+    executor = None
+    completed = False
+    if workers > 1:
+        # spawn: işçiler GUI sürecinin Tk durumunu devralmaz
+        executor = concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        rendered = executor.map(render_figure, jobs, *args) if executor else map(render_figure, jobs, *args)
+        for done, (paths, pixels) in enumerate(rendered, 1):
+            written.extend(paths)
+            if pdf is not None:
+                fig = lazy_import('matplotlib.figure').Figure(
+                    figsize=(pixels.shape[1] / FIGURE_DPI, pixels.shape[0] / FIGURE_DPI), dpi=FIGURE_DPI)
+                fig.figimage(pixels)
+                pdf.savefig(fig)
+            if progress is not None:
+                progress(done, len(jobs))
+        completed = True
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=not completed)
+        if pdf is not None:
+            pdf.close()
+            # Yarım kalan birleşik PDF tam raporla karıştırılmasın
+            if not completed:
+                os.remove(combined_path)
+    if pdf is not None:
+        written.append(combined_path)
+    return written
+
+
+def main():
+    from analysis_pipeline import default_settings
+
+    parser = argparse.ArgumentParser(description="CSV kayıtlarından ekran dışı batch grafik raporu")
+    parser.add_argument('out_dir', help="Grafiklerin yazılacağı klasör")
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--ratio', type=float, default=20.0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--formats', default='png,pdf', help="Virgülle ayrılmış: png, pdf")
+    parser.add_argument('--points', type=int, default=PLOT_POINTS, help="Dalga formu başına en fazla nokta")
+    parser.add_argument('--no-combined', action='store_true', help="Tek çok sayfalı PDF yazma")
+    args = parser.parse_args()
+
+    settings = default_settings(ratio=args.ratio)
+    jobs = [figure_job(f"{i:04d}_{os.path.splitext(os.path.basename(fp))[0]}", os.path.basename(fp),
+                       source=fp, settings=settings)
+            for i, fp in enumerate(args.files)]
+    t0 = time.perf_counter()
+    written = render_batch_figures(jobs, args.out_dir, [f for f in args.formats.split(',') if f],
+                                   combined=None if args.no_combined else 'Batch_Figures.pdf',
+                                   workers=args.workers, max_points=args.points,
+                                   progress=lambda done, total: print(f"  {done}/{total}"))
+    print(f"{len(written)} dosya yazıldı: {args.out_dir} ({time.perf_counter() - t0:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
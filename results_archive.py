@@ -0,0 +1,399 @@
+"""
+ Sütunlu Sonuç Arşivi (HDF5 / Parquet)
+ =====================================
+ - Ham kanal dalga formları (CH1-CH4), kanal başına skaler metrikler ve
+   harmonik/grup dizileri; tek analiz ve batch çalıştırmaları aynı düzende
+ - Parçalı (chunked) ve sıkıştırılmış yazım
+ - Kısmi okuma: tek kanal, örnek aralığı veya harmonik aralığı; dosyanın
+   tamamı belleğe alınmaz
+ - .h5/.hdf5 -> HDF5 (h5py), .parquet -> Parquet dizini (pyarrow);
+   iki kütüphane de isteğe bağlıdır, yoksa ImportError kurulum komutunu söyler
+
+ Kullanım:
+   python results_archive.py arsiv.h5 add *.csv --ratio 20
+   python results_archive.py arsiv.h5 list
+   python results_archive.py arsiv.h5 harmonics --capture NewFile1 --channel DIFF --from 2 --to 13
+   python results_archive.py arsiv.parquet waveform --capture NewFile1 --channel CH1 --start 0 --stop 100000
+"""
+
+import os
+import re
+import glob
+import shutil
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+
+from harmonic_core import lazy_import, CHANNEL_NAMES, GROUP_KEYS, HARMONIC_DTYPE, HarmonicTable
+from results_store import CHANNEL_METRICS
+
+# HDF5 dalga formu parça boyutu (örnek) ve Parquet satır grubu boyutu
+WAVEFORM_CHUNK = 1 << 16
+ROW_GROUP_SIZE = 1 << 20
+
+# Kanal başına skaler alanlar (metrik tablosu)
+METRIC_DTYPE = np.dtype([('channel', 'S32'), ('type', 'S8'), ('unit', 'S4'), ('ratio', np.float64)]
+                        + [(m, np.float64) for m in CHANNEL_METRICS] + [('passed', np.bool_)])
+GROUP_DTYPE = np.dtype([(key, np.float64) for key in GROUP_KEYS])
+
+
+def require(module, package):
+    """İsteğe bağlı bağımlılığı yükle; yoksa kurulum komutunu içeren ImportError"""
+    try:
+        return lazy_import(module)
+    except ImportError as e:
+        raise ImportError(f"{package} kurulu değil: pip install {package}") from e
+
+
+def capture_name(filepath, index=None):
+    """Dosya adından arşiv kayıt adı (batch'te sıra numarasıyla)"""
+    stem = os.path.splitext(os.path.basename(filepath or 'capture'))[0]
+    name = re.sub(r'[^\w.+-]', '_', stem) or 'capture'
+    return name if index is None else f"{index:04d}_{name}"
+
+
+def capture_waveforms(results):
+    """Sonuçlardaki ham kanal dalga formları {kanal: dizi} (DIFF ve ifadeler yeniden hesaplanabilir)"""
+    return {ch: np.asarray(res['signal_raw'], dtype=np.float64)
+            for ch, res in results.items() if ch in CHANNEL_NAMES and 'signal_raw' in res}
+
+
+def capture_meta(results, filepath=None):
+    """Kayıt düzeyi bilgiler: dosya, örnekleme hızı, nokta sayısı, zaman ekseni"""
+    first = next(iter(results.values()))
+    meta = {'file': filepath or '', 'sample_rate': float(first['sample_rate'])}
+    if 'time' in first:
+        meta.update(points=len(first['time']), t0=float(first['time'].t0), dt=float(first['time'].dt))
+    return meta
+
+
+def metric_rows(results):
+    """Kanal başına skaler metrikler -> METRIC_DTYPE yapılandırılmış dizisi"""
+    rows = np.zeros(len(results), dtype=METRIC_DTYPE)
+    for i, (ch, res) in enumerate(results.items()):
+        rows[i] = (ch.encode(), str(res.get('type', '')).encode(), str(res.get('unit', '')).encode(),
+                   float(res.get('ratio', 1.0)), *(float(res[m]) for m in CHANNEL_METRICS),
+                   bool(res['passed']))
+    return rows
+
+
+def group_rows(res):
+    """IEC 61000-4-7 grup dizileri -> GROUP_DTYPE (grup yoksa NaN)"""
+    rows = np.full(len(res['harmonics']), np.nan, dtype=GROUP_DTYPE)
+    for key in GROUP_KEYS:
+        if key in res.get('groups', {}):
+            rows[key] = res['groups'][key]
+    return rows
+
+
+def decode_rows(rows):
+    """Yapılandırılmış diziyi sözlük listesine çevir (bayt metinler str olarak)"""
+    return [{k: v.decode() if isinstance(v, bytes) else v for k, v in zip(rows.dtype.names, row.tolist())}
+            for row in rows]
+
+
+class Hdf5Archive:
+    """HDF5 arşivi: /captures/<kayıt>/{waveforms/<kanal>, channels, harmonics/<kanal>, groups/<kanal>}"""
+
+    def __init__(self, path, mode='a'):
+        h5py = require('h5py', 'h5py')
+        self.path = path
+        self.file = h5py.File(path, mode)
+        self.root = self.file.require_group('captures')
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ----- yazma -----
+
+    def add_capture(self, name, results, meta=None, waveforms=None):
+        """Tek kaydın dalga formları, metrikleri ve harmoniklerini ekle"""
+        if name in self.root:
+            raise ValueError(f"{name} arşivde zaten var")
+        group = self.root.create_group(name)
+        for key, value in (meta or {}).items():
+            group.attrs[key] = value
+        for ch, values in (waveforms or {}).items():
+            group.create_dataset(f'waveforms/{ch}', data=values, chunks=(min(len(values), WAVEFORM_CHUNK),),
+                                 compression='gzip', compression_opts=4, shuffle=True)
+        group.create_dataset('channels', data=metric_rows(results))
+        for ch, res in results.items():
+            group.create_dataset(f'harmonics/{ch}', data=res['harmonics'].rows, compression='gzip', shuffle=True)
+            group.create_dataset(f'groups/{ch}', data=group_rows(res), compression='gzip', shuffle=True)
+
+    def add_many(self, records):
+        """(ad, sonuçlar, bilgi, dalga formları) kayıtlarını sırayla ekle; kayıt sayısını döndür"""
+        count = 0
+        for record in records:
+            self.add_capture(*record)
+            count += 1
+        return count
+
+    # ----- okuma -----
+
+    def captures(self):
+        """Kayıtlar: ad, kayıt bilgileri ve kanal listesi"""
+        return [{'capture': name, **{k: v.item() if hasattr(v, 'item') else v for k, v in group.attrs.items()},
+                 'channels': [row['channel'] for row in decode_rows(group['channels'][()])]}
+                for name, group in self.root.items()]
+
+    def metrics(self, capture=None, channel=None):
+        """Kanal metrikleri (isteğe bağlı kayıt/kanal filtresi)"""
+        names = [capture] if capture is not None else list(self.root)
+        rows = []
+        for name in names:
+            for row in decode_rows(self.root[name]['channels'][()]):
+                if channel is None or row['channel'] == channel:
+                    rows.append({'capture': name, **row})
+        return rows
+
+    def harmonics(self, capture, channel, first=1, last=None):
+        """Harmonik aralığı [first, last] -> HarmonicTable (yalnızca o satırlar okunur)"""
+        return HarmonicTable(self.root[capture]['harmonics'][channel][first - 1:last])
+
+    def groups(self, capture, channel, first=1, last=None):
+        """Harmonik aralığının IEC 61000-4-7 grup dizileri {anahtar: dizi}"""
+        rows = self.root[capture]['groups'][channel][first - 1:last]
+        return {key: rows[key] for key in GROUP_KEYS}
+
+    def waveform(self, capture, channel, start=0, stop=None):
+        """Ham kanal dalga formunun [start, stop) örnekleri (yalnızca ilgili parçalar okunur)"""
+        try:
+            dataset = self.root[capture]['waveforms'][channel]
+        except KeyError:
+            raise ValueError(f"{capture}/{channel} dalga formu arşivde yok")
+        return dataset[start:stop]
+
+
+class ParquetArchive:
+    """Parquet arşivi (dizin): channels/ ve harmonics/ tabloları + kayıt başına waveforms/<kayıt>.parquet"""
+
+    def __init__(self, path, mode='a'):
+        self.pa = require('pyarrow', 'pyarrow')
+        self.pq = require('pyarrow.parquet', 'pyarrow')
+        self.path = path
+        if mode == 'w':
+            # Yalnızca arşivin kendi alt dizinleri silinir
+            for sub in ('channels', 'harmonics', 'waveforms'):
+                shutil.rmtree(os.path.join(path, sub), ignore_errors=True)
+        for sub in ('channels', 'harmonics', 'waveforms'):
+            os.makedirs(os.path.join(path, sub), exist_ok=True)
+        self.channel_schema = self.pa.schema(
+            [('capture', self.pa.string()), ('file', self.pa.string()), ('sample_rate', self.pa.float64()),
+             ('points', self.pa.int64()), ('t0', self.pa.float64()), ('dt', self.pa.float64()),
+             ('channel', self.pa.string()), ('type', self.pa.string()), ('unit', self.pa.string()),
+             ('ratio', self.pa.float64())]
+            + [(m, self.pa.float64()) for m in CHANNEL_METRICS] + [('passed', self.pa.bool_())])
+        self.harmonic_schema = self.pa.schema(
+            [('capture', self.pa.string()), ('channel', self.pa.string())]
+            + [(name, self.pa.from_numpy_dtype(HARMONIC_DTYPE[name])) for name in HARMONIC_DTYPE.names]
+            + [(key, self.pa.float64()) for key in GROUP_KEYS])
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _part(self, table):
+        return os.path.join(self.path, table, f"{datetime.now():%Y%m%d_%H%M%S_%f}.parquet")
+
+    def _read(self, table, schema, filters, columns=None):
+        if not glob.glob(os.path.join(self.path, table, '*.parquet')):
+            return schema.empty_table().to_pydict()
+        return self.pq.read_table(os.path.join(self.path, table), schema=schema, columns=columns,
+                                  filters=filters or None).to_pydict()
+
+    # ----- yazma -----
+
+    def add_capture(self, name, results, meta=None, waveforms=None):
+        """Tek kaydın dalga formları, metrikleri ve harmoniklerini ekle"""
+        self.add_many([(name, results, meta, waveforms)])
+
+    def add_many(self, records):
+        """(ad, sonuçlar, bilgi, dalga formları) kayıtlarını tek dosya grubu olarak ekle; kayıt sayısını döndür.
+        
+        records üreteç olabilir: dalga formları kayıt kayıt yazılır, bellekte birikmez.
+        """
+        existing = {row['capture'] for row in self.captures()}
+        before = len(existing)
+        channel_rows, harmonic_columns = [], []
+        for name, results, meta, waveforms in records:
+            if name in existing:
+                raise ValueError(f"{name} arşivde zaten var")
+            existing.add(name)
+            meta = meta or {}
+            if waveforms:
+                n = max(len(values) for values in waveforms.values())
+                columns = {'sample': np.arange(n, dtype=np.int64), **waveforms}
+                self.pq.write_table(self.pa.table(columns), os.path.join(self.path, 'waveforms', f'{name}.parquet'),
+                                    row_group_size=ROW_GROUP_SIZE, compression='zstd')
+            for row in decode_rows(metric_rows(results)):
+                channel_rows.append({'capture': name, 'file': meta.get('file', ''),
+                                     'sample_rate': meta.get('sample_rate'), 'points': meta.get('points'),
+                                     't0': meta.get('t0'), 'dt': meta.get('dt'), **row})
+            for ch, res in results.items():
+                rows = res['harmonics'].rows
+                groups = group_rows(res)
+                harmonic_columns.append({'capture': [name] * len(rows), 'channel': [ch] * len(rows),
+                                         **{key: rows[key] for key in HARMONIC_DTYPE.names},
+                                         **{key: groups[key] for key in GROUP_KEYS}})
+        if channel_rows:
+            self.pq.write_table(self.pa.Table.from_pylist(channel_rows, schema=self.channel_schema),
+                                self._part('channels'), compression='zstd')
+        if harmonic_columns:
+            merged = {key: np.concatenate([np.asarray(c[key]) for c in harmonic_columns])
+                      for key in self.harmonic_schema.names}
+            self.pq.write_table(self.pa.table(merged, schema=self.harmonic_schema),
+                                self._part('harmonics'), compression='zstd')
+        return len(existing) - before
+
+    # ----- okuma -----
+
+    def captures(self):
+        """Kayıtlar: ad, kayıt bilgileri ve kanal listesi"""
+        table = self._read('channels', self.channel_schema, None,
+                           ['capture', 'file', 'sample_rate', 'points', 't0', 'dt', 'channel'])
+        captures = {}
+        for i, name in enumerate(table['capture']):
+            entry = captures.setdefault(name, {'capture': name, **{k: table[k][i] for k in
+                                               ('file', 'sample_rate', 'points', 't0', 'dt')}, 'channels': []})
+            entry['channels'].append(table['channel'][i])
+        return list(captures.values())
+
+    def metrics(self, capture=None, channel=None):
+        """Kanal metrikleri (isteğe bağlı kayıt/kanal filtresi)"""
+        filters = [(key, '=', value) for key, value in (('capture', capture), ('channel', channel))
+                   if value is not None]
+        columns = ['capture'] + list(METRIC_DTYPE.names)
+        table = self._read('channels', self.channel_schema, filters, columns)
+        return [dict(zip(columns, values)) for values in zip(*(table[c] for c in columns))]
+
+    def _harmonic_rows(self, capture, channel, first, last, columns):
+        filters = [('capture', '=', capture), ('channel', '=', channel), ('harmonic', '>=', first)]
+        if last is not None:
+            filters.append(('harmonic', '<=', last))
+        table = self._read('harmonics', self.harmonic_schema, filters, columns + ['harmonic'])
+        order = np.argsort(table['harmonic'], kind='stable')
+        return {key: np.asarray(table[key])[order] for key in columns}
+
+    def harmonics(self, capture, channel, first=1, last=None):
+        """Harmonik aralığı [first, last] -> HarmonicTable (satır grubu istatistikleriyle filtrelenir)"""
+        columns = self._harmonic_rows(capture, channel, first, last, list(HARMONIC_DTYPE.names))
+        rows = np.zeros(len(columns['harmonic']), dtype=HARMONIC_DTYPE)
+        for key in HARMONIC_DTYPE.names:
+            rows[key] = columns[key]
+        return HarmonicTable(rows)
+
+    def groups(self, capture, channel, first=1, last=None):
+        """Harmonik aralığının IEC 61000-4-7 grup dizileri {anahtar: dizi}"""
+        return self._harmonic_rows(capture, channel, first, last, list(GROUP_KEYS))
+
+    def waveform(self, capture, channel, start=0, stop=None):
+        """Ham kanal dalga formunun [start, stop) örnekleri (yalnızca o kanal ve satır grupları okunur)"""
+        path = os.path.join(self.path, 'waveforms', f'{capture}.parquet')
+        if not os.path.exists(path):
+            raise ValueError(f"{capture} dalga formu arşivde yok")
+        if channel not in self.pq.read_schema(path).names:
+            raise ValueError(f"{capture}/{channel} dalga formu arşivde yok")
+        filters = [('sample', '>=', start)] + ([('sample', '<', stop)] if stop is not None else [])
+        table = self.pq.read_table(path, columns=['sample', channel], filters=filters)
+        values = table.column(channel).to_numpy()
+        return values[np.argsort(table.column('sample').to_numpy(), kind='stable')]
+
+
+def open_archive(path, mode='a'):
+    """Uzantıya göre arşiv: .h5/.hdf5 -> Hdf5Archive, .parquet -> ParquetArchive.
+
+    mode='w' var olan arşivi baştan yazar, 'a' kayıt ekler.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.h5', '.hdf5'):
+        return Hdf5Archive(path, mode)
+    if ext == '.parquet':
+        return ParquetArchive(path, mode)
+    raise ValueError(f"Desteklenmeyen arşiv uzantısı: '{ext}' (.h5, .hdf5 veya .parquet)")
+
+
+def write_archive(path, records, mode='a'):
+    """(ad, sonuçlar, bilgi, dalga formları) kayıtlarını (liste veya üreteç) arşive yaz; kayıt sayısını döndür"""
+    with open_archive(path, mode) as archive:
+        return archive.add_many(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Harmonik analiz sonuç arşivi (HDF5 / Parquet)")
+    parser.add_argument('archive', help="arsiv.h5 veya arsiv.parquet")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_add = sub.add_parser('add', help="CSV dosyalarını analiz edip dalga formlarıyla ekle")
+    p_add.add_argument('files', nargs='+')
+    p_add.add_argument('--ratio', type=float, default=20.0)
+    p_add.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                       help="Büyük CSV'leri okuyan süreç sayısı")
+
+    sub.add_parser('list', help="Kayıt listesi")
+
+    p_metrics = sub.add_parser('metrics', help="Kanal metrikleri")
+    p_metrics.add_argument('--capture')
+    p_metrics.add_argument('--channel')
+
+    p_harm = sub.add_parser('harmonics', help="Harmonik aralığı")
+    p_harm.add_argument('--capture', required=True)
+    p_harm.add_argument('--channel', default='DIFF')
+    p_harm.add_argument('--from', dest='first', type=int, default=1)
+    p_harm.add_argument('--to', dest='last', type=int)
+
+    p_wave = sub.add_parser('waveform', help="Dalga formu örnek aralığı")
+    p_wave.add_argument('--capture', required=True)
+    p_wave.add_argument('--channel', default='CH1')
+    p_wave.add_argument('--start', type=int, default=0)
+    p_wave.add_argument('--stop', type=int)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if args.command == 'add':
+        from harmonic_core import load_rigol_csv, analyze_capture
+        from analysis_pipeline import default_settings
+        settings = default_settings(ratio=args.ratio)
+        with open_archive(args.archive) as archive:
+            for fp in args.files:
+                results = analyze_capture(load_rigol_csv(fp, workers=args.workers), settings)
+                archive.add_capture(capture_name(fp), results, capture_meta(results, fp),
+                                    capture_waveforms(results))
+        print(f"{len(args.files)} kayıt eklendi")
+    else:
+        with open_archive(args.archive) as archive:
+            if args.command == 'list':
+                for c in archive.captures():
+                    print(f"{c['capture']:<24} {c.get('points') or 0:>10} nokta  "
+                          f"{(c.get('sample_rate') or 0)/1e3:8.1f} kHz  {'+'.join(c['channels'])}  {c['file']}")
+            elif args.command == 'metrics':
+                for r in archive.metrics(args.capture, args.channel):
+                    print(f"{r['capture']:<24} {r['channel']:<12} THD={r['thd']:6.2f}%  "
+                          f"RMS={r['rms']:.4f}  PF={r['pf']:.3f}  {'PASS' if r['passed'] else 'FAIL'}")
+            elif args.command == 'harmonics':
+                table = archive.harmonics(args.capture, args.channel, args.first, args.last)
+                for h in table:
+                    print(f"H{h['harmonic']:<3} {h['frequency']:9.2f} Hz  {h['amplitude']*1000:9.3f} mA  "
+                          f"%{h['percent']:6.1f}  {h['status']}")
+            elif args.command == 'waveform':
+                values = archive.waveform(args.capture, args.channel, args.start, args.stop)
+                print(f"{len(values)} örnek  min={values.min():.6g}  max={values.max():.6g}  "
+                      f"rms={np.sqrt(np.mean(values ** 2)):.6g}")
+    print(f"({(time.perf_counter() - t0) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
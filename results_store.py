@@ -0,0 +1,299 @@
+"""
+ Analiz Sonuçları Veritabanı (SQLite)
+ ====================================
+ - Normalize şema: captures (kayıt) -> channels (kanal) -> harmonics (harmonik)
+ - DUT, tarih, harmonik ve durum üzerinde indeksler
+ - Toplu ve tek işlemli (transaction) ekleme
+ - Sorgu: "DUT X'in H5'i limitin %90'ını aşan tüm kayıtları"
+ - Trend: bir DUT için kanal metriği veya harmonik yüzdesinin zaman serisi
+
+ Kullanım:
+   python results_store.py sonuclar.db add *.csv --dut PSU-01
+   python results_store.py sonuclar.db query --dut PSU-01 --harmonic 5 --min-percent 90
+   python results_store.py sonuclar.db trend --dut PSU-01 --channel DIFF --metric H5
+   python results_store.py sonuclar.db duts
+"""
+
+import os
+import sqlite3
+import argparse
+import time
+from datetime import datetime
+
+DEFAULT_DB_NAME = 'harmonic_results.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id          INTEGER PRIMARY KEY,
+    file        TEXT NOT NULL,
+    dut         TEXT NOT NULL DEFAULT '',
+    captured_at TEXT NOT NULL,
+    analyzed_at TEXT NOT NULL,
+    source      TEXT,
+    sample_rate REAL,
+    points      INTEGER,
+    passed      INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS channels (
+    id          INTEGER PRIMARY KEY,
+    capture_id  INTEGER NOT NULL REFERENCES captures(id) ON DELETE CASCADE,
+    channel     TEXT NOT NULL,
+    type        TEXT,
+    unit        TEXT,
+    ratio       REAL,
+    fundamental REAL,
+    thd         REAL,
+    tdd         REAL,
+    rms         REAL,
+    ipk         REAL,
+    cf          REAL,
+    pf          REAL,
+    passed      INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS harmonics (
+    channel_id  INTEGER NOT NULL REFERENCES channels(id) ON DELETE CASCADE,
+    harmonic    INTEGER NOT NULL,
+    frequency   REAL,
+    amplitude   REAL,
+    phase       REAL,
+    limit_value REAL,
+    percent     REAL,
+    status      TEXT NOT NULL,
+    PRIMARY KEY (channel_id, harmonic)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_captures_dut_date ON captures(dut, captured_at);
+CREATE INDEX IF NOT EXISTS idx_captures_date ON captures(captured_at);
+CREATE INDEX IF NOT EXISTS idx_captures_passed ON captures(passed, captured_at);
+CREATE INDEX IF NOT EXISTS idx_channels_capture ON channels(capture_id, channel);
+CREATE INDEX IF NOT EXISTS idx_channels_status ON channels(channel, passed);
+CREATE INDEX IF NOT EXISTS idx_harmonics_percent ON harmonics(harmonic, percent);
+CREATE INDEX IF NOT EXISTS idx_harmonics_status ON harmonics(status, harmonic);
+"""
+
+CHANNEL_METRICS = ('fundamental', 'thd', 'tdd', 'rms', 'ipk', 'cf', 'pf')
+
+
+def file_timestamp(filepath):
+    """Kaydın alınma zamanı: dosya değişim zamanı (yoksa şimdi)"""
+    try:
+        return datetime.fromtimestamp(os.path.getmtime(filepath)).isoformat(timespec='seconds')
+    except OSError:
+        return datetime.now().isoformat(timespec='seconds')
+
+
+class ResultsStore:
+    """Analiz sonuçları için SQLite deposu"""
+
+    def __init__(self, path=DEFAULT_DB_NAME):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ----- ekleme -----
+
+    def _insert_capture(self, cur, filepath, results, dut, captured_at, meta):
+        cur.execute(
+            "INSERT INTO captures (file, dut, captured_at, analyzed_at, source, sample_rate, points, passed) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (filepath, dut or '', captured_at or file_timestamp(filepath),
+             datetime.now().isoformat(timespec='seconds'), meta.get('source'),
+             meta.get('sample_rate'), meta.get('points'),
+             int(all(res['passed'] for res in results.values()))))
+        capture_id = cur.lastrowid
+
+        harmonic_rows = []
+        for ch, res in results.items():
+            cur.execute(
+                "INSERT INTO channels (capture_id, channel, type, unit, ratio, fundamental, thd, tdd, "
+                "rms, ipk, cf, pf, passed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (capture_id, ch, res.get('type'), res.get('unit'), float(res.get('ratio', 1.0)),
+                 *(float(res[m]) for m in CHANNEL_METRICS), int(bool(res['passed']))))
+            channel_id = cur.lastrowid
+            table = res['harmonics']
+            harmonic_rows.extend(zip(
+                [channel_id] * len(table), table['harmonic'].tolist(), table['frequency'].tolist(),
+                table['amplitude'].tolist(), table['phase'].tolist(), table['limit'].tolist(),
+                table['percent'].tolist(), table.statuses.tolist()))
+
+        cur.executemany(
+            "INSERT INTO harmonics (channel_id, harmonic, frequency, amplitude, phase, limit_value, "
+            "percent, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", harmonic_rows)
+        return capture_id
+
+    def add_capture(self, filepath, results, dut='', captured_at=None, **meta):
+        """Tek kaydın tüm kanal ve harmoniklerini tek işlemde ekle"""
+        return self.add_many([(filepath, results, dut, captured_at, meta)])[0]
+
+    def add_many(self, records):
+        """(dosya, sonuçlar, dut, zaman, meta) kayıtlarını tek işlemde toplu ekle"""
+        ids = []
+        with self.conn:
+            cur = self.conn.cursor()
+            for record in records:
+                filepath, results, dut, captured_at = record[:4]
+                meta = record[4] if len(record) > 4 else {}
+                ids.append(self._insert_capture(cur, filepath, results, dut, captured_at, meta))
+        self.refresh_statistics()
+        return ids
+
+    def refresh_statistics(self):
+        """Sorgu planlayıcı istatistiklerini güncelle.
+
+        İstatistik olmadan planlayıcı DUT indeksi yerine tüm veritabanındaki
+        H5 satırlarını tarayan harmonik indeksini seçebilir.
+        """
+        self.conn.execute("PRAGMA analysis_limit=1000")
+        self.conn.execute("ANALYZE")
+
+    # ----- sorgular -----
+
+    def duts(self):
+        """DUT listesi ve kayıt sayıları"""
+        return [dict(r) for r in self.conn.execute(
+            "SELECT dut, COUNT(*) AS captures, MIN(captured_at) AS first, MAX(captured_at) AS last, "
+            "SUM(passed = 0) AS failed FROM captures GROUP BY dut ORDER BY dut")]
+
+    def query(self, dut=None, channel=None, harmonic=None, min_percent=None, status=None,
+              date_from=None, date_to=None, limit=1000):
+        """Harmonik seviyesinde filtrele: kayıt + kanal + harmonik satırları"""
+        where, params = [], []
+        if dut is not None:
+            where.append("c.dut = ?")
+            params.append(dut)
+        if date_from is not None:
+            where.append("c.captured_at >= ?")
+            params.append(date_from)
+        if date_to is not None:
+            where.append("c.captured_at <= ?")
+            params.append(date_to)
+        if channel is not None:
+            where.append("ch.channel = ?")
+            params.append(channel)
+        if harmonic is not None:
+            where.append("h.harmonic = ?")
+            params.append(int(harmonic))
+        if min_percent is not None:
+            where.append("h.percent >= ?")
+            params.append(float(min_percent))
+        if status is not None:
+            where.append("h.status = ?")
+            params.append(status)
+
+        # DUT verildiğinde birleştirme sırası captures -> channels -> harmonics
+        # olarak sabitlenir (CROSS JOIN); aksi halde planlayıcı tüm veritabanındaki
+        # harmonik satırlarını tarayıp çoğunu DUT filtresinde atabilir
+        join = "CROSS JOIN" if dut is not None else "JOIN"
+        sql = ("SELECT c.id AS capture_id, c.file, c.dut, c.captured_at, ch.channel, "
+               "h.harmonic, h.frequency, h.amplitude, h.limit_value, h.percent, h.status "
+               f"FROM captures c {join} channels ch ON ch.capture_id = c.id "
+               f"{join} harmonics h ON h.channel_id = ch.id")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY c.captured_at, c.id, ch.channel, h.harmonic LIMIT ?"
+        params.append(int(limit))
+        return [dict(r) for r in self.conn.execute(sql, params)]
+
+    def trend(self, dut, channel='DIFF', metric='thd', date_from=None, date_to=None):
+        """Zaman serisi: metric kanal metriği ('thd', 'rms', ...) veya 'H5' gibi harmonik yüzdesi"""
+        if metric.upper().startswith('H') and metric[1:].isdigit():
+            sql = ("SELECT c.captured_at, h.percent AS value, c.file FROM captures c "
+                   "JOIN channels ch ON ch.capture_id = c.id AND ch.channel = ? "
+                   "JOIN harmonics h ON h.channel_id = ch.id AND h.harmonic = ? "
+                   "WHERE c.dut = ?")
+            params = [channel, int(metric[1:]), dut]
+        elif metric in CHANNEL_METRICS:
+            sql = (f"SELECT c.captured_at, ch.{metric} AS value, c.file FROM captures c "
+                   "JOIN channels ch ON ch.capture_id = c.id AND ch.channel = ? "
+                   "WHERE c.dut = ?")
+            params = [channel, dut]
+        else:
+            raise ValueError(f"Bilinmeyen metrik: {metric}")
+        if date_from is not None:
+            sql += " AND c.captured_at >= ?"
+            params.append(date_from)
+        if date_to is not None:
+            sql += " AND c.captured_at <= ?"
+            params.append(date_to)
+        sql += " ORDER BY c.captured_at, c.id"
+        return [dict(r) for r in self.conn.execute(sql, params)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Harmonik analiz sonuç veritabanı")
+    parser.add_argument('db', nargs='?', default=DEFAULT_DB_NAME)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_add = sub.add_parser('add', help="CSV dosyalarını analiz edip ekle")
+    p_add.add_argument('files', nargs='+')
+    p_add.add_argument('--dut', default='')
+    p_add.add_argument('--ratio', type=float, default=20.0)
+    p_add.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                       help="Büyük CSV'leri okuyan süreç sayısı")
+
+    p_query = sub.add_parser('query', help="Harmonik sorgusu")
+    p_query.add_argument('--dut')
+    p_query.add_argument('--channel')
+    p_query.add_argument('--harmonic', type=int)
+    p_query.add_argument('--min-percent', type=float)
+    p_query.add_argument('--status', choices=['PASS', 'FAIL', 'FUND'])
+    p_query.add_argument('--from', dest='date_from')
+    p_query.add_argument('--to', dest='date_to')
+    p_query.add_argument('--limit', type=int, default=1000)
+
+    p_trend = sub.add_parser('trend', help="Metrik zaman serisi")
+    p_trend.add_argument('--dut', required=True)
+    p_trend.add_argument('--channel', default='DIFF')
+    p_trend.add_argument('--metric', default='thd', help="thd, tdd, rms, pf, ... veya H3, H5, ...")
+
+    sub.add_parser('duts', help="DUT listesi")
+    args = parser.parse_args()
+
+    with ResultsStore(args.db) as store:
+        t0 = time.perf_counter()
+        if args.command == 'add':
+            from harmonic_core import load_rigol_csv, analyze_capture
+            from analysis_pipeline import default_settings
+            settings = default_settings(ratio=args.ratio)
+            records = []
+            for fp in args.files:
+                data = load_rigol_csv(fp, workers=args.workers)
+                records.append((fp, analyze_capture(data, settings), args.dut, None,
+                                {'source': 'csv', 'sample_rate': data['sample_rate'],
+                                 'points': len(data['time'])}))
+            store.add_many(records)
+            print(f"{len(records)} kayıt eklendi")
+        elif args.command == 'query':
+            rows = store.query(args.dut, args.channel, args.harmonic, args.min_percent, args.status,
+                               args.date_from, args.date_to, args.limit)
+            for r in rows:
+                print(f"{r['captured_at']}  {r['dut']:<12} {r['channel']:<5} H{r['harmonic']:<3} "
+                      f"{r['amplitude']*1000:9.2f}mA  %{r['percent']:6.1f}  {r['status']:<4}  {r['file']}")
+            print(f"{len(rows)} satır")
+        elif args.command == 'trend':
+            rows = store.trend(args.dut, args.channel, args.metric)
+            for r in rows:
+                print(f"{r['captured_at']}  {r['value']:10.4f}  {r['file']}")
+            print(f"{len(rows)} nokta")
+        elif args.command == 'duts':
+            for r in store.duts():
+                print(f"{r['dut'] or '(boş)':<16} {r['captures']:6d} kayıt  {r['failed']:5d} FAIL  "
+                      f"{r['first']} .. {r['last']}")
+        print(f"({(time.perf_counter() - t0) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
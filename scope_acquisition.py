@@ -0,0 +1,609 @@
+"""
+ Osiloskop Canlı Veri Toplama - Rigol DS1000Z / DS1202Z-E SCPI
+ ==============================================================
+ - TCP soket (LXI, port 5555) üzerinden SCPI komutları
+ - :WAV:DATA? TMC blokları ham BYTE modunda okunur
+ - Soketten gelen baytlar doğrudan hedef tampona yazılır (recv_into),
+   numpy dizisi kopyasız oluşturulur (np.frombuffer)
+ - Bir sonraki blok indirilirken mevcut blok analiz edilir (pipeline)
+ - Çevrimdışı test için yerel SCPI simülatörü (sentetik CH1/CH2)
+
+ Kullanım:
+   python scope_acquisition.py --serve              # simülatörü başlat
+   python scope_acquisition.py --host 127.0.0.1     # tek çerçeve oku
+   python scope_acquisition.py --simulate --analyze # simülatör + sürekli analiz
+"""
+
+import socket
+import socketserver
+import threading
+import queue
+import asyncio
+import argparse
+import time
+import numpy as np
+
+SCPI_PORT = 5555
+
+# DS1000Z RAW/BYTE modunda tek :WAV:DATA? sorgusunda okunabilecek en fazla nokta
+MAX_POINTS_PER_READ = 250000
+
+# Dikey çözünürlük: ekranda 8 bölme x 25 seviye, orta seviye 127
+LEVELS_PER_DIV = 25
+Y_REFERENCE = 127
+
+
+def parse_preamble(text):
+    """:WAV:PRE? cevabını sözlüğe çevir"""
+    fields = text.strip().split(',')
+    if len(fields) < 10:
+        raise ValueError(f"Geçersiz :WAV:PRE? cevabı: '{text.strip()}'")
+    return {
+        'format': int(fields[0]),
+        'type': int(fields[1]),
+        'points': int(fields[2]),
+        'count': int(fields[3]),
+        'xincrement': float(fields[4]),
+        'xorigin': float(fields[5]),
+        'xreference': float(fields[6]),
+        'yincrement': float(fields[7]),
+        'yorigin': float(fields[8]),
+        'yreference': float(fields[9]),
+    }
+
+
+def parse_tmc_header(header):
+    """TMC blok başlığını çöz: '#9000001200' -> (başlık uzunluğu, veri uzunluğu)"""
+    if len(header) < 2 or header[0:1] != b'#':
+        raise ValueError(f"TMC blok başlığı bekleniyordu: {bytes(header[:12])!r}")
+    n_digits = int(header[1:2])
+    if n_digits == 0:
+        raise ValueError("Belirsiz uzunluklu TMC blokları desteklenmiyor")
+    return 2 + n_digits, int(header[2:2 + n_digits])
+
+
+def bytes_to_volts(raw, preamble, out=None):
+    """Ham BYTE örneklerini volta çevir: (raw - yorigin - yref) * yinc"""
+    if out is None:
+        out = np.empty(len(raw), dtype=np.float64)
+    np.subtract(raw, preamble['yorigin'] + preamble['yreference'], out=out, casting='unsafe')
+    out *= preamble['yincrement']
+    return out
+
+
+def build_frame(volts, preamble, host, port):
+    """Kanal gerilimlerinden analizörün veri sözlüğünü oluştur"""
+    from harmonic_core import TimeAxis
+    dt = preamble['xincrement']
+    n_points = preamble['points']
+    time_axis = TimeAxis(preamble['xorigin'] - preamble['xreference'] * dt, dt, n_points)
+    return {
+        'time': time_axis,
+        'ch1': volts.get('ch1'),
+        'ch2': volts.get('ch2'),
+        'dt': dt,
+        'sample_rate': 1 / dt,
+        'has_ch2': volts.get('ch2') is not None,
+        'filepath': f"scpi://{host}:{port}",
+        'source': 'scope',
+        'acquired_at': time.time()
+    }
+
+
+class RigolScpiClient:
+    """Rigol osiloskop için minimal SCPI istemcisi (ham soket)"""
+
+    def __init__(self, host, port=SCPI_PORT, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.sock = None
+        self.bytes_received = 0
+
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return self
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def __enter__(self):
+        return self.connect()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, command):
+        """Komut gönder (cevap beklemez)"""
+        self.sock.sendall(command.encode('ascii') + b'\n')
+
+    def _read_line(self):
+        chunks = []
+        while True:
+            c = self.sock.recv(1)
+            if not c:
+                raise ConnectionError("Osiloskop bağlantısı kapandı")
+            if c == b'\n':
+                break
+            chunks.append(c)
+        line = b''.join(chunks)
+        self.bytes_received += len(line) + 1
+        return line.decode('ascii', errors='replace')
+
+    def query(self, command):
+        """Sorgu gönder, tek satır cevap oku"""
+        self.write(command)
+        return self._read_line()
+
+    def _recv_exact_into(self, view):
+        """Tam olarak len(view) bayt oku, doğrudan verilen tampona yaz"""
+        received = 0
+        total = len(view)
+        while received < total:
+            n = self.sock.recv_into(view[received:], total - received)
+            if n == 0:
+                raise ConnectionError("Blok okunurken bağlantı kapandı")
+            received += n
+        self.bytes_received += total
+
+    def read_block_into(self, view):
+        """:WAV:DATA? TMC bloğunu oku, veriyi view içine yaz; okunan bayt sayısını döndür"""
+        head = bytearray(11)
+        self._recv_exact_into(memoryview(head)[:2])
+        if head[0:1] != b'#':
+            raise ValueError(f"TMC blok başlığı bekleniyordu: {bytes(head[:2])!r}")
+        n_digits = int(head[1:2])
+        self._recv_exact_into(memoryview(head)[2:2 + n_digits])
+        _, n_bytes = parse_tmc_header(bytes(head[:2 + n_digits]))
+        if n_bytes > len(view):
+            raise ValueError(f"Blok ({n_bytes} bayt) hedef tampondan ({len(view)} bayt) büyük")
+        self._recv_exact_into(view[:n_bytes])
+        # Blok sonundaki '\n'
+        self._recv_exact_into(memoryview(bytearray(1)))
+        return n_bytes
+
+    def read_channel(self, channel, mode='RAW'):
+        """Bir kanalın kaydını BYTE formatında oku -> (uint8 dizi, preamble)"""
+        source = channel.upper().replace('CH', 'CHAN')
+        self.write(f":WAV:SOUR {source}")
+        self.write(f":WAV:MODE {mode}")
+        self.write(":WAV:FORM BYTE")
+        preamble = parse_preamble(self.query(":WAV:PRE?"))
+        n_points = preamble['points']
+
+        # Tüm kayıt tek tampona, parça parça ve kopyasız yazılır
+        buffer = bytearray(n_points)
+        view = memoryview(buffer)
+        start = 0
+        while start < n_points:
+            stop = min(start + MAX_POINTS_PER_READ, n_points)
+            self.write(f":WAV:STAR {start + 1}")
+            self.write(f":WAV:STOP {stop}")
+            self.write(":WAV:DATA?")
+            start += self.read_block_into(view[start:stop])
+
+        return np.frombuffer(buffer, dtype=np.uint8), preamble
+
+    def acquire_frame(self, channels=('CH1', 'CH2'), single=True, mode='RAW', trigger_timeout=10.0):
+        """Tek tetikleme ile CH1/CH2 kaydını al, analizörün veri sözlüğü formatında döndür"""
+        if single:
+            self.write(":SING")
+            deadline = time.monotonic() + trigger_timeout
+            while self.query(":TRIG:STAT?").strip().upper() != 'STOP':
+                if time.monotonic() > deadline:
+                    raise TimeoutError("Osiloskop tetiklenmedi (:TRIG:STAT? STOP değil)")
+                time.sleep(0.01)
+        else:
+            self.write(":STOP")
+
+        volts = {}
+        preamble = None
+        for ch in channels:
+            raw, preamble = self.read_channel(ch, mode=mode)
+            volts[ch.lower()] = bytes_to_volts(raw, preamble)
+
+        if not single:
+            self.write(":RUN")
+
+        return build_frame(volts, preamble, self.host, self.port)
+
+
+class AsyncRigolScpiClient:
+    """RigolScpiClient'in asyncio sürümü.
+
+    Bloklar loop.sock_recv_into ile doğrudan hedef tampona okunur, böylece
+    asenkron yolda da soketten numpy dizisine ek kopya yapılmaz.
+    """
+
+    def __init__(self, host, port=SCPI_PORT, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.sock = None
+        self.bytes_received = 0
+
+    async def connect(self):
+        loop = asyncio.get_running_loop()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setblocking(False)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        await asyncio.wait_for(loop.sock_connect(self.sock, (self.host, self.port)), self.timeout)
+        return self
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    async def write(self, command):
+        await asyncio.get_running_loop().sock_sendall(self.sock, command.encode('ascii') + b'\n')
+
+    async def _recv_exact_into(self, view):
+        loop = asyncio.get_running_loop()
+        received = 0
+        total = len(view)
+        while received < total:
+            n = await asyncio.wait_for(loop.sock_recv_into(self.sock, view[received:]), self.timeout)
+            if n == 0:
+                raise ConnectionError("Blok okunurken bağlantı kapandı")
+            received += n
+        self.bytes_received += total
+
+    async def _read_line(self):
+        line = bytearray()
+        one = bytearray(1)
+        while True:
+            await self._recv_exact_into(memoryview(one))
+            if one == b'\n':
+                return line.decode('ascii', errors='replace')
+            line += one
+
+    async def query(self, command):
+        await self.write(command)
+        return await self._read_line()
+
+    async def read_block_into(self, view):
+        head = bytearray(11)
+        await self._recv_exact_into(memoryview(head)[:2])
+        if head[0:1] != b'#':
+            raise ValueError(f"TMC blok başlığı bekleniyordu: {bytes(head[:2])!r}")
+        n_digits = int(head[1:2])
+        await self._recv_exact_into(memoryview(head)[2:2 + n_digits])
+        _, n_bytes = parse_tmc_header(bytes(head[:2 + n_digits]))
+        if n_bytes > len(view):
+            raise ValueError(f"Blok ({n_bytes} bayt) hedef tampondan ({len(view)} bayt) büyük")
+        await self._recv_exact_into(view[:n_bytes])
+        await self._recv_exact_into(memoryview(bytearray(1)))
+        return n_bytes
+
+    async def read_channel(self, channel, mode='RAW'):
+        source = channel.upper().replace('CH', 'CHAN')
+        await self.write(f":WAV:SOUR {source}")
+        await self.write(f":WAV:MODE {mode}")
+        await self.write(":WAV:FORM BYTE")
+        preamble = parse_preamble(await self.query(":WAV:PRE?"))
+        n_points = preamble['points']
+
+        buffer = bytearray(n_points)
+        view = memoryview(buffer)
+        start = 0
+        while start < n_points:
+            stop = min(start + MAX_POINTS_PER_READ, n_points)
+            await self.write(f":WAV:STAR {start + 1}")
+            await self.write(f":WAV:STOP {stop}")
+            await self.write(":WAV:DATA?")
+            start += await self.read_block_into(view[start:stop])
+
+        return np.frombuffer(buffer, dtype=np.uint8), preamble
+
+    async def acquire_frame(self, channels=('CH1', 'CH2'), mode='RAW', trigger_timeout=10.0):
+        """Tek tetikleme ile kayıt al (RigolScpiClient.acquire_frame ile aynı format)"""
+        await self.write(":SING")
+        deadline = time.monotonic() + trigger_timeout
+        while (await self.query(":TRIG:STAT?")).strip().upper() != 'STOP':
+            if time.monotonic() > deadline:
+                raise TimeoutError("Osiloskop tetiklenmedi (:TRIG:STAT? STOP değil)")
+            await asyncio.sleep(0.01)
+
+        volts = {}
+        preamble = None
+        for ch in channels:
+            raw, preamble = await self.read_channel(ch, mode=mode)
+            volts[ch.lower()] = bytes_to_volts(raw, preamble)
+        return build_frame(volts, preamble, self.host, self.port)
+
+
+class AcquisitionPipeline:
+    """Arka planda sürekli çerçeve indiren üretici iş parçacığı.
+
+    Kuyruk derinliği (prefetch) kadar çerçeve önceden indirilir; böylece
+    tüketici bir çerçeveyi analiz ederken bir sonraki blok ağdan gelir.
+    """
+
+    def __init__(self, host, port=SCPI_PORT, channels=('CH1', 'CH2'), prefetch=1,
+                 mode='RAW', timeout=5.0):
+        self.client = RigolScpiClient(host, port, timeout=timeout)
+        self.channels = channels
+        self.mode = mode
+        self.frames = queue.Queue(maxsize=max(1, prefetch))
+        self.error = None
+        self.stats = {'frames': 0, 'bytes': 0, 'fetch_time': 0.0}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.client.connect()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='scope-acquisition', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.client.timeout + 1)
+            self._thread = None
+        self.client.close()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                t0 = time.perf_counter()
+                frame = self.client.acquire_frame(self.channels, mode=self.mode)
+                self.stats['fetch_time'] = time.perf_counter() - t0
+                self.stats['frames'] += 1
+                self.stats['bytes'] = self.client.bytes_received
+                # Kuyruk doluysa tüketici analiz ederken bekle (geri basınç)
+                while not self._stop.is_set():
+                    try:
+                        self.frames.put(frame, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+        except Exception as e:
+            self.error = e
+
+    def get_frame(self, timeout=None):
+        """Sıradaki çerçeveyi al (yoksa None)"""
+        try:
+            return self.frames.get(timeout=timeout) if timeout else self.frames.get_nowait()
+        except queue.Empty:
+            return None
+
+    def run(self, analyze, max_frames=None):
+        """Çerçeveleri sırayla analyze(frame) fonksiyonuna besle"""
+        count = 0
+        while self.running or not self.frames.empty():
+            frame = self.get_frame(timeout=0.5)
+            if frame is None:
+                continue
+            analyze(frame)
+            count += 1
+            if max_frames is not None and count >= max_frames:
+                break
+        if self.error is not None:
+            raise self.error
+
+
+# ===================== SCPI SİMÜLATÖRÜ =====================
+
+def synthesize_kcl_currents(n_points, sample_rate, fundamental=50.0, t0=0.0,
+                            cap_current=2.0, dut_current=1.0, noise=0.005, rng=None):
+    """KCL düzeneği için sentetik akımlar: CH1 = I_kapasitör + I_DUT, CH2 = I_kapasitör"""
+    rng = rng if rng is not None else np.random.default_rng()
+    t = t0 + np.arange(n_points) / sample_rate
+    w = 2 * np.pi * fundamental
+
+    # Kapasitör akımı: temel + şebeke kirliliğinden gelen küçük 5. harmonik
+    i_cap = cap_current * np.cos(w * t) + 0.05 * cap_current * np.sin(5 * w * t)
+
+    # DUT: doğrultucu tipi tek harmonikler (3, 5, 7, ...)
+    i_dut = dut_current * np.sin(w * t)
+    for h, rel in ((3, 0.80), (5, 0.55), (7, 0.30), (9, 0.12), (11, 0.08), (13, 0.05)):
+        i_dut += dut_current * rel * np.sin(h * w * t + 0.3 * h)
+
+    ch1 = i_cap + i_dut + rng.normal(0, noise, n_points)
+    ch2 = i_cap + rng.normal(0, noise, n_points)
+    return ch1, ch2
+
+
+class _ScpiHandler(socketserver.StreamRequestHandler):
+    """Tek istemci bağlantısı: satır satır SCPI komutlarını işle"""
+
+    def setup(self):
+        super().setup()
+        self.state = {'source': 'CHAN1', 'mode': 'NORM', 'format': 'BYTE',
+                      'start': 1, 'stop': 1200}
+
+    def handle(self):
+        try:
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    break
+                command = line.decode('ascii', errors='replace').strip()
+                if command:
+                    self.server.dispatch(self, command)
+        except (ConnectionError, OSError):
+            # İstemci bağlantıyı kesti
+            pass
+
+    def reply(self, text):
+        self.wfile.write(text.encode('ascii') + b'\n')
+        self.wfile.flush()
+
+    def reply_block(self, payload):
+        self.wfile.write(b'#9%09d' % len(payload))
+        self.wfile.write(payload)
+        self.wfile.write(b'\n')
+        self.wfile.flush()
+
+
+class ScopeSimulator(socketserver.ThreadingTCPServer):
+    """DS1202Z-E davranışını taklit eden yerel SCPI sunucusu.
+
+    Her :SING komutunda CH1/CH2 için yeni bir sentetik çerçeve üretir ve
+    8 bit olarak nicemler. port=0 verilirse boş bir port seçilir.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=SCPI_PORT, memory_depth=240000,
+                 sample_rate=1e6, volt_per_div=(0.2, 0.2), ratio=20.0,
+                 fundamental=50.0, seed=None):
+        super().__init__((host, port), _ScpiHandler)
+        self.memory_depth = int(memory_depth)
+        self.sample_rate = float(sample_rate)
+        self.volt_per_div = {'CHAN1': volt_per_div[0], 'CHAN2': volt_per_div[1]}
+        self.ratio = ratio
+        self.fundamental = fundamental
+        self.rng = np.random.default_rng(seed)
+        self.frame_count = 0
+        self.lock = threading.Lock()
+        self._thread = None
+        self._capture()
+
+    @property
+    def address(self):
+        return self.server_address[:2]
+
+    def start(self):
+        """Sunucuyu arka plan iş parçacığında başlat"""
+        self._thread = threading.Thread(target=self.serve_forever, name='scope-simulator', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def _capture(self):
+        """Yeni tetikleme: sentetik akımları üret, CT ölçeğiyle volta çevirip nicemle"""
+        t0 = self.frame_count * 1.0 + self.rng.uniform(0, 1 / self.fundamental)
+        ch1, ch2 = synthesize_kcl_currents(self.memory_depth, self.sample_rate,
+                                           self.fundamental, t0=t0, rng=self.rng)
+        frame = {}
+        for source, current in (('CHAN1', ch1), ('CHAN2', ch2)):
+            yinc = self.volt_per_div[source] / LEVELS_PER_DIV
+            codes = np.rint(current / self.ratio / yinc) + Y_REFERENCE
+            frame[source] = np.clip(codes, 0, 255).astype(np.uint8)
+        with self.lock:
+            self.frame = frame
+            self.frame_count += 1
+
+    def preamble(self, state):
+        source = state['source']
+        points = self.memory_depth if state['mode'] != 'NORM' else 1200
+        xinc = 1 / self.sample_rate if state['mode'] != 'NORM' else self.memory_depth / self.sample_rate / 1200
+        yinc = self.volt_per_div.get(source, 1.0) / LEVELS_PER_DIV
+        return (f"0,{0 if state['mode'] == 'NORM' else 2},{points},1,{xinc:e},"
+                f"{-points / 2 * xinc:e},0,{yinc:e},0,{Y_REFERENCE}")
+
+    def waveform_bytes(self, state):
+        with self.lock:
+            data = self.frame.get(state['source'])
+        if data is None:
+            return b''
+        if state['mode'] == 'NORM':
+            step = self.memory_depth // 1200
+            return data[::step][:1200].tobytes()
+        start = max(1, state['start']) - 1
+        stop = min(state['stop'], self.memory_depth, start + MAX_POINTS_PER_READ)
+        return data[start:stop].tobytes()
+
+    def dispatch(self, handler, command):
+        state = handler.state
+        head, _, arg = command.partition(' ')
+        head = head.upper()
+
+        if head == '*IDN?':
+            handler.reply("RIGOL TECHNOLOGIES,DS1202Z-E,SIM000000001,00.06.03.SP1")
+        elif head in (':SING', ':SINGLE', ':RUN'):
+            self._capture()
+        elif head == ':STOP':
+            pass
+        elif head in (':TRIG:STAT?', ':TRIGGER:STATUS?'):
+            handler.reply('STOP')
+        elif head in (':WAV:SOUR', ':WAVEFORM:SOURCE'):
+            state['source'] = arg.strip().upper()
+        elif head in (':WAV:MODE', ':WAVEFORM:MODE'):
+            state['mode'] = arg.strip().upper()
+        elif head in (':WAV:FORM', ':WAVEFORM:FORMAT'):
+            state['format'] = arg.strip().upper()
+        elif head in (':WAV:STAR', ':WAVEFORM:START'):
+            state['start'] = int(arg)
+        elif head in (':WAV:STOP', ':WAVEFORM:STOP'):
+            state['stop'] = int(arg)
+        elif head in (':WAV:PRE?', ':WAVEFORM:PREAMBLE?'):
+            handler.reply(self.preamble(state))
+        elif head in (':WAV:DATA?', ':WAVEFORM:DATA?'):
+            handler.reply_block(self.waveform_bytes(state))
+        elif head in (':ACQ:SRAT?', ':ACQUIRE:SRATE?'):
+            handler.reply(f"{self.sample_rate:e}")
+        elif head in (':ACQ:MDEP?', ':ACQUIRE:MDEPTH?'):
+            handler.reply(str(self.memory_depth))
+        elif head.endswith('?'):
+            handler.reply('0')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rigol SCPI canlı veri toplama / simülatör")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=SCPI_PORT)
+    parser.add_argument('--serve', action='store_true', help="Yalnızca simülatörü çalıştır")
+    parser.add_argument('--simulate', action='store_true', help="Yerel simülatörü başlatıp ona bağlan")
+    parser.add_argument('--analyze', action='store_true', help="Çerçeveleri sürekli analiz et")
+    parser.add_argument('--frames', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.serve:
+        sim = ScopeSimulator(args.host, args.port)
+        print(f"SCPI simülatörü dinliyor: {args.host}:{args.port}")
+        try:
+            sim.serve_forever()
+        except KeyboardInterrupt:
+            sim.server_close()
+        return
+
+    sim = None
+    host, port = args.host, args.port
+    if args.simulate:
+        sim = ScopeSimulator(host, 0).start()
+        host, port = sim.address
+
+    pipeline = AcquisitionPipeline(host, port).start()
+    try:
+        if args.analyze:
+            from harmonic_core import HarmonicAnalyzer
+            analyzer = HarmonicAnalyzer()
+
+            def analyze(frame):
+                for ch in ('ch1', 'ch2'):
+                    if frame[ch] is not None:
+                        m = analyzer.calculate_all_metrics(frame[ch] * 20.0, frame['sample_rate'])
+                        print(f"{ch.upper()}: f0={m['fundamental']:.2f}Hz RMS={m['rms']:.3f}A THD={m['thd']:.1f}%")
+                diff = (frame['ch1'] - frame['ch2']) * 20.0
+                m = analyzer.calculate_all_metrics(diff, frame['sample_rate'])
+                print(f"DIFF: RMS={m['rms']:.3f}A THD={m['thd']:.1f}% | "
+                      f"indirme {pipeline.stats['fetch_time']*1000:.0f}ms")
+        else:
+            def analyze(frame):
+                print(f"Çerçeve: {len(frame['time']):,} nokta, {frame['sample_rate']/1e6:.2f}MSa/s, "
+                      f"indirme {pipeline.stats['fetch_time']*1000:.0f}ms")
+        pipeline.run(analyze, max_frames=args.frames)
+    finally:
+        pipeline.stop()
+        if sim is not None:
+            sim.stop()
+
+
+if __name__ == "__main__":
+    main()
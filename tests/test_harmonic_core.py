@@ -0,0 +1,227 @@
+"""
+ harmonic_core sentetik sinyal testleri
+ ======================================
+ Bilinen genlik/faz/frekanstaki sinüs toplamları analiz motorlarına verilir,
+ sonuçlar analitik değerlerle karşılaştırılır.
+
+ Çalıştırma:
+   python -m pytest -q
+"""
+
+import concurrent.futures
+
+import numpy as np
+import pytest
+
+from harmonic_core import (AnalysisSettings, ChannelSettings, CHANNEL_NAMES, combine_rows, cycle_metrics,
+                           HarmonicAnalyzer, HarmonicTable, TimeAxis, analyze_capture, harmonic_power,
+                           IEC_CLASS_A_LIMITS, load_rigol_csv, ObservationPeriodEvaluator,
+                           parse_channel_expression, read_csv_parallel, read_rigol_header)
+
+SAMPLE_RATE = 100000.0
+F0 = 50.0
+
+
+def sine_sum(components, n, sample_rate=SAMPLE_RATE, f0=F0):
+    """{harmonik: (tepe genlik, faz rad)} bileşenlerinin toplamı"""
+    t = np.arange(n) / sample_rate
+    return sum(amp * np.sin(2 * np.pi * h * f0 * t + phase) for h, (amp, phase) in components.items())
+
+
+def make_capture(signals, sample_rate=SAMPLE_RATE):
+    """Kanal sinyallerinden (osiloskop gerilimleri) load_rigol_csv biçiminde veri sözlüğü"""
+    names = [ch for ch in CHANNEL_NAMES if ch in signals]
+    matrix = np.vstack([np.asarray(signals[ch], dtype=np.float64) for ch in names])
+    data = {
+        'time': TimeAxis(0.0, 1 / sample_rate, matrix.shape[1]),
+        'dt': 1 / sample_rate,
+        'sample_rate': sample_rate,
+        'has_ch2': 'CH2' in names,
+        'channels': matrix,
+        'channel_names': names,
+        'source': 'test'
+    }
+    for ch in CHANNEL_NAMES:
+        data[ch.lower()] = matrix[names.index(ch)] if ch in names else None
+    return data
+
+
+def write_rigol_csv(path, columns, increment=1 / SAMPLE_RATE, start=-0.5):
+    """Rigol dalga formu CSV'si: iki başlık satırı, sıra no + kanal sütunları, satır sonunda ','"""
+    names = [ch for ch in CHANNEL_NAMES if ch in columns]
+    n = len(columns[names[0]])
+    with open(path, 'w') as f:
+        f.write('X,' + ','.join(names) + ',Start,Increment,\n')
+        f.write('Sequence,' + ','.join(['Volt'] * len(names)) + f',{start:e},{increment:e}\n')
+        np.savetxt(f, np.column_stack([np.arange(n)] + [columns[ch] for ch in names]),
+                   fmt=['%d'] + ['%.6e'] * len(names), delimiter=',', newline=',\n')
+
+
+# ===================== ANALİZ =====================
+
+CURRENT = {1: (2.0, 0.3), 3: (0.6, 1.1), 5: (0.25, -0.4), 7: (0.1, 2.0)}
+
+
+def test_analyze_capture_harmonics():
+    n = int(SAMPLE_RATE)
+    data = make_capture({'CH1': sine_sum(CURRENT, n) / 20, 'CH2': sine_sum({1: (1.0, 0.0)}, n) / 20})
+    settings = AnalysisSettings(40, [ChannelSettings('CH1'), ChannelSettings('CH2')])
+    results = analyze_capture(data, settings)
+
+    assert set(results) == {'CH1', 'CH2', 'DIFF'}
+    res = results['CH1']
+    assert res['fundamental'] == pytest.approx(F0, abs=1e-6)
+    for h, (amp, _) in CURRENT.items():
+        assert res['harmonics'][h - 1]['amplitude'] == pytest.approx(amp, rel=1e-6)
+    expected_thd = np.sqrt(0.6 ** 2 + 0.25 ** 2 + 0.1 ** 2) / 2.0 * 100
+    assert res['thd'] == pytest.approx(expected_thd, rel=1e-6)
+    assert res['rms'] == pytest.approx(np.sqrt(sum(a ** 2 for a, _ in CURRENT.values()) / 2), rel=1e-6)
+    # Filtresiz DIFF spektrumdan: CH1 - CH2
+    assert results['DIFF']['harmonics'][0]['amplitude'] == pytest.approx(
+        abs(2.0 * np.exp(0.3j) - 1.0), rel=1e-6)
+    # H3 = 0.6 A tepe, Class A limiti 2.30 A
+    assert res['passed']
+
+
+def test_analyze_capture_executor_matches_serial():
+    n = 50000
+    rng = np.random.default_rng(0)
+    signals = {ch: (sine_sum(CURRENT, n) * (k + 1) + rng.normal(0, 0.01, n)) / 20
+               for k, ch in enumerate(CHANNEL_NAMES)}
+    settings = AnalysisSettings(40, [ChannelSettings(ch, filter_enabled=(ch == 'CH4')) for ch in CHANNEL_NAMES],
+                                expressions=('CH1-CH2-CH3', '0.5*CH4'))
+    serial = analyze_capture(make_capture(signals), settings)
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        parallel = analyze_capture(make_capture(signals), settings, executor=executor)
+
+    assert list(serial) == list(parallel)
+    for ch in serial:
+        for key in ('fundamental', 'thd', 'tdd', 'rms', 'ipk', 'cf', 'pf'):
+            assert parallel[ch][key] == pytest.approx(serial[ch][key], rel=1e-12), (ch, key)
+        np.testing.assert_allclose(parallel[ch]['harmonics']['amplitude'], serial[ch]['harmonics']['amplitude'],
+                                   rtol=1e-12)
+
+
+# ===================== KANAL İFADELERİ =====================
+
+def test_parse_channel_expression():
+    np.testing.assert_array_equal(parse_channel_expression('CH1-CH2-CH3'), [1, -1, -1, 0])
+    np.testing.assert_array_equal(parse_channel_expression(' 0.5*ch1 + 2CH4 −CH1 '), [-0.5, 0, 0, 2])
+    for bad in ('', 'CH1CH2', 'CH5', 'CH1*2', 'CH1-CH1'):
+        with pytest.raises(ValueError):
+            parse_channel_expression(bad)
+
+
+def test_combine_rows_in_place():
+    rng = np.random.default_rng(1)
+    matrix = rng.normal(size=(4, 1000)) + 1j * rng.normal(size=(4, 1000))
+    coeffs = np.array([parse_channel_expression('CH1-CH2-CH3'), parse_channel_expression('0.5*CH4')])
+    expected = coeffs @ matrix
+    np.testing.assert_allclose(combine_rows(coeffs, matrix), expected)
+    # Çıktı matrisin ilk satırlarına yazılabilir
+    out = combine_rows(coeffs, matrix, matrix[:2])
+    np.testing.assert_allclose(out, expected)
+    np.testing.assert_allclose(matrix[:2], expected)
+
+
+# ===================== HARMONİK TABLOSU =====================
+
+def test_harmonic_table_thd_tdd():
+    orders = np.arange(1, 41)
+    amplitude = np.zeros(40)
+    amplitude[[0, 2, 4]] = [4.0, 1.2, 0.9]
+    limits = np.array([IEC_CLASS_A_LIMITS.get(h, 0) if h > 1 else 0 for h in orders])
+    table = HarmonicTable.from_arrays(orders, orders * F0, amplitude, np.zeros(40), limits)
+
+    assert table.thd() == pytest.approx(1.5 / 4.0 * 100)
+    assert table.tdd() == pytest.approx(table.thd())
+    assert table.tdd(fundamental_rms=5.0) == pytest.approx(1.5 / 5.0 * 100)
+    assert table.thd(max_order=3) == pytest.approx(1.2 / 4.0 * 100)
+    assert table.passed()
+    assert HarmonicTable.from_arrays(orders[:1], [F0], [0.0], [0.0], [0.0]).thd() == 0
+
+
+# ===================== CSV OKUMA =====================
+
+def test_read_csv_parallel_matches_pandas(tmp_path):
+    n = 20000
+    rng = np.random.default_rng(2)
+    columns = {'CH1': rng.normal(size=n), 'CH3': sine_sum({1: (0.1, 0.0)}, n)}
+    path = str(tmp_path / 'capture.csv')
+    write_rigol_csv(path, columns)
+
+    data = load_rigol_csv(path)
+    assert data['channel_names'] == ['CH1', 'CH3']
+    assert data['sample_rate'] == pytest.approx(SAMPLE_RATE)
+    assert data['time'].t0 == pytest.approx(-0.5)
+    np.testing.assert_allclose(data['channels'][0], columns['CH1'], rtol=1e-6)
+
+    header = read_rigol_header(path)
+    matrix = read_csv_parallel(path, header['data_offset'], header['usecols'], 2)
+    np.testing.assert_array_equal(matrix, data['channels'])
+
+
+# ===================== GÖZLEM SÜRESİ =====================
+
+def test_observation_period_split_captures():
+    n = int(2.3 * SAMPLE_RATE)
+    signal = sine_sum({1: (10.0, 0.0), 3: (2.0, 0.5), 5: (0.5, 0.0)}, n)
+
+    whole = ObservationPeriodEvaluator()
+    whole.add_capture(signal, SAMPLE_RATE)
+    split = ObservationPeriodEvaluator()
+    for part in np.array_split(signal, [33333, 150001]):
+        split.add_capture(part, SAMPLE_RATE)
+
+    # 10 periyotluk (200 ms) pencereler; son eksik pencere sayılmaz
+    assert whole.windows == split.windows == 11
+    assert whole.duration == pytest.approx(2.2)
+    a, b = whole.result(), split.result()
+    np.testing.assert_allclose(a['average'], b['average'], rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(a['maximum'], b['maximum'], rtol=1e-9, atol=1e-12)
+    assert a['passed']
+    # Sabit genlikte yumuşatılmış değer RMS'tir: 2.0 A tepe H3 -> 1.414 A, Class A limiti 2.30 A RMS
+    assert a['average'][2] == pytest.approx(2.0 / np.sqrt(2), rel=1e-6)
+    assert a['maximum'][2] == pytest.approx(2.0 / np.sqrt(2), rel=1e-6)
+    assert a['average_percent'][2] == pytest.approx(2.0 / np.sqrt(2) / IEC_CLASS_A_LIMITS[3] * 100, rel=1e-6)
+
+    with pytest.raises(ValueError):
+        whole.add_capture(signal, SAMPLE_RATE / 2)
+    with pytest.raises(ValueError):
+        ObservationPeriodEvaluator().result()
+
+
+# ===================== PERİYOT METRİKLERİ =====================
+
+def test_cycle_metrics():
+    n = int(0.5 * SAMPLE_RATE)
+    signal = sine_sum({1: (3.0, 0.2), 3: (0.3, 0.0)}, n)
+    cycles = cycle_metrics(signal, SAMPLE_RATE)
+
+    assert len(cycles['rms']) in (23, 24)
+    np.testing.assert_allclose(cycles['frequency'], F0, rtol=1e-3)
+    np.testing.assert_allclose(cycles['rms'], np.sqrt((3.0 ** 2 + 0.3 ** 2) / 2), rtol=1e-3)
+    np.testing.assert_allclose(cycles['thd'], 10.0, rtol=1e-2)
+    np.testing.assert_allclose(cycles['cf'], cycles['peak'] / cycles['rms'])
+    assert len(cycle_metrics(np.zeros(1000), SAMPLE_RATE)['rms']) == 0
+
+
+# ===================== GÜÇ =====================
+
+def test_harmonic_power_matches_time_domain():
+    n = int(SAMPLE_RATE)
+    rng = np.random.default_rng(3)
+    v = sine_sum({1: (325.0, 0.0), 5: (6.0, 0.7)}, n) + rng.normal(0, 1.0, n)
+    i = sine_sum({1: (2.0, -0.5), 3: (0.8, 0.2), 5: (0.4, 1.0)}, n) + rng.normal(0, 0.01, n)
+    v -= v.mean()
+    i -= i.mean()
+
+    analyzer = HarmonicAnalyzer()
+    spectra = analyzer.compute_spectra([v, i])
+    power = harmonic_power(spectra, [0], [1], n, SAMPLE_RATE, [F0])[0]
+
+    assert power['P'] == pytest.approx(np.mean(v * i), rel=1e-9)
+    assert power['S'] == pytest.approx(np.sqrt(np.mean(v ** 2) * np.mean(i ** 2)), rel=1e-9)
+    assert power['p'][0] == pytest.approx(325.0 * 2.0 / 2 * np.cos(0.5), rel=1e-3)
+    assert power['p'][4] == pytest.approx(6.0 * 0.4 / 2 * np.cos(0.7 - 1.0), rel=1e-2)
+    assert power['pf'] == pytest.approx(power['P'] / power['S'])
@@ -0,0 +1,458 @@
+"""
+ Klasör İzleme - Yeni Osiloskop CSV Dosyalarını Otomatik Analiz
+ ==============================================================
+ - Linux'ta inotify (IN_CLOSE_WRITE / IN_MOVED_TO), diğer sistemlerde yoklama
+ - Dosya tamamen yazılmadan analiz edilmez (settle arayla iki eşit imza + satır sonu)
+ - Dosyalar işçi süreç havuzunda analiz edilir
+ - Sonuçlar dönen (rolling) rapor dosyasına eklenir
+ - İşlenen dosyaların dizini (ekleme günlüklü) tutulur; yeniden başlatmada tekrar işlenmez
+
+ Kullanım:
+   python watch_folder.py KLASÖR [--report rapor.txt] [--workers 2] [--poll]
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import select
+import struct
+import ctypes
+import ctypes.util
+import argparse
+import threading
+import multiprocessing
+import concurrent.futures
+from datetime import datetime
+
+INDEX_NAME = '.harmonic_index.json'
+REPORT_NAME = 'harmonic_watch_report.txt'
+
+# inotify olay maskeleri (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def is_capture_file(name):
+    return name.lower().endswith('.csv') and not name.startswith('.')
+
+
+def file_signature(path):
+    """Dosyanın (boyut, değişim zamanı) imzası; dosya yoksa None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def ends_with_newline(path):
+    """Rigol CSV satırları '\\n' ile biter; yarım yazılmış dosya genelde bitmez"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+    except OSError:
+        return False
+
+
+class ProcessedIndex:
+    """İşlenmiş dosyaların JSON dizini: yol -> imza ve sonuç özeti.
+
+    Her işaretleme, dizinin tamamı yeniden yazılmadan yanındaki .journal
+    dosyasına tek JSON satırı olarak eklenir; yüklemede günlük dizine
+    uygulanır. compact() (durdurmada veya günlük compact_every satıra
+    ulaşınca) günlüğü dizine katlar.
+    """
+
+    def __init__(self, path, compact_every=500):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.compact_every = compact_every
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.journal_lines = 0
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+        if os.path.exists(self.journal_path):
+            try:
+                with open(self.journal_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue  # çökme sırasında yarım kalmış son satır
+                        self.entries[entry.pop('path')] = entry
+                        self.journal_lines += 1
+            except OSError:
+                pass
+
+    def is_processed(self, path, signature):
+        entry = self.entries.get(os.path.abspath(path))
+        return entry is not None and tuple(entry['signature']) == tuple(signature)
+
+    def mark(self, path, signature, status):
+        with self.lock:
+            key = os.path.abspath(path)
+            self.entries[key] = {
+                'signature': list(signature),
+                'status': status,
+                'processed_at': datetime.now().isoformat(timespec='seconds')
+            }
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'path': key, **self.entries[key]}, ensure_ascii=False) + '\n')
+            self.journal_lines += 1
+            if self.journal_lines >= self.compact_every:
+                self._compact()
+
+    def compact(self):
+        """Günlüğü dizine katla (dizin yazılıp günlük silinir)"""
+        with self.lock:
+            self._compact()
+
+    def _compact(self):
+        if self.journal_lines == 0 and not os.path.exists(self.journal_path):
+            return
+        # Dizin önce yazılır: arada çökülürse günlük tekrar uygulanır (aynı sonuç)
+        self.save()
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+        self.journal_lines = 0
+
+    def save(self):
+        # Yarım yazılmış dizin bırakmamak için geçici dosya + atomik değiştirme
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+class RollingReport:
+    """Sonuçları metin rapora ekler; boyut sınırı aşılınca .1, .2 ... olarak döndürür"""
+
+    def __init__(self, path, max_bytes=5 * 1024 * 1024, backups=5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.lock = threading.Lock()
+
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def append(self, text):
+        with self.lock:
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(text) > self.max_bytes:
+                self._rotate()
+            new_file = not os.path.exists(self.path)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                if new_file:
+                    f.write("=" * 80 + "\n")
+                    f.write("          KLASÖR İZLEME HARMONİK ANALİZ RAPORU\n")
+                    f.write("=" * 80 + "\n")
+                f.write(text)
+
+
+def analyze_file(filepath, settings):
+    """İşçi süreçte çalışır: dosyayı oku, analiz et, küçük bir özet döndür"""
+    from harmonic_core import load_rigol_csv, analyze_capture
+    results = analyze_capture(load_rigol_csv(filepath), settings)
+    return {
+        ch: {
+            'thd': float(res['thd']),
+            'tdd': float(res['tdd']),
+            'pf': float(res['pf']),
+            'rms': float(res['rms']),
+            'fundamental': float(res['fundamental']),
+            'passed': bool(res['passed']),
+            'failed': res['failed']['harmonic'].tolist()
+        }
+        for ch, res in results.items()
+    }
+
+
+def format_summary(filepath, summary):
+    """Tek dosyanın rapor satırları (save_batch_report ile aynı biçim)"""
+    text = f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Dosya: {filepath}\n"
+    for ch, res in summary.items():
+        status = "PASS" if res['passed'] else "FAIL"
+        text += f"{ch}: THD={res['thd']:.2f}%, TDD={res['tdd']:.2f}%, PF={res['pf']:.4f}, IEC={status}\n"
+        if res['failed']:
+            text += f"  Limit Aşan: {', '.join(f'H{h}' for h in res['failed'])}\n"
+    return text
+
+
+class InotifyWatcher:
+    """ctypes ile Linux inotify; yalnızca kapanmış/taşınmış dosyaları bildirir"""
+
+    def __init__(self, folder):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 başarısız")
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(folder), IN_CLOSE_WRITE | IN_MOVED_TO)
+        if wd < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch başarısız: {folder}")
+        self.folder = folder
+
+    def poll(self, timeout):
+        """Olay gelen dosya adlarını döndür; kuyruk taştıysa None (tam tarama gerekir)"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names = []
+        offset = 0
+        while offset < len(buf):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(buf, offset)
+            offset += _EVENT_HEADER.size
+            name = buf[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Yoklama yedeği: klasörü periyodik tarar, imzası iki taramada değişmeyenleri bildirir"""
+
+    def __init__(self, folder, interval=1.0):
+        self.folder = folder
+        self.interval = interval
+        self.pending = {}
+        self.reported = {}
+
+    def poll(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        ready = []
+        try:
+            names = [n for n in os.listdir(self.folder) if is_capture_file(n)]
+        except OSError:
+            return []
+        for name in names:
+            signature = file_signature(os.path.join(self.folder, name))
+            if signature is None:
+                continue
+            if self.pending.get(name) == signature and self.reported.get(name) != signature:
+                ready.append(name)
+                self.reported[name] = signature
+            self.pending[name] = signature
+        return ready
+
+    def close(self):
+        pass
+
+
+class FolderWatchService:
+    """Klasörü izler, tamamlanan yeni CSV dosyalarını işçi havuzunda analiz eder"""
+
+    def __init__(self, folder, settings, report_path=None, index_path=None, workers=2,
+                 use_inotify=None, settle=1.0, on_result=None):
+        self.folder = os.path.abspath(folder)
+        self.settings = settings
+        self.report = RollingReport(report_path or os.path.join(self.folder, REPORT_NAME))
+        self.index = ProcessedIndex(index_path or os.path.join(self.folder, INDEX_NAME))
+        self.workers = max(1, workers)
+        self.use_inotify = sys.platform.startswith('linux') if use_inotify is None else use_inotify
+        self.settle = settle
+        self.on_result = on_result
+        self.stats = {'queued': 0, 'done': 0, 'failed': 0, 'skipped': 0}
+        self._candidates = queue.Queue()
+        self._in_flight = set()
+        self._stop = threading.Event()
+        self._threads = []
+        self._executor = None
+        self.watcher = None
+
+    def start(self):
+        if self.use_inotify:
+            try:
+                self.watcher = InotifyWatcher(self.folder)
+            except (OSError, AttributeError):
+                self.watcher = None
+        if self.watcher is None:
+            self.watcher = PollingWatcher(self.folder, interval=self.settle)
+
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context('spawn'))
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._watch_loop, name='folder-watch', daemon=True),
+                         threading.Thread(target=self._dispatch_loop, name='folder-dispatch', daemon=True)]
+        for t in self._threads:
+            t.start()
+        # Servis kapalıyken gelen dosyalar
+        self.scan()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+        if self._executor is not None:
+            # Tk iş parçacığından çağrılır: süren analizler beklenmez, kuyruktakiler iptal
+            # edilir (işaretlenmedikleri için sonraki başlatmada tarama ile yeniden gelirler)
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
+        self.index.compact()
+
+    @property
+    def mode(self):
+        return 'inotify' if isinstance(self.watcher, InotifyWatcher) else 'yoklama'
+
+    def scan(self):
+        """Klasördeki tüm CSV dosyalarını aday olarak ekle (dizindekiler atlanır)"""
+        try:
+            names = sorted(os.listdir(self.folder))
+        except OSError:
+            return
+        for name in names:
+            if is_capture_file(name):
+                self._candidates.put(os.path.join(self.folder, name))
+
+    def _watch_loop(self):
+        while not self._stop.is_set():
+            names = self.watcher.poll(0.5)
+            if names is None:
+                self.scan()
+                continue
+            for name in names:
+                if is_capture_file(name):
+                    self._candidates.put(os.path.join(self.folder, name))
+
+    def _is_complete(self, path, signature, seen):
+        """Dosya yazımı bitti mi: settle saniye arayla okunan iki imza aynı olmalı ve
+        dosya satır sonu ile bitmeli. Adayı hangi izleyici (inotify, yoklama veya
+        tarama) bulmuş olursa olsun uygulanır.
+
+        seen: yol -> (imza, okuma zamanı); beklemeden, ilk okuma burada saklanır.
+        Tamamlanmamışsa dosyanın yeniden denenebileceği zaman, tamamsa None döner.
+        """
+        now = time.monotonic()
+        previous = seen.get(path)
+        if signature[0] == 0 or previous is None or previous[0] != signature:
+            seen[path] = (signature, now)
+            return now + self.settle
+        if now - previous[1] < self.settle:
+            return previous[1] + self.settle
+        if not ends_with_newline(path):
+            seen[path] = (signature, now)
+            return now + self.settle
+        del seen[path]
+        return None
+
+    def _dispatch_loop(self):
+        retry = {}
+        seen = {}
+        while not self._stop.is_set():
+            # Henüz tamamlanmamış dosyaları tekrar dene; sürekli yeni dosya gelse de
+            # (kuyruk hiç boşalmasa da) her turda kontrol edilir
+            now = time.monotonic()
+            for path, due in list(retry.items()):
+                if now >= due:
+                    del retry[path]
+                    self._candidates.put(path)
+            try:
+                path = self._candidates.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            signature = file_signature(path)
+            if signature is None or path in self._in_flight:
+                continue
+            if self.index.is_processed(path, signature):
+                self.stats['skipped'] += 1
+                continue
+            due = self._is_complete(path, signature, seen)
+            if due is not None:
+                retry[path] = due
+                continue
+
+            self._in_flight.add(path)
+            self.stats['queued'] += 1
+            future = self._executor.submit(analyze_file, path, self.settings)
+            future.add_done_callback(lambda f, p=path, sig=signature: self._finished(p, sig, f))
+
+    def _finished(self, path, signature, future):
+        if future.cancelled():
+            self._in_flight.discard(path)
+            return
+        try:
+            summary = future.result()
+        except Exception as e:
+            self.stats['failed'] += 1
+            self.index.mark(path, signature, f"HATA: {e}")
+            self._in_flight.discard(path)
+            self.report.append(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Dosya: {path}\n"
+                               f"  Analiz hatası: {e}\n")
+            if self.on_result:
+                self.on_result(path, None, e)
+            return
+
+        self.stats['done'] += 1
+        passed = all(res['passed'] for res in summary.values())
+        self.index.mark(path, signature, "PASS" if passed else "FAIL")
+        self._in_flight.discard(path)
+        self.report.append(format_summary(path, summary))
+        if self.on_result:
+            self.on_result(path, summary, None)
+
+
+def main():
+    from analysis_pipeline import default_settings
+
+    parser = argparse.ArgumentParser(description="Klasör izleme ile otomatik harmonik analiz")
+    parser.add_argument('folder')
+    parser.add_argument('--report', help="Rapor dosyası (varsayılan: klasör içinde)")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument('--ratio', type=float, default=20.0, help="CH1/CH2 A/V oranı")
+    parser.add_argument('--poll', action='store_true', help="inotify yerine yoklama kullan")
+    args = parser.parse_args()
+
+    def on_result(path, summary, error):
+        name = os.path.basename(path)
+        if error is not None:
+            print(f"✗ {name}: {error}")
+        else:
+            print(f"✓ {name}: " + ', '.join(f"{ch} THD={res['thd']:.1f}%" for ch, res in summary.items()))
+
+    service = FolderWatchService(args.folder, default_settings(ratio=args.ratio),
+                                 report_path=args.report, workers=args.workers,
+                                 use_inotify=not args.poll, on_result=on_result)
+    service.start()
+    print(f"İzleniyor ({service.mode}): {service.folder}  |  Ctrl+C ile çıkış")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()